@@ -1,45 +1,191 @@
+import json
+import os
 import sys
 
-from src import logger, setup_argparse, DataExplorer, BranchProcessor
+from src.cli import package_filter_options, setup_argparse
 
 
 def main():
     """Точка входа CLI"""
     parser = setup_argparse()
     args = parser.parse_args()
+    if args.command == 'matrix' and len(set(args.branches)) < 2:
+        parser.error("для matrix нужны хотя бы две ветки в --branches")
+    if getattr(args, 'engine', None) == 'numpy':
+        # Недоступный движок должен обнаруживаться до загрузки веток, а не при сравнении
+        from src import numpy_backend
+
+        if not numpy_backend.is_available():
+            parser.error("--engine numpy требует установленного пакета numpy (pip install -e .[numpy])")
+    if args.command == 'query':
+        # Клиенту демона не нужны модули загрузки и сравнения
+        if args.action in ('package', 'report') and not args.target:
+            parser.error(f"для query {args.action} нужно указать имя")
+        from src.client import run_query
+        sys.exit(run_query(args))
+
+    # Модули загрузки и сравнения импортируются после разбора аргументов: --help и ошибки
+    # в аргументах не платят за их загрузку
+    from src import logger, setup_logging, DataExplorer, BranchProcessor, BranchCache
+    from src.comparator import RPMVersionComparator
+    from src.filters import PackageFilter
+    from src.metrics import metrics, peak_rss_bytes
+
+    # stdout занят результатом - логи выводятся в stderr
+    to_stdout = args.output == '-' or (args.format == 'ndjson' and args.output is None)
+    setup_logging(stream=sys.stderr if to_stdout else sys.stdout)
+
+    metrics_path = args.metrics or ('metrics.json' if args.profile else None)
+    if args.profile:
+        metrics.start_memory_tracking()
+        metrics.start_profile(os.path.splitext(metrics_path)[0] + '.prof')
 
     try:
+        RPMVersionComparator.set_tokenizer(args.tokenizer)
+
         # Инициализация DataExplorer
         logger.info(f"Инициализация DataExplorer")
-        data_explorer = DataExplorer()
-        success = data_explorer.explore_api()
+        cache = BranchCache(args.cache_dir, ttl=args.cache_ttl) if args.cache_dir else None
+        source, data_dir = args.source, args.data_dir
+        if args.command == 'snapshot' and args.action == 'load':
+            source, data_dir = 'file', args.dir
+
+        def make_explorer():
+            return DataExplorer(
+                max_workers=args.workers,
+                source=source,
+                streaming=args.stream,
+                cache=cache,
+                data_dir=data_dir,
+                package_filter=PackageFilter(**package_filter_options(args)),
+                low_memory=args.low_memory,
+                branches=getattr(args, 'branches', None)
+            )
+
+        if args.command == 'serve':
+            from src.server import BranchService, serve
+
+            service = BranchService(make_explorer, refresh_interval=args.refresh,
+                                    processor_options={"engine": args.engine})
+            serve(service, args.listen)
+            return
+
+        data_explorer = make_explorer()
+
+        # Кэш результатов: при неизменном содержимом веток отчёты восстанавливаются без разбора
+        result_cache = result_key = None
+        if getattr(args, 'result_cache', None):
+            from src.incremental import PreviousRun
+            from src.processor import COMMAND_SECTIONS
+            from src.report_writer import report_paths
+            from src.result_cache import ResultCache
+
+            if report_paths(COMMAND_SECTIONS[args.command], args.output, args.format, args.gzip) is None:
+                logger.info("Кэш результатов не используется при выводе в stdout")
+            elif args.source == 'url' and cache is None:
+                logger.info("Кэш результатов не используется: хеши веток доступны для --source file или --cache-dir")
+            else:
+                with metrics.span("digest"):
+                    digests = data_explorer.payload_digests()
+                if digests is not None:
+                    result_cache = ResultCache(args.result_cache)
+                    # С --state отчёт изменений и новое состояние зависят и от прошлого состояния
+                    state = getattr(args, 'state', None)
+                    result_key = ResultCache.key(digests, args.command, {
+                        **package_filter_options(args),
+                        "output": args.output, "format": args.format, "compact": args.compact,
+                        "gzip": args.gzip, "engine": args.engine, "tokenizer": args.tokenizer,
+                        "state": state, "state_digest": state and PreviousRun.digest(state),
+                    })
+                    entry = result_cache.restore(result_key)
+                    if entry is not None:
+                        logger.info(f"Результат команды {args.command}: {entry['result']}")
+                        return
+
+        with metrics.span("load"):
+            success = data_explorer.explore_api()
         if not success:
             logger.info(f"Некоторые ветки не загружены, завершение работы")
             return
 
+        if args.command == 'snapshot':
+            if args.action == 'save':
+                with metrics.span("snapshot_save"):
+                    data_explorer.save_snapshots(args.dir)
+            for branch in data_explorer.branches:
+                for arch, packages in sorted(data_explorer.tables[branch].items()):
+                    logger.info(f"Ветка {branch}, {arch}: {len(packages)} пакетов")
+            return
+
+        if args.command == 'matrix':
+            from src.matrix import BranchMatrix
+
+            matrix = BranchMatrix(
+                data_explorer.tables,
+                engine=args.engine,
+                compact=args.compact,
+                compress=args.gzip,
+                output=args.output,
+                output_format=args.format
+            )
+            logger.info(f"Выполнение команды: matrix {args.mode}, ветки: {', '.join(matrix.branches)}")
+            with metrics.span("command.matrix"):
+                result = matrix.pairwise() if args.mode == 'pairwise' else matrix.newest()
+            logger.info(f"Результат команды matrix: {result}")
+            return
+
+        # Состояние инкрементального compare-all действительно только для тех же фильтров
+        previous = state_key = None
+        if getattr(args, 'state', None):
+            from src.incremental import PreviousRun
+
+            state_key = json.dumps(package_filter_options(args), sort_keys=True)
+            previous = PreviousRun.load(args.state, key=state_key)
+
         processor = BranchProcessor(
             data_explorer.sisyphus_packages_by_arch,
             data_explorer.p11_packages_by_arch,
             data_explorer.sisyphus_packages_names,
-            data_explorer.p11_packages_names
+            data_explorer.p11_packages_names,
+            engine=args.engine,
+            compact=args.compact,
+            compress=args.gzip,
+            output=args.output,
+            output_format=args.format,
+            jobs=args.jobs,
+            previous=previous
         )
 
         # Выполнение команды
         logger.info(f"Выполнение команды: {args.command}")
 
-        if args.command == 'p11-not-in-sisyphus':
-            result = processor.p11_not_in_sisyphus()
+        with metrics.span(f"command.{args.command}"):
+            if args.command == 'p11-not-in-sisyphus':
+                result = processor.p11_not_in_sisyphus()
 
-        elif args.command == 'sisyphus-not-in-p11':
-            result = processor.sisyphus_not_in_p11()
+            elif args.command == 'sisyphus-not-in-p11':
+                result = processor.sisyphus_not_in_p11()
 
-        elif args.command == 'compare-versions':
-            result = processor.version_release_comparison()
-        else:
-            result = "Unexpected command"
+            elif args.command == 'compare-versions':
+                result = processor.version_release_comparison()
+
+            elif args.command == 'compare-all':
+                result = processor.compare_all()
+                if previous is not None:
+                    tables = {"sisyphus": processor.sisyphus_packages_by_arch, "p11": processor.p11_packages_by_arch}
+                    previous.save(args.state, tables, processor.categories, key=state_key)
+            else:
+                result = "Unexpected command"
 
         if result:
             logger.info(f"Результат команды {args.command}: {result}")
+        if result_cache is not None:
+            from src.processor import report_sections
+
+            files = report_paths(report_sections(args.command, previous), args.output, args.format, args.gzip)
+            if previous is not None:
+                files += PreviousRun.paths(args.state)
+            result_cache.store(result_key, args.command, files, result)
 
     except KeyboardInterrupt:
         print("\n\nПрервано пользователем", file=sys.stderr)
@@ -48,6 +194,14 @@ def main():
         print(f"Ошибка: {e}", file=sys.stderr)
         logger.error(f"Критическая ошибка: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        peak_rss = peak_rss_bytes()
+        if peak_rss is not None:
+            logger.info(f"Пиковое потребление памяти (RSS): {peak_rss / 2 ** 20:.1f} МБ")
+        if metrics_path:
+            metrics.stop_profile()
+            metrics.write(metrics_path, command=args.command)
+            logger.info(f"Метрики запуска сохранены: {metrics_path}")
 
 
 if __name__ == '__main__':
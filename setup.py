@@ -8,6 +8,9 @@ setup(
         'requests>=2.28.0',
         'setuptools>=80.10.2'
     ],
+    extras_require={
+        'numpy': ['numpy>=1.22'],
+    },
     entry_points={
         'console_scripts': [
             'branch-compare=src.main:main',
@@ -1,11 +1,41 @@
-from src.cli import *
-from src.api_client import *
-from src.logging_config import *
-from src.processor import *
+"""
+Публичный интерфейс пакета.
+
+Модули загружаются при первом обращении к имени (PEP 562), поэтому
+`import src` и разбор аргументов CLI не тянут requests и остальные
+зависимости, которые нужны только при загрузке и сравнении веток.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    "logger": "src.logging_config",
+    "setup_logging": "src.logging_config",
+    "DataExplorer": "src.api_client",
+    "BranchCache": "src.cache",
+    "BranchProcessor": "src.processor",
+    "BranchMatrix": "src.matrix",
+    "setup_argparse": "src.cli",
+}
 
 __all__ = [
     "logger",
+    "setup_logging",
     "DataExplorer",
+    "BranchCache",
     "BranchProcessor",
+    "BranchMatrix",
     "setup_argparse",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
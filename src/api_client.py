@@ -1,96 +1,383 @@
+import hashlib
 import json
-from collections import defaultdict
-from typing import List, Dict, Any
-
-import requests
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence
+from urllib.parse import urlencode
 
+from src.cache import BranchCache, file_digest
+from src.filters import PackageFilter
+from src.json_stream import CHUNK_SIZE, StreamParseError, iter_file_chunks, iter_json_array_items
 from src.logging_config import logger
-from src.models import Package
+from src.metrics import metrics
+from src.package_table import PackageTable, StringPool
+from src.snapshot import SNAPSHOT_SUFFIX, Snapshot, is_snapshot, load_snapshot, save_snapshot
 
+API_URL = "https://rdb.altlinux.org/api/export/branch_binary_packages/{branch}"
 
-class DataExplorer:
-    branches = ['sisyphus', 'p11']
 
-    def __init__(self):
-        self.data = {}
-        self.sisyphus_raw: List[Dict[str, Any]] | None = None
-        self.p11_raw: List[Dict[str, Any]] | None = None
+def branch_url(branch: str, arch: Optional[str] = None) -> str:
+    """URL выгрузки ветки; с arch API отдаёт пакеты только этой архитектуры"""
+    url = API_URL.format(branch=branch)
+    return f"{url}?{urlencode({'arch': arch})}" if arch else url
 
-        self.sisyphus_packages_names: Dict[str, set[str]] = defaultdict(set)
-        self.p11_packages_names: Dict[str, set[str]] = defaultdict(set)
 
-        self.sisyphus_packages_by_arch: Dict[str, Dict[str, Package]] = defaultdict(dict)
-        self.p11_packages_by_arch: Dict[str, Dict[str, Package]] = defaultdict(dict)
+def _cache_key(branch: str, arch: Optional[str] = None) -> str:
+    return f"{branch}.{arch}" if arch else branch
 
-    @staticmethod
-    def get_data_from_url(branch):
-        url = f"https://rdb.altlinux.org/api/export/branch_binary_packages/{branch}"
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            return data
 
-        except requests.exceptions.Timeout:
+@contextmanager
+def log_fetch_errors(branch: str):
+    """Логирует и подавляет ошибки получения данных ветки"""
+    try:
+        yield
+    except Exception as e:
+        # requests загружается лениво: если модуль не импортирован, его исключений быть не может
+        requests = sys.modules.get("requests")
+        if requests is not None and isinstance(e, requests.exceptions.Timeout):
             logger.error(f"Таймаут при запросе {branch}")
-        except requests.exceptions.ConnectionError:
+        elif requests is not None and isinstance(e, requests.exceptions.ConnectionError):
             logger.error(f"Ошибка соединения {branch}")
-        except requests.exceptions.HTTPError as e:
+        elif requests is not None and isinstance(e, requests.exceptions.HTTPError):
             logger.error(f"HTTP ошибка {e.response.status_code} {branch}")
-        except json.JSONDecodeError:
+        elif isinstance(e, (json.JSONDecodeError, StreamParseError)):
             logger.error(f"Некорректный JSON {branch}")
-        except Exception:
+        else:
             logger.error(f"Неожиданная ошибка {branch}", exc_info=True)
 
 
+def _count_bytes(chunks: Iterable[bytes], counter: str) -> Iterator[bytes]:
+    """Пропускает фрагменты ответа, учитывая их размер в метриках"""
+    for chunk in chunks:
+        metrics.count(counter, len(chunk))
+        yield chunk
+
+
+class DataExplorer:
+    branches = ['sisyphus', 'p11']
+
+    def __init__(self, max_workers: int = 1, source: str = "url", streaming: bool = False,
+                 cache: Optional[BranchCache] = None, data_dir: str = ".",
+                 package_filter: Optional[PackageFilter] = None, low_memory: bool = False,
+                 branches: Optional[Sequence[str]] = None):
+        # Загружаемые ветки (по умолчанию sisyphus и p11), каждая загружается один раз
+        if branches:
+            self.branches = list(dict.fromkeys(branches))
+        # Количество потоков для параллельной загрузки веток (1 - последовательно)
+        self.max_workers = max(1, max_workers)
+        # Источник данных: "url" - REST API, "file" - локальные файлы <branch>.json
+        self.source = source
+        # Режим экономии памяти: записи разбираются потоково и отбрасываются сразу после
+        # добавления в таблицы, сырые данные веток (data) не сохраняются
+        self.low_memory = low_memory
+        # Потоковый разбор: пакеты индексируются по мере чтения ответа, без полного JSON в памяти
+        self.streaming = streaming or low_memory
+        # Дисковый кэш выгрузок API (None - без кэша)
+        self.cache = cache
+        # Каталог с локальными файлами веток (<branch>.snap или <branch>.json)
+        self.data_dir = data_dir
+        # Фильтр пакетов: применяется при разборе, архитектуры передаются в запрос к API
+        self.package_filter = package_filter
+        # Сырые записи веток (только без потокового разбора)
+        self.data: Dict[str, List[Dict[str, Any]]] = {}
+        # SHA-256 содержимого выгрузок веток, заполняется payload_digests()
+        self.digests: Dict[str, str] = {}
+        # Пути к актуальным копиям в кэше: условный запрос выполняется один раз за загрузку
+        self._cached_paths: Dict[str, Path] = {}
+
+        # Общий пул строк веток: повторяющиеся значения хранятся один раз,
+        # одинаковые EVR разных веток сравниваются проверкой is
+        self.pool = StringPool()
+        # Колоночные таблицы пакетов по веткам: одна структура для поиска и пакетов, и имён
+        self.tables: Dict[str, PackageTable] = {branch: PackageTable(self.pool) for branch in self.branches}
+
+    @property
+    def sisyphus_packages_by_arch(self) -> PackageTable:
+        return self.tables["sisyphus"]
+
+    @property
+    def p11_packages_by_arch(self) -> PackageTable:
+        return self.tables["p11"]
+
+    @property
+    def sisyphus_packages_names(self) -> PackageTable:
+        return self.tables["sisyphus"]
+
+    @property
+    def p11_packages_names(self) -> PackageTable:
+        return self.tables["p11"]
+
+    @staticmethod
+    def get_data_from_url(branch, arch=None):
+        import requests
+
+        url = branch_url(branch, arch)
+        with log_fetch_errors(branch):
+            with metrics.span(f"fetch.{branch}"):
+                response = requests.get(url, timeout=30)
+                response.raise_for_status()
+                metrics.count("bytes_downloaded", len(response.content))
+            with metrics.span(f"parse.{branch}"):
+                data = response.json()
+            return data
+
     @staticmethod
-    def get_data_from_file(branch):
+    def get_data_from_file(branch, path=None, pool: Optional[StringPool] = None):
+        """
+        Читает ветку из JSON-файла или бинарного снимка (определяется по содержимому).
+        Строки снимка переносятся в pool, если он задан
+        """
+        path = path or f'{branch}.json'
         try:
-            with open(f'{branch}.json', 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            if is_snapshot(path):
+                with metrics.span(f"snapshot_load.{branch}"):
+                    return load_snapshot(path, pool)
+            with metrics.span(f"read.{branch}"):
+                with open(path, 'rb') as file:
+                    content = file.read()
+                metrics.count("bytes_read", len(content))
+            with metrics.span(f"parse.{branch}"):
+                data = json.loads(content)
             return data
         except Exception:
-            logger.error(f"Непредвиденная ошибка при попытке получения данных из файла {branch}.json", exc_info=True)
+            logger.error(f"Непредвиденная ошибка при попытке получения данных из файла {path}", exc_info=True)
+
+    def get_data_from_cache(self, branch, arch=None):
+        """Загружает ветку (или одну её архитектуру) через дисковый кэш с условным запросом к API"""
+        with log_fetch_errors(branch):
+            with metrics.span(f"cache_fetch.{branch}"):
+                path = self._cached_payload(branch, arch)
+            return self.get_data_from_file(branch, path)
+
+    @staticmethod
+    def stream_data_from_url(branch, arch=None) -> Iterator[Dict[str, Any]]:
+        """Потоково читает ответ API и возвращает записи пакетов по одной"""
+        import requests
+
+        url = branch_url(branch, arch)
+        with requests.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            chunks = _count_bytes(response.iter_content(chunk_size=CHUNK_SIZE), "bytes_downloaded")
+            yield from iter_json_array_items(chunks)
+
+    @staticmethod
+    def stream_data_from_file(branch, path=None) -> Iterator[Dict[str, Any]]:
+        """Потоково читает файл <branch>.json и возвращает записи пакетов по одной"""
+        with open(path or f'{branch}.json', 'rb') as file:
+            yield from iter_json_array_items(_count_bytes(iter_file_chunks(file), "bytes_read"))
+
+    def stream_data_from_cache(self, branch, arch=None) -> Iterator[Dict[str, Any]]:
+        """Обновляет копию ветки в дисковом кэше и потоково читает её"""
+        path = self._cached_payload(branch, arch)
+        yield from self.stream_data_from_file(branch, path)
+
+    def _cached_payload(self, branch: str, arch: Optional[str] = None) -> Path:
+        """Путь к актуальной копии выгрузки в кэше; при первом обращении копия обновляется"""
+        key = _cache_key(branch, arch)
+        path = self._cached_paths.get(key)
+        if path is None:
+            path = self._cached_paths[key] = self.cache.fetch(key, branch_url(branch, arch))
+        return path
+
+    def payload_digests(self) -> Optional[Dict[str, str]]:
+        """
+        SHA-256 содержимого выгрузок всех веток без их разбора: для --source file
+        хешируется файл ветки, для кэша берётся хеш, вычисленный при скачивании.
+        None, если выгрузки не сохраняются на диск (API без кэша) или ветка недоступна
+        """
+        if self.source == "file":
+            digest = lambda branch: file_digest(self._branch_file(branch))
+        elif self.cache is not None:
+            digest = self._cached_digest
+        else:
+            return None
+
+        def branch_digest(branch: str) -> Optional[str]:
+            with log_fetch_errors(branch), metrics.span(f"digest.{branch}"):
+                return digest(branch)
+
+        digests = dict(zip(self.branches, self._map_branches(branch_digest)))
+        if None in digests.values():
+            return None
+        self.digests = digests
+        return digests
+
+    def _cached_digest(self, branch: str) -> str:
+        """Хеш ветки в кэше; при запросе по архитектурам - хеш из хешей их выгрузок"""
+        arches = self._request_arches()
+        if not arches:
+            self._cached_payload(branch)
+            return self.cache.digest(_cache_key(branch))
+        digest = hashlib.sha256()
+        for arch in arches:
+            self._cached_payload(branch, arch)
+            digest.update(f"{arch}:{self.cache.digest(_cache_key(branch, arch))}\n".encode())
+        return digest.hexdigest()
 
     def explore_api(self):
         try:
+            if self.streaming:
+                return self._explore_streaming()
+
             success = True
-            for branch in self.branches:
-                data = self.get_data_from_url(branch)
+            for branch, data in zip(self.branches, self._fetch_branches()):
                 if data is None:
                     logger.info(f"No data in file {branch}.json")
                     success = False
                     continue
 
                 logger.info(f"Branch: {branch}")
+                if isinstance(data, Snapshot):
+                    self.data.pop(branch, None)
+                    self.tables[branch] = self._apply_filter(data.table)
+                    logger.info(f"Branch {branch}, length {data.length} (снимок)")
+                    continue
+
                 self.data[branch] = data.get("packages")
                 logger.info(f"Branch {branch}, length {data.get('length')}")
 
-            self._process_branch_packages("sisyphus", self.sisyphus_packages_by_arch, self.sisyphus_packages_names)
-            self._process_branch_packages("p11", self.p11_packages_by_arch, self.p11_packages_names)
+            for branch in self.branches:
+                self._process_branch_packages(branch)
             return success
 
         except Exception:
             logger.error(f"Непредвиденная ошибка", exc_info=True)
 
-    def _process_branch_packages(
-            self, branch_name: str, packages_by_arch: Dict[str, Dict[str, Package]],
-            packages_names: Dict[str, set[str]]
-    ):
+    def _explore_streaming(self) -> bool:
+        """Загрузка с потоковым разбором: записи сразу попадают в индексы по архитектурам"""
+        results = self._map_branches(self._stream_branch)
+        return all(results)
+
+    def _stream_branch(self, branch: str) -> bool:
+        """Потоково загружает одну ветку в её индексы. Возвращает False при ошибке"""
+        table = self.tables[branch]
+        table.clear()
+
+        if self.source == "file":
+            path = self._branch_file(branch)
+            if is_snapshot(path):
+                # Снимок уже содержит готовые индексы, потоковый разбор не нужен
+                data = self.get_data_from_file(branch, path, self.pool)
+                if data is None:
+                    return False
+                self.tables[branch] = self._apply_filter(data.table)
+                logger.info(f"Branch {branch}, length {data.length} (снимок)")
+                return True
+            stream = partial(self.stream_data_from_file, path=path)
+        else:
+            stream = self._stream_by_arch(self.stream_data_from_cache if self.cache is not None
+                                          else self.stream_data_from_url)
+
+        with log_fetch_errors(branch), metrics.span(f"stream.{branch}"):
+            count = self._index_packages(stream(branch), table, self.package_filter)
+            metrics.count("packages_parsed", count)
+            logger.info(f"Branch {branch}, length {count}")
+            return True
+
+        # Частично загруженная ветка не должна участвовать в сравнении
+        table.clear()
+        return False
+
+    def _fetch_branches(self):
+        """Загружает все ветки из выбранного источника"""
+        if self.source == "file":
+            return self._map_branches(
+                lambda branch: self.get_data_from_file(branch, self._branch_file(branch), self.pool))
+        fetch = self.get_data_from_cache if self.cache is not None else self.get_data_from_url
+        return self._map_branches(partial(self._fetch_by_arch, fetch))
+
+    def _request_arches(self) -> Optional[Iterable[str]]:
+        """Архитектуры для запросов к API или None, если нужна вся ветка"""
+        if self.package_filter is None:
+            return None
+        return self.package_filter.arches
+
+    def _fetch_by_arch(self, fetch, branch: str):
+        """
+        Загружает ветку через fetch(branch[, arch]). Если фильтр задаёт архитектуры,
+        каждая запрашивается отдельно, остальные не скачиваются вовсе
+        """
+        arches = self._request_arches()
+        if not arches:
+            return fetch(branch)
+        parts = [fetch(branch, arch) for arch in arches]
+        if any(part is None for part in parts):
+            return None
+        packages = [record for part in parts for record in part.get("packages") or []]
+        return {"length": len(packages), "packages": packages}
+
+    def _stream_by_arch(self, stream):
+        """Потоковый аналог _fetch_by_arch: ответы по архитектурам читаются друг за другом"""
+        arches = self._request_arches()
+        if not arches:
+            return stream
+        return lambda branch: chain.from_iterable(stream(branch, arch) for arch in arches)
+
+    def _apply_filter(self, table: PackageTable) -> PackageTable:
+        """Применяет фильтр к таблице, загруженной целиком (снимку)"""
+        if self.package_filter is None:
+            return table
+        return self.package_filter.apply(table)
+
+    def _map_branches(self, func):
+        """Применяет func ко всем веткам, при max_workers > 1 - параллельно. Порядок результатов совпадает с branches"""
+        if self.max_workers == 1:
+            return [func(branch) for branch in self.branches]
+
+        workers = min(self.max_workers, len(self.branches))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as executor:
+            return list(executor.map(func, self.branches))
+
+    def _branch_file(self, branch: str) -> str:
+        """Путь к локальному файлу ветки: снимок, если он есть, иначе JSON"""
+        snapshot_path = os.path.join(self.data_dir, f"{branch}{SNAPSHOT_SUFFIX}")
+        if os.path.exists(snapshot_path):
+            return snapshot_path
+        return os.path.join(self.data_dir, f"{branch}.json")
+
+    def save_snapshots(self, directory: str = ".") -> List[str]:
+        """Сохраняет построенные индексы всех веток в бинарные снимки <branch>.snap"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for branch in self.branches:
+            path = os.path.join(directory, f"{branch}{SNAPSHOT_SUFFIX}")
+            count = save_snapshot(path, self.tables[branch])
+            logger.info(f"Снимок ветки {branch} сохранён: {path}, пакетов {count}")
+            paths.append(path)
+        return paths
+
+    def _process_branch_packages(self, branch_name: str):
         """Общий метод обработки пакетов для любой ветки"""
         branch_raw: List[Dict[str, Any]] | None = self.data.get(branch_name)
         if branch_raw:
-            for pkg_dict in branch_raw:
-                name = pkg_dict.get("name", "")
-                arch = pkg_dict.get("arch", "")
-                package = Package(
-                        name=name,
-                        epoch=pkg_dict.get("epoch", 0),
-                        version=pkg_dict.get("version", ""),
-                        release=pkg_dict.get("release", ""),
-                        arch=arch,
-                        buildtime=pkg_dict.get("buildtime", 0),
-                        source=pkg_dict.get("source", "")
-                    )
-                packages_by_arch[arch][name] = package
-                packages_names[arch].add(name)
+            with metrics.span(f"index.{branch_name}"):
+                count = self._index_packages(branch_raw, self.tables[branch_name], self.package_filter)
+            metrics.count("packages_parsed", count)
+
+    @staticmethod
+    def _index_packages(records: Iterable[Dict[str, Any]], table: PackageTable,
+                        package_filter: Optional[PackageFilter] = None) -> int:
+        """
+        Добавляет записи API в таблицу пакетов ветки. Записи, не прошедшие фильтр,
+        пропускаются до добавления в таблицу. Возвращает количество добавленных записей
+        """
+        if package_filter is not None and package_filter.active:
+            records = filter(package_filter.matches_record, records)
+        count = 0
+        for pkg_dict in records:
+            table.add(
+                pkg_dict.get("arch", ""),
+                pkg_dict.get("name", ""),
+                pkg_dict.get("epoch", 0),
+                pkg_dict.get("version", ""),
+                pkg_dict.get("release", ""),
+                pkg_dict.get("buildtime", 0),
+                pkg_dict.get("source", "")
+            )
+            count += 1
+        return count
@@ -0,0 +1,7 @@
+"""
+Бенчмарки утилиты.
+
+Запуск:
+    python -m src.bench comparator [--output results.json] [--baseline old.json]
+    python -m src.bench pipeline [--size 200000] [--output results.json] [--baseline old.json]
+"""
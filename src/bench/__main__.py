@@ -0,0 +1,112 @@
+import argparse
+import sys
+from typing import Dict
+
+from src.bench import comparator, pipeline
+from src.bench.common import find_regressions, load_results, write_results
+
+
+def setup_argparse() -> argparse.ArgumentParser:
+    """Настройка парсера аргументов бенчмарков"""
+    parser = argparse.ArgumentParser(
+        prog='python -m src.bench',
+        description='Бенчмарки утилиты сравнения пакетов'
+    )
+    subparsers = parser.add_subparsers(dest='suite', required=True)
+
+    comparator_parser = subparsers.add_parser('comparator', help='Микробенчмарки RPMVersionComparator')
+    comparator_parser.add_argument('--size', type=int, default=20000, help='Размер синтетического корпуса пар')
+    comparator_parser.add_argument('--repeat', type=int, default=5, help='Количество повторов, берётся лучший')
+    comparator_parser.add_argument('--seed', type=int, default=1, help='Seed генератора корпуса')
+
+    pipeline_parser = subparsers.add_parser('pipeline', help='Сквозной бенчмарк конвейера на синтетических ветках')
+    pipeline_parser.add_argument('--size', type=int, default=200000, help='Количество пакетов в каждой ветке')
+    pipeline_parser.add_argument(
+        '--arches', type=parse_arches, default=None,
+        help='Архитектуры и их доли: x86_64=0.5,noarch=0.3,i586 (по умолчанию - шесть архитектур ALT)'
+    )
+    pipeline_parser.add_argument('--overlap', type=float, default=0.8, help='Доля общих пакетов веток')
+    pipeline_parser.add_argument('--skew', type=float, default=0.3, help='Доля общих пакетов с разными версиями')
+    pipeline_parser.add_argument('--seed', type=int, default=1, help='Seed генератора веток')
+    pipeline_parser.add_argument('--repeat', type=int, default=1, help='Количество повторов, берётся лучший')
+    pipeline_parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                                 help='Движок сравнения версий')
+    pipeline_parser.add_argument(
+        '--data-dir', help='Каталог с sisyphus.json и p11.json; если файлов нет, они будут сгенерированы туда'
+    )
+    pipeline_parser.add_argument('--no-memory', action='store_true', help='Не замерять пиковую память')
+
+    for suite_parser in subparsers.choices.values():
+        suite_parser.add_argument('--output', help='Сохранить результаты в JSON-файл')
+        suite_parser.add_argument('--baseline', help='JSON-файл предыдущего прогона для сравнения')
+        suite_parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимое ухудшение относительно baseline (доля, по умолчанию 0.2)'
+        )
+
+    return parser
+
+
+def parse_arches(value: str) -> Dict[str, float]:
+    """Разбирает список архитектур вида x86_64=0.5,noarch; без доли архитектура получает вес 1"""
+    arches = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        arch, _, share = item.partition('=')
+        try:
+            arches[arch] = float(share) if share else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Некорректная доля архитектуры: {item}")
+    if not arches:
+        raise argparse.ArgumentTypeError("Список архитектур пуст")
+    return arches
+
+
+def _print_comparator(results):
+    print(f"{'замер':<40} {'пар':>8} {'ops/sec':>14} {'сек':>10}")
+    for name, values in results["results"].items():
+        print(f"{name:<40} {values['pairs']:>8} {values['ops_per_sec']:>14,.0f} {values['seconds']:>10.4f}")
+
+
+def _print_pipeline(results):
+    print(f"{'этап':<40} {'сек':>10} {'пик, МБ':>10}")
+    for name, values in results["results"].items():
+        peak = values.get('peak_bytes')
+        peak = f"{peak / 2 ** 20:>10.1f}" if peak is not None else f"{'-':>10}"
+        print(f"{name:<40} {values['seconds']:>10.4f} {peak}")
+
+
+def main(argv=None) -> int:
+    args = setup_argparse().parse_args(argv)
+
+    if args.suite == 'comparator':
+        results = comparator.run(size=args.size, repeat=args.repeat, seed=args.seed)
+        _print_comparator(results)
+        metrics = [("ops_per_sec", True)]
+    elif args.suite == 'pipeline':
+        results = pipeline.run(
+            size=args.size, arches=args.arches, overlap=args.overlap, skew=args.skew, seed=args.seed,
+            repeat=args.repeat, memory=not args.no_memory, engine=args.engine, data_dir=args.data_dir
+        )
+        _print_pipeline(results)
+        metrics = [("seconds", False), ("peak_bytes", False)]
+
+    if args.output:
+        write_results(args.output, results)
+
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        regressions = [
+            regression
+            for metric, higher_is_better in metrics
+            for regression in find_regressions(
+                results["results"], baseline.get("results", {}), metric, args.threshold, higher_is_better)
+        ]
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def best_time(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> float:
+    """Лучшее время выполнения func из repeat запусков (setup выполняется перед каждым вне замера)"""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).parent
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def environment() -> Dict[str, Any]:
+    """Описание окружения для сопоставления результатов между коммитами"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def write_results(path, results: Dict[str, Any]):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+
+
+def load_results(path) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def find_regressions(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                     metric: str, threshold: float, higher_is_better: bool) -> List[str]:
+    """
+    Сравнивает метрику каждого замера с базовым прогоном.
+    Возвращает описания замеров, ухудшившихся более чем на threshold (доля, 0.2 = 20%).
+    """
+    regressions = []
+    for name, values in current.items():
+        old = baseline.get(name, {}).get(metric)
+        new = values.get(metric)
+        if not old or new is None:
+            continue
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > threshold:
+            regressions.append(f"{name}: {metric} {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
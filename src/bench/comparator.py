@@ -0,0 +1,128 @@
+"""
+Микробенчмарки RPMVersionComparator.
+
+Корпус: случаи из tests/fixtures/version_cases.py и синтетические пары
+версий в стиле ALT Linux. Для каждого замера сообщается ops/sec, отдельно
+измеряются пары с тильдой, чисто числовые и буквенно-цифровые.
+"""
+import random
+import re
+from typing import Any, Dict, List, Tuple
+
+from src.bench.common import best_time, environment
+from src.bench.synthetic import random_release, random_version
+from src.comparator import RPMVersionComparator, _part_sort_key, _split_regex, rpm_sort_key
+from src.numpy_backend import is_available as numpy_available
+
+EVR = Tuple[int, str, str]
+Pair = Tuple[EVR, EVR]
+
+_NUMERIC_RE = re.compile(r"^[0-9.]*$")
+
+
+def case_pairs() -> List[Pair]:
+    """Пары из tests/fixtures/version_cases.py (доступны при запуске из репозитория)"""
+    try:
+        from tests.fixtures.version_cases import ALL_CASES
+    except ImportError:
+        return []
+    return [((e1, v1, r1), (e2, v2, r2)) for e1, v1, r1, e2, v2, r2, _, _ in ALL_CASES]
+
+
+def synthetic_pairs(count: int, seed: int = 1) -> List[Pair]:
+    """
+    Пары версий в стиле ALT Linux: у большинства пар совпадает version или release,
+    как у одного пакета в двух ветках.
+    """
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        epoch = 1 if rng.random() < 0.03 else 0
+        left = (epoch, random_version(rng), random_release(rng))
+        roll = rng.random()
+        if roll < 0.35:
+            right = left
+        elif roll < 0.65:
+            right = (epoch, left[1], random_release(rng))
+        elif roll < 0.80:
+            right = (epoch, random_version(rng), left[2])
+        else:
+            right = (epoch, random_version(rng), random_release(rng))
+        pairs.append((left, right) if rng.random() < 0.5 else (right, left))
+    return pairs
+
+
+def classify(pair: Pair) -> str:
+    """
+    Путь сравнения пары по version: tilde (есть тильда), numeric (только цифры
+    и точки) или alpha. Release почти всегда буквенно-цифровой (altN), поэтому
+    не учитывается.
+    """
+    (_, ver1, _), (_, ver2, _) = pair
+    if "~" in ver1 or "~" in ver2:
+        return "tilde"
+    if _NUMERIC_RE.match(ver1) and _NUMERIC_RE.match(ver2):
+        return "numeric"
+    return "alpha"
+
+
+def _clear_caches():
+    _split_regex.cache_clear()
+    _part_sort_key.cache_clear()
+
+
+def _compare_each(pairs: List[Pair]):
+    compare = RPMVersionComparator.compare_versions
+    for evr1, evr2 in pairs:
+        compare(*evr1, *evr2)
+
+
+def _sort_key_each(pairs: List[Pair]):
+    for evr1, evr2 in pairs:
+        rpm_sort_key(*evr1) > rpm_sort_key(*evr2)
+
+
+def _measure(pairs: List[Pair], func, repeat: int, cold: bool = True) -> Dict[str, float]:
+    seconds = best_time(lambda: func(pairs), repeat, setup=_clear_caches if cold else None)
+    return {
+        "pairs": len(pairs),
+        "seconds": seconds,
+        "ops_per_sec": len(pairs) / seconds if seconds else 0.0,
+    }
+
+
+def run(size: int = 20000, repeat: int = 5, seed: int = 1) -> Dict[str, Any]:
+    """Выполняет все замеры и возвращает результаты в виде словаря для JSON"""
+    pairs = case_pairs() + synthetic_pairs(size, seed)
+    by_path: Dict[str, List[Pair]] = {"tilde": [], "numeric": [], "alpha": []}
+    for pair in pairs:
+        by_path[classify(pair)].append(pair)
+
+    original_tokenizer = RPMVersionComparator.tokenizer
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        RPMVersionComparator.set_tokenizer("legacy")
+        results["compare_versions[legacy]"] = _measure(pairs, _compare_each, repeat)
+
+        RPMVersionComparator.set_tokenizer("regex")
+        results["compare_versions[regex]"] = _measure(pairs, _compare_each, repeat)
+        results["compare_versions[regex,warm]"] = _measure(pairs, _compare_each, repeat, cold=False)
+        for path, path_pairs in by_path.items():
+            if path_pairs:
+                results[f"compare_versions[regex,{path}]"] = _measure(path_pairs, _compare_each, repeat)
+
+        results["rpm_sort_key"] = _measure(pairs, _sort_key_each, repeat)
+        results["compare_many[python]"] = _measure(
+            pairs, lambda batch: RPMVersionComparator.compare_many(batch), repeat)
+        if numpy_available():
+            results["compare_many[numpy]"] = _measure(
+                pairs, lambda batch: RPMVersionComparator.compare_many(batch, engine="numpy"), repeat)
+    finally:
+        RPMVersionComparator.set_tokenizer(original_tokenizer)
+
+    return {
+        "suite": "comparator",
+        "environment": environment(),
+        "corpus": {"pairs": len(pairs), "seed": seed, **{path: len(items) for path, items in by_path.items()}},
+        "results": results,
+    }
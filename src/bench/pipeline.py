@@ -0,0 +1,178 @@
+"""
+Сквозной бенчмарк конвейера на синтетических ветках.
+
+Замеряются этапы: чтение файлов веток, разбор JSON, построение таблиц
+пакетов, каждый отчёт BranchProcessor (без записи файлов) и суммарная
+запись отчётов в JSON. Отдельным проходом под tracemalloc снимается пиковая
+память каждого этапа. Сеть не используется.
+"""
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from src.api_client import DataExplorer
+from src.bench.common import environment
+from src.bench.synthetic import DEFAULT_ARCHES, write_branches
+from src.package_table import PackageTable
+from src.processor import BranchProcessor
+from src.report_writer import JsonArrayWriter
+
+REPORTS = ("p11_not_in_sisyphus", "sisyphus_not_in_p11", "version_release_comparison", "compare_all")
+JSON_WRITE = "json_write"
+_WRITER_METHODS = ("open", "write", "close")
+# Замер этапа: measure(stage, func) вызывает func и возвращает её результат
+Measure = Callable[[str, Callable[[], Any]], Any]
+
+
+@contextmanager
+def _working_directory(path):
+    """Отчёты BranchProcessor пишутся в текущий каталог, поэтому он временно меняется"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class _StageTimer:
+    """Замер времени этапов; время записи JSON вычитается из отчётов и учитывается отдельно"""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.write_seconds = 0.0
+
+    def __call__(self, stage: str, func: Callable[[], Any]):
+        writes_before = self.write_seconds
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        self.seconds[stage] = elapsed - (self.write_seconds - writes_before)
+        return result
+
+    @contextmanager
+    def timed_writes(self):
+        """Отчёты пишутся потоково, поэтому время записи накапливается по вызовам писателя"""
+        originals = {name: JsonArrayWriter.__dict__[name] for name in _WRITER_METHODS}
+
+        def timed(method):
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.write_seconds += time.perf_counter() - start
+            return wrapper
+
+        for name, method in originals.items():
+            setattr(JsonArrayWriter, name, timed(method))
+        try:
+            yield
+        finally:
+            for name, method in originals.items():
+                setattr(JsonArrayWriter, name, method)
+        self.seconds[JSON_WRITE] = self.write_seconds
+
+
+class _MemoryProbe:
+    """Пиковая память (tracemalloc) во время каждого этапа"""
+
+    def __init__(self):
+        self.peak_bytes: Dict[str, int] = {}
+
+    def __call__(self, stage: str, func: Callable[[], Any]):
+        tracemalloc.reset_peak()
+        result = func()
+        self.peak_bytes[stage] = tracemalloc.get_traced_memory()[1]
+        return result
+
+
+def _index(data: Dict[str, Any]) -> PackageTable:
+    table = PackageTable()
+    DataExplorer._index_packages(data.get("packages") or [], table)
+    return table
+
+
+def _read_and_parse(paths: Dict[str, str], measure: Measure) -> Dict[str, Any]:
+    """Этапы fetch и parse; байты файлов освобождаются при выходе, до построения таблиц"""
+    raw = measure("fetch", lambda: {branch: Path(path).read_bytes() for branch, path in paths.items()})
+    return measure("parse", lambda: {branch: json.loads(content) for branch, content in raw.items()})
+
+
+def _load_tables(paths: Dict[str, str], measure: Measure) -> Dict[str, PackageTable]:
+    """Этапы fetch, parse и index; разобранный JSON освобождается при выходе, до отчётов"""
+    data = _read_and_parse(paths, measure)
+    return measure("index", lambda: {branch: _index(branch_data) for branch, branch_data in data.items()})
+
+
+def _run_pipeline(paths: Dict[str, str], measure: Measure, engine: str):
+    """Выполняет конвейер от файлов веток до отчётов, каждый этап через measure"""
+    tables = _load_tables(paths, measure)
+    processor = BranchProcessor(
+        tables["sisyphus"], tables["p11"], tables["sisyphus"], tables["p11"], engine=engine)
+    for report in REPORTS:
+        measure(f"report:{report}", getattr(processor, report))
+
+
+def run(size: int = 200000, arches: Optional[Dict[str, float]] = None, overlap: float = 0.8,
+        skew: float = 0.3, seed: int = 1, repeat: int = 1, memory: bool = True,
+        engine: str = "python", data_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Генерирует пару веток (или использует <data_dir>/<branch>.json, если файлы уже есть)
+    и замеряет этапы конвейера. Для времени берётся лучший из repeat прогонов.
+    """
+    arches = dict(DEFAULT_ARCHES if arches is None else arches)
+    with tempfile.TemporaryDirectory(prefix="bench-pipeline-") as workdir:
+        branch_dir = os.path.abspath(data_dir) if data_dir else workdir
+        paths = {branch: os.path.join(branch_dir, f"{branch}.json") for branch in DataExplorer.branches}
+
+        generate_seconds = None
+        if not all(os.path.exists(path) for path in paths.values()):
+            start = time.perf_counter()
+            write_branches(branch_dir, size=size, arches=arches, overlap=overlap, skew=skew, seed=seed)
+            generate_seconds = time.perf_counter() - start
+
+        seconds: Dict[str, float] = {}
+        with _working_directory(workdir):
+            for _ in range(repeat):
+                timer = _StageTimer()
+                with timer.timed_writes():
+                    _run_pipeline(paths, timer, engine)
+                for stage, value in timer.seconds.items():
+                    seconds[stage] = min(value, seconds.get(stage, value))
+
+            peak_bytes: Dict[str, int] = {}
+            if memory:
+                probe = _MemoryProbe()
+                tracemalloc.start()
+                try:
+                    _run_pipeline(paths, probe, engine)
+                finally:
+                    tracemalloc.stop()
+                peak_bytes = probe.peak_bytes
+
+        file_sizes = {branch: os.path.getsize(path) for branch, path in paths.items()}
+
+    results: Dict[str, Dict[str, float]] = {}
+    for stage, value in seconds.items():
+        results[stage] = {"seconds": value}
+        if stage in peak_bytes:
+            results[stage]["peak_bytes"] = peak_bytes[stage]
+    results["total"] = {"seconds": sum(seconds.values())}
+    if peak_bytes:
+        results["total"]["peak_bytes"] = max(peak_bytes.values())
+
+    return {
+        "suite": "pipeline",
+        "environment": environment(),
+        "corpus": {
+            "size": size, "arches": arches, "overlap": overlap, "skew": skew, "seed": seed,
+            "engine": engine, "file_bytes": file_sizes, "generate_seconds": generate_seconds,
+        },
+        "results": results,
+    }
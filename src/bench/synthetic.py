@@ -0,0 +1,144 @@
+"""
+Генератор синтетических веток в формате выгрузки API.
+
+Пара веток строится так, чтобы напоминать sisyphus и p11: одни и те же
+имена встречаются в нескольких архитектурах, доля общих пакетов задаётся
+overlap, доля общих пакетов с разными версиями - skew.
+"""
+import json
+import os
+import random
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Доли архитектур в типичной ветке ALT Linux
+DEFAULT_ARCHES: Dict[str, float] = {
+    "x86_64": 0.28,
+    "noarch": 0.22,
+    "i586": 0.16,
+    "aarch64": 0.16,
+    "ppc64le": 0.10,
+    "armh": 0.08,
+}
+
+_NUMBER_RE = re.compile(r"[0-9]+")
+_SUFFIXES = ("", "", "", "-devel", "-debuginfo", "-doc", "-libs", "-utils")
+
+Record = Dict[str, Any]
+
+
+def random_version(rng: random.Random) -> str:
+    """Версия в стиле ALT Linux: числовая, с тильдой, дата или снимок git"""
+    kind = rng.random()
+    numbers = ".".join(str(rng.randint(0, 30)) for _ in range(rng.randint(1, 4)))
+    if kind < 0.55:
+        return numbers
+    if kind < 0.70:
+        return f"{numbers}~{rng.choice(['rc', 'beta', 'alpha', 'pre'])}{rng.randint(1, 5)}"
+    if kind < 0.85:
+        return f"{rng.randint(2015, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    return f"{numbers}.git{rng.getrandbits(28):07x}"
+
+
+def random_release(rng: random.Random) -> str:
+    """Релиз в стиле ALT Linux: altN, altN_M, снимок git или qa-пересборка"""
+    kind = rng.random()
+    if kind < 0.6:
+        return f"alt{rng.randint(1, 12)}"
+    if kind < 0.8:
+        return f"alt{rng.randint(0, 3)}_{rng.randint(1, 40)}"
+    if kind < 0.9:
+        return f"alt{rng.randint(1, 5)}.git.{rng.getrandbits(28):07x}"
+    return f"alt{rng.randint(1, 5)}.qa{rng.randint(1, 3)}"
+
+
+def _name(index: int) -> Tuple[str, str]:
+    """Имя бинарного пакета и его исходного пакета по номеру"""
+    source = f"pkg{index // len(_SUFFIXES):06d}"
+    return f"{source}{_SUFFIXES[index % len(_SUFFIXES)]}", source
+
+
+def _record(name: str, source: str, arch: str, epoch: int, version: str, release: str,
+            disttag: str, buildtime: int) -> Record:
+    return {
+        "name": name,
+        "epoch": epoch,
+        "version": version,
+        "release": release,
+        "arch": arch,
+        "disttag": disttag,
+        "buildtime": buildtime,
+        "source": source,
+    }
+
+
+def _increment(value: str) -> str:
+    return _NUMBER_RE.sub(lambda match: str(int(match.group()) + 1), value, count=1)
+
+
+def _bump(version: str, release: str, rng: random.Random) -> Tuple[str, str]:
+    """Более новая версия того же пакета: увеличивается первое число релиза или версии"""
+    if rng.random() < 0.5:
+        return version, _increment(release)
+    return _increment(version), "alt1"
+
+
+def generate_branches(size: int = 200000, arches: Optional[Mapping[str, float]] = None,
+                      overlap: float = 0.8, skew: float = 0.3,
+                      seed: int = 1) -> Tuple[List[Record], List[Record]]:
+    """
+    Генерирует записи пакетов двух веток (sisyphus, p11).
+
+    size - количество пакетов в каждой ветке, arches - доли архитектур,
+    overlap - доля пакетов p11, которые есть и в sisyphus,
+    skew - доля общих пакетов с разными версиями (в основном новее в sisyphus).
+    """
+    arches = DEFAULT_ARCHES if arches is None else arches
+    weight = sum(arches.values())
+    rng = random.Random(seed)
+    sisyphus: List[Record] = []
+    p11: List[Record] = []
+
+    for arch, share in arches.items():
+        count = round(size * share / weight)
+        shared = round(count * overlap)
+        for index in range(count):
+            name, source = _name(index)
+            epoch = 1 if rng.random() < 0.03 else 0
+            version, release = random_version(rng), random_release(rng)
+            buildtime = 1_600_000_000 + rng.randrange(150_000_000)
+
+            if index >= shared:
+                # Пакеты, которых нет в другой ветке: конец диапазона в sisyphus, отдельные имена в p11
+                sisyphus.append(_record(name, source, arch, epoch, version, release, "sisyphus+1", buildtime))
+                p11_name, p11_source = _name(count + index)
+                p11.append(_record(p11_name, p11_source, arch, epoch, version, release, "p11+1", buildtime))
+                continue
+
+            p11.append(_record(name, source, arch, epoch, version, release, "p11+1", buildtime))
+            if rng.random() < skew:
+                newer = _bump(version, release, rng)
+                if rng.random() < 0.85:
+                    version, release = newer
+                else:
+                    p11[-1]["version"], p11[-1]["release"] = newer
+                buildtime += rng.randrange(1, 10_000_000)
+            sisyphus.append(_record(name, source, arch, epoch, version, release, "sisyphus+1", buildtime))
+
+    return sisyphus, p11
+
+
+def write_branch(path, records: List[Record]):
+    """Записывает ветку в файл в формате выгрузки API"""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({"length": len(records), "packages": records}, file)
+
+
+def write_branches(directory: str, **options) -> Dict[str, str]:
+    """Генерирует пару веток и сохраняет их в <directory>/<branch>.json. Возвращает пути"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for branch, records in zip(("sisyphus", "p11"), generate_branches(**options)):
+        paths[branch] = os.path.join(directory, f"{branch}.json")
+        write_branch(paths[branch], records)
+    return paths
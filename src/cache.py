@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.json_stream import CHUNK_SIZE, iter_file_chunks
+from src.logging_config import logger
+
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+
+def file_digest(path) -> str:
+    """SHA-256 содержимого файла, читаемого по частям"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter_file_chunks(file):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BranchCache:
+    """
+    Дисковый кэш выгрузок веток.
+
+    Ответ API хранится в <cache_dir>/<branch>.json, метаданные запроса -
+    в <cache_dir>/<branch>.meta.json. Повторная загрузка выполняется условным
+    запросом (If-None-Match / If-Modified-Since); если сервер не прислал ни ETag,
+    ни Last-Modified, копия считается свежей в течение ttl секунд.
+    SHA-256 выгрузки вычисляется при скачивании и хранится в метаданных.
+    """
+
+    def __init__(self, cache_dir, ttl: int = DEFAULT_TTL,
+                 max_age: int = DEFAULT_MAX_AGE, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_size = max_size
+
+    def payload_path(self, branch: str) -> Path:
+        return self.cache_dir / f"{branch}.json"
+
+    def meta_path(self, branch: str) -> Path:
+        return self.cache_dir / f"{branch}.meta.json"
+
+    def load_meta(self, branch: str) -> Optional[Dict[str, Any]]:
+        """Метаданные закэшированной ветки или None, если копии нет"""
+        if not self.payload_path(branch).exists():
+            return None
+        try:
+            with open(self.meta_path(branch), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _save_meta(self, branch: str, meta: Dict[str, Any]):
+        """
+        Пишет метаданные во временный файл и подменяет их переименованием:
+        параллельная загрузка другой ветки не увидит файл недописанным
+        """
+        meta_path = self.meta_path(branch)
+        fd, tmp_path = tempfile.mkstemp(prefix=meta_path.name, suffix=".tmp", dir=self.cache_dir)
+        try:
+            with open(fd, 'w', encoding='utf-8') as file:
+                json.dump(meta, file)
+            os.replace(tmp_path, meta_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def fetch(self, branch: str, url: str) -> Path:
+        """
+        Возвращает путь к актуальной копии выгрузки ветки,
+        при необходимости скачивая её заново.
+        Ошибки запроса пробрасываются вызывающему коду.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.payload_path(branch)
+        meta = self.load_meta(branch)
+        now = time.time()
+
+        headers = {}
+        if meta is not None:
+            etag, last_modified = meta.get("etag"), meta.get("last_modified")
+            if not etag and not last_modified and now - meta.get("fetched_at", 0) < self.ttl:
+                logger.info(f"Кэш {branch}: копия свежая по TTL")
+                self._touch(branch, meta, now)
+                return path
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        # requests нужен только для запроса к API, офлайн-запуски его не загружают
+        import requests
+
+        with requests.get(url, headers=headers, timeout=30, stream=True) as response:
+            if response.status_code == 304 and meta is not None:
+                logger.info(f"Кэш {branch}: данные не изменились (304)")
+                self._touch(branch, meta, now)
+                return path
+
+            response.raise_for_status()
+
+            tmp_path = path.with_name(path.name + ".tmp")
+            size = 0
+            digest = hashlib.sha256()
+            try:
+                with open(tmp_path, 'wb') as file:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        file.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            # Старые метаданные удаляются до подмены выгрузки: если запуск прервётся
+            # до записи новых, хеш старой выгрузки не будет выдан за хеш новой
+            self.meta_path(branch).unlink(missing_ok=True)
+            os.replace(tmp_path, path)
+
+            self._save_meta(branch, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": now,
+                "checked_at": now,
+                "size": size,
+                "sha256": digest.hexdigest(),
+            })
+        logger.info(f"Кэш {branch}: загружено {size} байт")
+
+        self.evict(keep=branch)
+        return path
+
+    def digest(self, branch: str) -> str:
+        """SHA-256 копии выгрузки; для записей без него вычисляется по файлу и сохраняется"""
+        meta = self.load_meta(branch) or {}
+        digest = meta.get("sha256")
+        if digest is None:
+            digest = file_digest(self.payload_path(branch))
+            if meta:
+                meta["sha256"] = digest
+                self._save_meta(branch, meta)
+        return digest
+
+    def _touch(self, branch: str, meta: Dict[str, Any], now: float):
+        meta["checked_at"] = now
+        self._save_meta(branch, meta)
+
+    def evict(self, keep: Optional[str] = None):
+        """
+        Удаляет записи старше max_age и самые старые записи сверх max_size.
+        Записи с нечитаемыми метаданными пропускаются: удаляются только
+        метаданные, оставшиеся без выгрузки
+        """
+        now = time.time()
+        entries = []
+        for meta_path in self.cache_dir.glob("*.meta.json"):
+            branch = meta_path.name[:-len(".meta.json")]
+            if not self.payload_path(branch).exists():
+                meta_path.unlink(missing_ok=True)
+                continue
+            meta = self.load_meta(branch)
+            if meta is None:
+                continue
+            entries.append((meta.get("checked_at", 0), branch, meta.get("size", 0)))
+
+        entries.sort()
+        total = sum(size for _, _, size in entries)
+        for checked_at, branch, size in entries:
+            if branch == keep:
+                continue
+            if now - checked_at > self.max_age or total > self.max_size:
+                logger.info(f"Кэш {branch}: запись удалена")
+                self._remove(branch)
+                total -= size
+
+    def _remove(self, branch: str):
+        for path in (self.payload_path(branch), self.meta_path(branch)):
+            path.unlink(missing_ok=True)
@@ -1,4 +1,51 @@
 import argparse
+import re
+from typing import Any, Dict, List, Optional
+
+
+def _split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _jobs(value: str) -> Optional[int]:
+    if value == 'auto':
+        return None
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"ожидается auto или целое число не меньше 1: {value!r}")
+    return jobs
+
+
+def _address(value: str) -> str:
+    """Адрес демона: ХОСТ:ПОРТ или unix:ПУТЬ"""
+    if value.startswith('unix:') and len(value) > len('unix:'):
+        return value
+    host, separator, port = value.rpartition(':')
+    if not separator or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"ожидается ХОСТ:ПОРТ или unix:ПУТЬ: {value!r}")
+    return value
+
+
+def _regex(value: str) -> str:
+    try:
+        re.compile(value)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"некорректное регулярное выражение {value!r}: {e}")
+    return value
+
+
+def package_filter_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """Параметры PackageFilter из аргументов командной строки"""
+    arches = [arch for group in args.arch or [] for arch in group]
+    return {
+        "arches": arches or None,
+        "name_glob": args.name,
+        "name_regex": args.name_regex,
+        "source_prefix": args.source_prefix,
+    }
 
 
 def setup_argparse() -> argparse.ArgumentParser:
@@ -8,34 +55,282 @@ def setup_argparse() -> argparse.ArgumentParser:
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Примеры использования:
-  %(prog)s compare-versions
+  %(prog)s compare-all
+  %(prog)s compare-all --output - --compact
+  %(prog)s compare-all --format ndjson | jq -c 'select(.section == "version-release_compare")'
   %(prog)s p11-not-in-sisyphus
   %(prog)s sisyphus-not-in-p11
-  %(prog)s compare-versions
+  %(prog)s snapshot save --dir snapshots
+  %(prog)s compare-versions --source file
+  %(prog)s compare-all --arch x86_64,noarch --name "python3-*"
+  %(prog)s compare-all --state state/
+  %(prog)s compare-all --cache-dir cache --result-cache results
+  %(prog)s matrix --branches sisyphus,p11,p10,p9
+  %(prog)s matrix --branches sisyphus,p11,p10 --mode newest --output matrix.json
+  %(prog)s serve --listen unix:/run/altbranch.sock --cache-dir cache --refresh 1800
+  %(prog)s query package firefox --connect unix:/run/altbranch.sock
+  %(prog)s query report compare-all --arch x86_64 --format ndjson
         """
     )
+
+    # Общие параметры, доступные во всех командах
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument(
+        '--workers',
+        type=int,
+        default=2,
+        help='Количество потоков для параллельной загрузки веток (по умолчанию: 2, 1 - последовательно)'
+    )
+    common_parser.add_argument(
+        '--source',
+        choices=['url', 'file'],
+        default='url',
+        help='Источник данных: REST API или локальные файлы <branch>.snap/<branch>.json (по умолчанию: url)'
+    )
+    common_parser.add_argument(
+        '--data-dir',
+        default='.',
+        help='Каталог локальных файлов веток для --source file (по умолчанию: текущий)'
+    )
+    common_parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Потоковый разбор ответа без загрузки всего JSON в память'
+    )
+    common_parser.add_argument(
+        '--jobs',
+        type=_jobs,
+        default='auto',
+        help='Процессов для сравнения по архитектурам: auto - по числу ядер для больших веток, '
+             '1 - в основном процессе (по умолчанию: auto)'
+    )
+    common_parser.add_argument(
+        '--low-memory',
+        action='store_true',
+        help='Режим экономии памяти: потоковый разбор, записи отбрасываются сразу после индексации'
+    )
+    common_parser.add_argument(
+        '--engine',
+        choices=['python', 'numpy'],
+        default='python',
+        help='Движок пакетного сравнения версий (numpy требует установленного пакета numpy)'
+    )
+    common_parser.add_argument(
+        '--tokenizer',
+        choices=['regex', 'legacy'],
+        default='regex',
+        help='Алгоритм разбиения версий на сегменты: regex (быстрый) или legacy (исходный, для проверки)'
+    )
+    common_parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='Каталог дискового кэша выгрузок API (по умолчанию кэш отключён)'
+    )
+    common_parser.add_argument(
+        '--cache-ttl',
+        type=int,
+        default=3600,
+        help='Время жизни кэша в секундах, если сервер не прислал ETag/Last-Modified (по умолчанию: 3600)'
+    )
+
+    common_parser.add_argument(
+        '--output',
+        default=None,
+        help='Записать результат единым JSON-документом с разбиением по архитектурам '
+             'в файл (- для stdout) вместо отдельных файлов отчётов'
+    )
+    common_parser.add_argument(
+        '--format',
+        choices=['json', 'ndjson'],
+        default='json',
+        help='Формат результата: json или ndjson (по строке на пакет, по умолчанию в stdout)'
+    )
+    common_parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Писать отчёты компактным JSON без отступов'
+    )
+    common_parser.add_argument(
+        '--gzip',
+        action='store_true',
+        help='Сжимать файлы отчётов gzip (<отчёт>.json.gz)'
+    )
+
+    common_parser.add_argument(
+        '--arch',
+        action='append',
+        type=_split_list,
+        default=None,
+        help='Только указанные архитектуры (можно повторять или перечислить через запятую: x86_64,noarch); '
+             'при загрузке из API запрашиваются только они'
+    )
+    common_parser.add_argument(
+        '--name',
+        default=None,
+        help='Только пакеты, имя которых подходит под glob-шаблон (например, "python3-*")'
+    )
+    common_parser.add_argument(
+        '--name-regex',
+        default=None,
+        type=_regex,
+        help='Только пакеты, имя которых подходит под регулярное выражение (проверяется с начала имени)'
+    )
+    common_parser.add_argument(
+        '--source-prefix',
+        default=None,
+        help='Только пакеты, имя исходного пакета которых начинается с префикса'
+    )
+    common_parser.add_argument(
+        '--metrics',
+        default=None,
+        help='Сохранить метрики запуска (время этапов, счётчики) в JSON-файл'
+    )
+    common_parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Отслеживать пиковую память этапов (tracemalloc) и сохранить профиль cProfile '
+             'рядом с файлом метрик (по умолчанию metrics.json и metrics.prof)'
+    )
+
     subparsers = parser.add_subparsers(
         dest='command',
         help='Доступные команды',
         required=True
     )
 
+    # Кэш результатов для команд отчётов по паре sisyphus/p11
+    reports_parser = argparse.ArgumentParser(add_help=False)
+    reports_parser.add_argument(
+        '--result-cache',
+        metavar='DIR',
+        help='Каталог кэша отчётов по хешам содержимого веток: если ветки не изменились, '
+             'отчёты восстанавливаются без разбора (нужны --source file или --cache-dir)'
+    )
+
     # Команда 1: Сравнение версий
     compare_parser = subparsers.add_parser(
         'compare-versions',
+        parents=[common_parser, reports_parser],
         help='Сравнить версии пакетов между ветками'
     )
 
     # Команда 2: Пакеты только в p11
     p11_parser = subparsers.add_parser(
         'p11-not-in-sisyphus',
+        parents=[common_parser, reports_parser],
         help='Показать пакеты, которые есть в p11, но нет в Sisyphus'
     )
 
     # Команда 3: Пакеты только в Sisyphus
     sisyphus_parser = subparsers.add_parser(
         'sisyphus-not-in-p11',
+        parents=[common_parser, reports_parser],
         help='Показать пакеты, которые есть в Sisyphus, но нет в p11'
     )
 
+    # Команда 4: Все отчёты за один запуск
+    all_parser = subparsers.add_parser(
+        'compare-all',
+        parents=[common_parser, reports_parser],
+        help='Построить все три отчёта за одну загрузку и один проход по архитектурам'
+    )
+    all_parser.add_argument(
+        '--state',
+        metavar='DIR',
+        help='Каталог состояния прошлого запуска: версии сравниваются только для изменившихся пакетов, '
+             'дополнительно строится отчёт изменений compare_delta'
+    )
+
+    # Набор веток для команд, которые не ограничены парой sisyphus/p11
+    branches_parser = argparse.ArgumentParser(add_help=False)
+    branches_parser.add_argument(
+        '--branches',
+        type=_split_list,
+        default=['sisyphus', 'p11'],
+        help='Ветки через запятую, каждая загружается один раз (по умолчанию: sisyphus,p11)'
+    )
+
+    # Команда 5: Бинарные снимки веток
+    snapshot_parser = subparsers.add_parser(
+        'snapshot',
+        parents=[common_parser, branches_parser],
+        help='Сохранить индексы веток в бинарные снимки или загрузить их'
+    )
+    snapshot_parser.add_argument(
+        'action',
+        choices=['save', 'load'],
+        help='save - загрузить ветки и сохранить снимки, load - загрузить снимки и вывести статистику'
+    )
+    snapshot_parser.add_argument(
+        '--dir',
+        default='.',
+        help='Каталог снимков <branch>.snap (по умолчанию: текущий)'
+    )
+
+    # Команда 6: Матрица сравнения нескольких веток
+    matrix_parser = subparsers.add_parser(
+        'matrix',
+        parents=[common_parser, branches_parser],
+        help='Сравнить несколько веток за один запуск: попарно или по самой новой версии'
+    )
+    matrix_parser.add_argument(
+        '--mode',
+        choices=['pairwise', 'newest'],
+        default='pairwise',
+        help='pairwise - отчёты compare-all для каждой пары веток, '
+             'newest - ветка с самой новой версией каждого пакета (по умолчанию: pairwise)'
+    )
+
+    # Команда 7: Демон с индексами веток в памяти
+    serve_parser = subparsers.add_parser(
+        'serve',
+        parents=[common_parser],
+        help='Загрузить ветки один раз и отвечать на запросы по HTTP или через Unix-сокет'
+    )
+    serve_parser.add_argument(
+        '--listen',
+        type=_address,
+        default='127.0.0.1:8765',
+        help='Адрес сервера: ХОСТ:ПОРТ или unix:ПУТЬ (по умолчанию: 127.0.0.1:8765)'
+    )
+    serve_parser.add_argument(
+        '--refresh',
+        type=float,
+        default=3600,
+        help='Интервал фонового обновления веток в секундах, 0 - без обновления (по умолчанию: 3600)'
+    )
+
+    # Команда 8: Запрос к демону
+    query_parser = subparsers.add_parser(
+        'query',
+        help='Запрос к демону serve: health, package ИМЯ, report КОМАНДА или refresh'
+    )
+    query_parser.add_argument(
+        'action',
+        choices=['health', 'package', 'report', 'refresh'],
+        help='health - состояние, package - версии пакета, report - отчёт команды, refresh - обновить ветки'
+    )
+    query_parser.add_argument(
+        'target',
+        nargs='?',
+        help='Имя пакета для package или команда для report (compare-all, compare-versions, ...)'
+    )
+    query_parser.add_argument(
+        '--connect',
+        type=_address,
+        default='127.0.0.1:8765',
+        help='Адрес демона: ХОСТ:ПОРТ или unix:ПУТЬ (по умолчанию: 127.0.0.1:8765)'
+    )
+    query_parser.add_argument('--arch', action='append', type=_split_list,
+                              help='Только эти архитектуры (через запятую, можно повторять)')
+    query_parser.add_argument('--name', help='Для report: только пакеты, имя которых подходит под glob')
+    query_parser.add_argument('--name-regex', type=_regex,
+                              help='Для report: только пакеты, имя которых подходит под регулярное выражение')
+    query_parser.add_argument('--source-prefix', help='Для report: только пакеты из исходных пакетов с префиксом')
+    query_parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                              help='Формат отчёта для report (по умолчанию: json)')
+    query_parser.add_argument('--compact', action='store_true', help='Компактный JSON отчёта для report')
+    query_parser.add_argument('--timeout', type=float, default=600,
+                              help='Таймаут запроса в секундах (по умолчанию: 600)')
+
     return parser
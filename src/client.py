@@ -0,0 +1,80 @@
+"""
+Клиент режима демона (см. src.server).
+
+Использует только стандартную библиотеку и не импортирует модули загрузки
+и сравнения веток, поэтому запрос к демону стоит миллисекунды.
+"""
+import http.client
+import socket
+import sys
+from typing import BinaryIO, Dict, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+UNIX_PREFIX = "unix:"
+DEFAULT_CONNECT = "127.0.0.1:8765"
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP-соединение через Unix-сокет"""
+
+    def __init__(self, path: str, timeout: float = 60):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def _connection(address: str, timeout: float) -> http.client.HTTPConnection:
+    if address.startswith(UNIX_PREFIX):
+        return UnixHTTPConnection(address[len(UNIX_PREFIX):], timeout=timeout)
+    host, _, port = address.rpartition(":")
+    return http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=timeout)
+
+
+def request(address: str, method: str, path: str, params: Optional[Dict[str, str]] = None,
+            timeout: float = 60) -> Tuple[int, bytes]:
+    """Выполняет запрос к демону. Возвращает код ответа и тело"""
+    query = urlencode({key: value for key, value in (params or {}).items() if value is not None})
+    connection = _connection(address, timeout)
+    try:
+        connection.request(method, f"{path}?{query}" if query else path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def query_path(action: str, target: Optional[str] = None) -> Tuple[str, str]:
+    """Метод и путь запроса для действия клиента"""
+    if action == "health":
+        return "GET", "/health"
+    if action == "refresh":
+        return "POST", "/refresh"
+    if target is None:
+        raise ValueError(f"Для {action} нужно указать имя")
+    return "GET", f"/{action}/{quote(target, safe='')}"
+
+
+def run_query(args, out: Optional[BinaryIO] = None) -> int:
+    """Подкоманда query: печатает ответ демона. Возвращает код завершения"""
+    out = out or sys.stdout.buffer
+    method, path = query_path(args.action, args.target)
+    params = {
+        "arch": ",".join(arch for group in args.arch or [] for arch in group) or None,
+        "name": args.name,
+        "name_regex": args.name_regex,
+        "source_prefix": args.source_prefix,
+        "format": args.format if args.action == "report" else None,
+        "compact": "1" if args.compact else None,
+    }
+    try:
+        status, body = request(args.connect, method, path, params, timeout=args.timeout)
+    except OSError as e:
+        print(f"Ошибка подключения к {args.connect}: {e}", file=sys.stderr)
+        return 2
+    out.write(body)
+    out.flush()
+    return 0 if status == http.client.OK else 1
@@ -1,7 +1,64 @@
-from typing import List
+import re
+import unicodedata
+from array import array
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Ранги сегментов в ключе сортировки, повторяют порядок _compare_segments:
+# тильда < буквенный (и прочие символы) < числовой < отсутствующий сегмент
+_TILDE_RANK = 0
+_ALPHA_RANK = 1
+_NUMERIC_RANK = 2
+_END_RANK = 3
+_END_SEGMENT = (_END_RANK,)
+
+# Сегменты ASCII-строки: цифры подряд, латинские буквы подряд или одиночный символ.
+# Для не-ASCII строк str.isdigit()/isalpha() шире классов регулярного выражения,
+# поэтому они разбираются исходным посимвольным алгоритмом
+_SEGMENT_RE = re.compile(r"[0-9]+|[A-Za-z]+|.", re.DOTALL)
+TOKENIZERS = ("regex", "legacy")
+
+
+@dataclass
+class ComparisonStats:
+    """Статистика пакетного сравнения: сколько пар решено каждым путём"""
+    total: int = 0
+    # Одинаковые epoch, version и release
+    identical: int = 0
+    # Решено по epoch без разбора строк
+    by_epoch: int = 0
+    # Совпала одна из частей, сравнивалась только другая
+    single_part: int = 0
+    # Полное сравнение ключей version и release
+    full: int = 0
+    # Различных строк version/release, разобранных на сегменты
+    distinct_strings: int = 0
+    # Пары, пересчитанные чистым Python векторизованным движком
+    fallback: int = 0
+
+    @property
+    def fast_path(self) -> int:
+        """Пары, решённые без полного сравнения"""
+        return self.identical + self.by_epoch + self.single_part
+
+    def merge(self, other: "ComparisonStats"):
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
 
 
 class RPMVersionComparator:
+    # Алгоритм разбиения на сегменты: "regex" (быстрый) или "legacy" (исходный, для проверки)
+    tokenizer = "regex"
+
+    @staticmethod
+    def set_tokenizer(name: str):
+        """Выбирает алгоритм разбиения на сегменты и сбрасывает кэши, построенные предыдущим"""
+        if name not in TOKENIZERS:
+            raise ValueError(f"Неизвестный алгоритм разбиения: {name}")
+        RPMVersionComparator.tokenizer = name
+        _split_regex.cache_clear()
+        _part_sort_key.cache_clear()
 
     @staticmethod
     def _compare_segments(seg1: str, seg2: str) -> int:
@@ -46,7 +103,7 @@ class RPMVersionComparator:
 
         if seg1_is_num and seg2_is_num:
             # Сравниваем как целые числа
-            num1, num2 = int(seg1), int(seg2)
+            num1, num2 = numeric_value(seg1), numeric_value(seg2)
             if num1 < num2:
                 return -1
             elif num1 > num2:
@@ -63,9 +120,18 @@ class RPMVersionComparator:
                 return 0
 
     @staticmethod
-    def _split_into_segments(part: str) -> List[str]:
+    def _split_into_segments(part: str) -> Sequence[str]:
         """
-        Разбиение на сегменты.
+        Разбиение на сегменты выбранным алгоритмом.
+        """
+        if RPMVersionComparator.tokenizer == "legacy":
+            return RPMVersionComparator._split_into_segments_legacy(part)
+        return _split_regex(part)
+
+    @staticmethod
+    def _split_into_segments_legacy(part: str) -> List[str]:
+        """
+        Разбиение на сегменты (посимвольный алгоритм).
         """
         if not part:
             return []
@@ -150,3 +216,118 @@ class RPMVersionComparator:
 
         return RPMVersionComparator._compare_version_parts(rel1, rel2)
 
+    @staticmethod
+    def compare_many(
+            pairs: Iterable[Tuple[Tuple[int, str, str], Tuple[int, str, str]]],
+            engine: str = "python"
+    ) -> Tuple[array, ComparisonStats]:
+        """
+        Пакетно сравнивает пары версий ((epoch1, ver1, rel1), (epoch2, ver2, rel2)).
+
+        Каждая различная строка разбирается на сегменты один раз за вызов,
+        одинаковые тройки и разные epoch решаются без разбора строк.
+        engine="numpy" выполняет сравнение векторизованно (см. src.numpy_backend).
+        Returns:
+            массив результатов (-1, 0, 1) в порядке пар и статистику путей сравнения
+        """
+        if engine == "numpy":
+            from src.numpy_backend import compare_many_numpy
+            return compare_many_numpy(pairs)
+        if engine != "python":
+            raise ValueError(f"Неизвестный движок сравнения: {engine}")
+
+        results = array("b")
+        stats = ComparisonStats()
+        part_keys: Dict[str, Tuple] = {}
+
+        def part_key(part: str) -> Tuple:
+            key = part_keys.get(part)
+            if key is None:
+                key = part_keys[part] = _part_sort_key(part)
+            return key
+
+        for (epoch1, ver1, rel1), (epoch2, ver2, rel2) in pairs:
+            same_version = ver1 is ver2 or ver1 == ver2
+            same_release = rel1 is rel2 or rel1 == rel2
+            if epoch1 != epoch2:
+                stats.by_epoch += 1
+                results.append(1 if epoch1 > epoch2 else -1)
+                continue
+            if same_version and same_release:
+                stats.identical += 1
+                results.append(0)
+                continue
+
+            if same_version:
+                stats.single_part += 1
+                key1, key2 = part_key(rel1), part_key(rel2)
+            elif same_release:
+                stats.single_part += 1
+                key1, key2 = part_key(ver1), part_key(ver2)
+            else:
+                stats.full += 1
+                key1 = part_key(ver1), part_key(rel1)
+                key2 = part_key(ver2), part_key(rel2)
+            results.append((key1 > key2) - (key1 < key2))
+
+        stats.total = len(results)
+        stats.distinct_strings = len(part_keys)
+        return results, stats
+
+
+def numeric_value(segment: str) -> int:
+    """
+    Значение числового сегмента. str.isdigit() относит к цифрам и недесятичные
+    символы (например, надстрочную '²'), на которых int() падает - их значение
+    собирается по цифрам через unicodedata.digit
+    """
+    if segment.isdecimal():
+        return int(segment)
+    value = 0
+    for char in segment:
+        value = value * 10 + unicodedata.digit(char)
+    return value
+
+
+@lru_cache(maxsize=1 << 16)
+def _split_regex(part: str) -> Tuple[str, ...]:
+    """Разбиение на сегменты регулярным выражением с кэшем по целой строке"""
+    if not part.isascii():
+        return tuple(RPMVersionComparator._split_into_segments_legacy(part))
+    return tuple(_SEGMENT_RE.findall(part))
+
+
+@lru_cache(maxsize=1 << 16)
+def _part_sort_key(part: str) -> Tuple:
+    """
+    Ключ сортировки для version или release.
+
+    Пустая часть - пустой кортеж (меньше любой непустой).
+    Непустая часть - ключи сегментов и завершающий сегмент, который больше
+    любого реального: по правилам _compare_segments более короткая
+    последовательность сегментов считается новее.
+    """
+    if not part:
+        return ()
+
+    keys = []
+    for segment in RPMVersionComparator._split_into_segments(part):
+        if segment == "~":
+            keys.append((_TILDE_RANK,))
+        elif segment.isdigit():
+            keys.append((_NUMERIC_RANK, numeric_value(segment)))
+        else:
+            keys.append((_ALPHA_RANK, segment))
+    keys.append(_END_SEGMENT)
+    return tuple(keys)
+
+
+def rpm_sort_key(epoch: int, version: str, release: str) -> Tuple:
+    """
+    Упорядочиваемый и хешируемый ключ полной RPM версии.
+
+    Сравнение ключей даёт тот же результат, что и compare_versions,
+    поэтому sorted(), max() и heapq работают с ним напрямую.
+    Ключи version и release кэшируются для каждой различной строки.
+    """
+    return epoch, _part_sort_key(version), _part_sort_key(release)
@@ -0,0 +1,69 @@
+import fnmatch
+import re
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from src.package_table import PackageTable
+
+
+class PackageFilter:
+    """
+    Фильтр записей пакетов: архитектуры, имя (glob или регулярное выражение)
+    и префикс исходного пакета.
+
+    Применяется при разборе, до добавления записи в таблицу пакетов;
+    список архитектур дополнительно передаётся в запрос к API.
+    """
+
+    def __init__(self, arches: Optional[Iterable[str]] = None, name_glob: Optional[str] = None,
+                 name_regex: Optional[str] = None, source_prefix: Optional[str] = None):
+        self.arches: Optional[Sequence[str]] = tuple(dict.fromkeys(arches)) if arches else None
+        self._arch_set = frozenset(self.arches) if self.arches else None
+        self.name_glob = name_glob
+        self.name_regex = name_regex
+        self.source_prefix = source_prefix or None
+
+        patterns = []
+        if name_glob:
+            patterns.append(re.compile(fnmatch.translate(name_glob)))
+        if name_regex:
+            patterns.append(re.compile(name_regex))
+        self._name_patterns = patterns
+
+    @property
+    def active(self) -> bool:
+        """Задано ли хотя бы одно условие"""
+        return bool(self._arch_set or self._name_patterns or self.source_prefix)
+
+    def accepts_arch(self, arch: str) -> bool:
+        return self._arch_set is None or arch in self._arch_set
+
+    def matches(self, arch: str, name: str, source: str) -> bool:
+        if self._arch_set is not None and arch not in self._arch_set:
+            return False
+        if self.source_prefix is not None and not source.startswith(self.source_prefix):
+            return False
+        # Имя проверяется последним: регулярные выражения - самая дорогая проверка
+        return all(pattern.match(name) for pattern in self._name_patterns)
+
+    def matches_record(self, record: Dict[str, Any]) -> bool:
+        """Проверка записи API до её разбора в таблицу"""
+        return self.matches(record.get("arch", ""), record.get("name", ""), record.get("source", ""))
+
+    def apply(self, table: PackageTable) -> PackageTable:
+        """Таблица с подходящими пакетами; строки пула переиспользуются без копирования"""
+        if not self.active:
+            return table
+        result = PackageTable(table.pool)
+        for arch, arch_table in table.items():
+            if not self.accepts_arch(arch):
+                continue
+            target = result.arch_table(arch)
+            names, epochs, versions, releases, buildtimes, sources = arch_table.columns()
+            for row, name in enumerate(names):
+                if self.matches(arch, name, table.pool.value(sources[row])):
+                    target.add_ids(name, epochs[row], versions[row], releases[row], buildtimes[row], sources[row])
+        return result
+
+    def __repr__(self):
+        return (f"PackageFilter(arches={self.arches!r}, name_glob={self.name_glob!r}, "
+                f"name_regex={self.name_regex!r}, source_prefix={self.source_prefix!r})")
@@ -0,0 +1,175 @@
+"""
+Инкрементальный режим compare-all.
+
+Состояние прошлого запуска хранится в каталоге: бинарные снимки веток
+(<branch>.snap) и категории имён по архитектурам (results.json). При
+следующем запуске записи веток сравниваются с прошлыми по отпечатку
+(epoch, version, release, buildtime); версии заново сравниваются только
+для затронутых имён - добавленных, изменённых или удалённых хотя бы в одной
+ветке, остальные берут категорию из прошлого результата. Кроме полного
+отчёта строится отчёт об изменениях (compare_delta).
+"""
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from src.cache import file_digest
+from src.logging_config import logger
+from src.package_table import ArchTable, PackageTable
+from src.report_writer import evr_string
+from src.snapshot import SNAPSHOT_SUFFIX, is_snapshot, load_snapshot, save_snapshot
+
+RESULTS_FILE = "results.json"
+STATE_VERSION = 1
+DELTA_REPORT = "compare_delta"
+
+# Категории имени архитектуры в compare-all и их коды в results.json
+ONLY_SISYPHUS = "only_sisyphus"
+ONLY_P11 = "only_p11"
+NEWER = "newer"
+OLDER = "older"
+EQUAL = "equal"
+CATEGORY_CODES = {ONLY_SISYPHUS: "s", ONLY_P11: "p", NEWER: ">", OLDER: "<", EQUAL: "="}
+CODE_CATEGORIES = {code: category for category, code in CATEGORY_CODES.items()}
+# Категории имён, которые есть в обеих ветках, по результату сравнения версий
+RESULT_CATEGORIES = {1: NEWER, -1: OLDER, 0: EQUAL}
+CATEGORY_RESULTS = {category: result for result, category in RESULT_CATEGORIES.items()}
+
+
+def changed_names(current: ArchTable, previous: Optional[ArchTable]) -> Iterator[str]:
+    """Имена архитектуры, добавленные, изменённые или удалённые по сравнению с previous"""
+    if previous is None:
+        yield from current
+        return
+    for name, row in current.rows():
+        previous_row = previous.row(name)
+        if previous_row is None or current.fingerprint(row) != previous.fingerprint(previous_row):
+            yield name
+    for name in previous:
+        if name not in current:
+            yield name
+
+
+def _evr(table: ArchTable, name: str) -> Optional[str]:
+    row = table.row(name)
+    return None if row is None else evr_string(*table.evr(row))
+
+
+def delta_records(arch: str, names: Set[str], sisyphus: ArchTable, p11: ArchTable,
+                  categories: Dict[str, str], previous: "PreviousRun") -> Iterator[Dict[str, Any]]:
+    """
+    Записи отчёта изменений архитектуры для затронутых имён (по имени):
+    категория до и после (None - имени нет) и текущие EVR в ветках
+    """
+    for name in sorted(names):
+        code = categories.get(name)
+        yield {
+            "name": name,
+            "arch": arch,
+            "before": previous.category(arch, name),
+            "after": CODE_CATEGORIES[code] if code else None,
+            "sisyphus": _evr(sisyphus, name),
+            "p11": _evr(p11, name),
+        }
+
+
+class PreviousRun:
+    """
+    Состояние прошлого запуска compare-all: таблицы веток и категории имён.
+
+    key описывает условия запуска (фильтры): состояние с другим ключом
+    не используется, так как его категории относятся к другому набору пакетов.
+    """
+
+    branches = ("sisyphus", "p11")
+
+    def __init__(self, tables: Optional[Dict[str, PackageTable]] = None,
+                 categories: Optional[Dict[str, Dict[str, str]]] = None, key: str = ""):
+        self.tables: Dict[str, PackageTable] = tables or {}
+        # {arch: {name: код категории}}
+        self.categories: Dict[str, Dict[str, str]] = categories or {}
+        self.key = key
+
+    @property
+    def available(self) -> bool:
+        """Есть ли прошлый результат, относительно которого считаются изменения"""
+        return bool(self.tables)
+
+    def category(self, arch: str, name: str) -> Optional[str]:
+        code = self.categories.get(arch, {}).get(name)
+        return CODE_CATEGORIES.get(code) if code else None
+
+    def result(self, arch: str, name: str) -> Optional[int]:
+        """Прошлый результат сравнения версий имени (1, -1, 0) или None, если имени не было в обеих ветках"""
+        return CATEGORY_RESULTS.get(self.category(arch, name))
+
+    def affected(self, arch: str, sisyphus: ArchTable, p11: ArchTable) -> Set[str]:
+        """Имена архитектуры, изменившиеся хотя бы в одной ветке (без состояния - все имена)"""
+        if not self.available:
+            return set(sisyphus) | set(p11)
+        names = set(changed_names(sisyphus, self.tables["sisyphus"].get(arch)))
+        names.update(changed_names(p11, self.tables["p11"].get(arch)))
+        return names
+
+    def arches(self) -> Iterator[str]:
+        return iter(self.categories)
+
+    @classmethod
+    def paths(cls, directory: str) -> List[str]:
+        """Файлы состояния в порядке сохранения: снимки веток, затем results.json"""
+        return [os.path.join(directory, f"{branch}{SNAPSHOT_SUFFIX}") for branch in cls.branches] + [
+            os.path.join(directory, RESULTS_FILE)]
+
+    @classmethod
+    def digest(cls, directory: str) -> Optional[str]:
+        """SHA-256 results.json (он содержит и хеши снимков) или None, если состояния нет"""
+        path = os.path.join(directory, RESULTS_FILE)
+        return file_digest(path) if os.path.exists(path) else None
+
+    @classmethod
+    def load(cls, directory: str, key: str = "") -> "PreviousRun":
+        """Загружает состояние из каталога; отсутствующее или несовместимое даёт пустое"""
+        results_path = os.path.join(directory, RESULTS_FILE)
+        snapshot_paths = {branch: os.path.join(directory, f"{branch}{SNAPSHOT_SUFFIX}") for branch in cls.branches}
+        if not os.path.exists(results_path) or not all(is_snapshot(path) for path in snapshot_paths.values()):
+            logger.info(f"Состояние прошлого запуска в {directory} не найдено, полный расчёт")
+            return cls(key=key)
+        try:
+            with open(results_path, 'r', encoding='utf-8') as file:
+                results = json.load(file)
+            if results.get("version") != STATE_VERSION or results.get("key") != key:
+                logger.info(f"Состояние в {directory} построено с другими параметрами, полный расчёт")
+                return cls(key=key)
+            # Снимки и результаты сохраняются разными файлами: результат годен только для своих снимков
+            if results.get("snapshots") != {branch: file_digest(path) for branch, path in snapshot_paths.items()}:
+                logger.info(f"Снимки в {directory} не соответствуют результатам, полный расчёт")
+                return cls(key=key)
+            tables = {branch: load_snapshot(path).table for branch, path in snapshot_paths.items()}
+        except (OSError, ValueError):
+            logger.error(f"Не удалось прочитать состояние из {directory}, полный расчёт", exc_info=True)
+            return cls(key=key)
+        return cls(tables, results["categories"], key)
+
+    @classmethod
+    def save(cls, directory: str, tables: Dict[str, PackageTable],
+             categories: Dict[str, Dict[str, str]], key: str = ""):
+        """
+        Сохраняет состояние текущего запуска. Каждый файл пишется во временный
+        и подменяется переименованием; результаты записываются последними вместе
+        с хешами снимков, так что прерванное сохранение приводит к полному расчёту,
+        а не к неверным категориям
+        """
+        os.makedirs(directory, exist_ok=True)
+        digests = {}
+        for branch in cls.branches:
+            path = os.path.join(directory, f"{branch}{SNAPSHOT_SUFFIX}")
+            save_snapshot(path + ".tmp", tables[branch])
+            digests[branch] = file_digest(path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+        results_path = os.path.join(directory, RESULTS_FILE)
+        with open(results_path + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump({"version": STATE_VERSION, "key": key, "snapshots": digests, "categories": categories},
+                      file, ensure_ascii=False, separators=(",", ":"))
+        os.replace(results_path + ".tmp", results_path)
+        logger.info(f"Состояние запуска сохранено в {directory}")
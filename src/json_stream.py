@@ -0,0 +1,92 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, Union
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class StreamParseError(ValueError):
+    """Ошибка разбора потока JSON"""
+
+
+def iter_json_array_items(chunks: Iterable[Union[bytes, str]], key: str = "packages") -> Iterator[Dict[str, Any]]:
+    """
+    Инкрементально разбирает JSON-документ вида {..., "<key>": [{...}, {...}]}
+    и возвращает элементы массива по одному.
+
+    В памяти одновременно находится только необработанный хвост буфера
+    и текущий элемент, а не весь документ целиком.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+
+    buffer = ""
+    pos = 0
+    in_array = False
+    source = iter(chunks)
+    exhausted = False
+
+    def read_more() -> bool:
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        for chunk in source:
+            text = utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                # Отбрасываем уже разобранную часть буфера
+                buffer = buffer[pos:] + text
+                pos = 0
+                return True
+        exhausted = True
+        tail = utf8.decode(b"", final=True)
+        if tail:
+            buffer = buffer[pos:] + tail
+            pos = 0
+            return True
+        return False
+
+    while not in_array:
+        match = key_pattern.search(buffer, pos)
+        if match:
+            pos = match.end()
+            in_array = True
+            break
+        # Ключ может быть разрезан между чанками - сохраняем хвост нужной длины
+        pos = max(pos, len(buffer) - len(key) - 64)
+        if not read_more():
+            raise StreamParseError(f"Ключ '{key}' не найден в JSON")
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+            pos += 1
+        if pos >= len(buffer):
+            if not read_more():
+                raise StreamParseError("Неожиданный конец JSON внутри массива")
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Элемент ещё не дочитан целиком
+            if not read_more():
+                raise
+            continue
+
+        pos = end
+        yield item
+
+
+def iter_file_chunks(file, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Читает бинарный файл по частям"""
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
@@ -1,8 +1,9 @@
 import logging
 import sys
 from pathlib import Path
+from typing import Optional, TextIO
 
-# Настройка логирования
+# Логгер утилиты; обработчики подключает setup_logging() при запуске CLI
 logger = logging.getLogger("cli_utility")
 logger.setLevel(logging.INFO)
 
@@ -12,20 +13,37 @@ formatter = logging.Formatter(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-# Консольный обработчик
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(formatter)
+# Обработчики, подключённые setup_logging()
+_handlers = []
 
-# Файловый обработчик (опционально)
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
-file_handler = logging.FileHandler(log_dir / "cli_utility.log")
-file_handler.setLevel(logging.ERROR)
-file_handler.setFormatter(formatter)
 
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+def setup_logging(stream: Optional[TextIO] = None, log_dir: Optional[str] = "logs"):
+    """
+    Подключает обработчики логов: консольный (INFO, по умолчанию stdout)
+    и файловый для ошибок в log_dir (None - без файла).
+    Повторный вызов заменяет ранее подключённые обработчики.
+    """
+    for handler in _handlers:
+        logger.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
 
-__all__ = ["logger"]
+    # Консольный обработчик
+    console_handler = logging.StreamHandler(stream or sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(formatter)
+    _handlers.append(console_handler)
 
+    # Файловый обработчик (опционально)
+    if log_dir is not None:
+        Path(log_dir).mkdir(exist_ok=True)
+        file_handler = logging.FileHandler(Path(log_dir) / "cli_utility.log")
+        file_handler.setLevel(logging.ERROR)
+        file_handler.setFormatter(formatter)
+        _handlers.append(file_handler)
+
+    for handler in _handlers:
+        logger.addHandler(handler)
+
+
+__all__ = ["logger", "setup_logging"]
@@ -0,0 +1,211 @@
+"""
+Сравнение произвольного набора веток за один запуск.
+
+Каждая ветка загружается один раз (DataExplorer(branches=...)), затем
+для каждой архитектуры выполняется один проход по объединению имён всех
+веток. Режим pairwise строит для каждой пары веток те же отчёты, что
+compare-all для sisyphus и p11; режим newest для каждого имени
+определяет ветку с самой новой версией.
+"""
+from itertools import chain, combinations
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from src.comparator import rpm_sort_key
+from src.metrics import metrics
+from src.package_table import EMPTY_ARCH, ArchTable, PackageTable
+from src.processor import VersionComparisons
+from src.report_writer import evr_string, open_reports
+
+NEWEST = "newest"
+
+
+def pair_sections(first: str, second: str) -> Tuple[str, str, str, str]:
+    """Отчёты пары веток в порядке записи внутри архитектуры"""
+    return (f"in_{first}_not_in_{second}", f"{first}_newer_than_{second}",
+            f"{second}_newer_than_{first}", f"in_{second}_not_in_{first}")
+
+
+class BranchMatrix(VersionComparisons):
+    """
+    Матрица сравнения веток: tables - {ветка: PackageTable} в порядке веток.
+
+    Параметры вывода (compact, compress, output, output_format) те же,
+    что у BranchProcessor.
+    """
+
+    def __init__(self,
+                 tables: Mapping[str, PackageTable],
+                 engine: str = "python",
+                 compact: bool = False,
+                 compress: bool = False,
+                 output: Optional[str] = None,
+                 output_format: str = "json",
+        ):
+        super().__init__(engine)
+        self.branches: List[str] = list(tables)
+        if len(self.branches) < 2:
+            raise ValueError("Для сравнения нужны хотя бы две ветки")
+        self.tables: Dict[str, PackageTable] = {branch: PackageTable.from_packages(table)
+                                                for branch, table in tables.items()}
+        self.compact = compact
+        self.compress = compress
+        self.output = output
+        self.output_format = output_format
+
+    @property
+    def pairs(self) -> List[Tuple[str, str]]:
+        """Пары веток в порядке перечисления"""
+        return list(combinations(self.branches, 2))
+
+    def pairwise(self) -> Dict[str, Dict[str, int]]:
+        """
+        Строит отчёты каждой пары веток за один проход по объединению имён архитектуры.
+
+        Для пары (first, second) пишутся пакеты только в first, новее в first,
+        новее в second и только в second.
+        Возвращает счётчики по парам: {"first/second": {"only_first": ..., "newer": ...}}.
+        """
+        pairs = self.pairs
+        sections = tuple(chain.from_iterable(pair_sections(*pair) for pair in pairs))
+        equal = [0] * len(pairs)
+        with self._open_reports(sections) as reports:
+            for arch, arch_tables in self._arch_tables(reports):
+                for pair, count in enumerate(self._write_pairwise(reports, arch_tables, pairs)):
+                    equal[pair] += count
+        self._log_comparison_stats()
+
+        result = {}
+        for pair, (first, second) in enumerate(pairs):
+            only_first, first_newer, second_newer, only_second = pair_sections(first, second)
+            result[f"{first}/{second}"] = {
+                f"only_{first}": reports.counts[only_first],
+                f"only_{second}": reports.counts[only_second],
+                "newer": reports.counts[first_newer],
+                "older": reports.counts[second_newer],
+                "equal": equal[pair],
+            }
+        return result
+
+    def _write_pairwise(self, reports, arch_tables: List[ArchTable], pairs: List[Tuple[str, str]]) -> List[int]:
+        """Пишет отчёты пар одной архитектуры. Возвращает количество равных версий каждой пары"""
+        index = {branch: position for position, branch in enumerate(self.branches)}
+        pair_indexes = [(index[first], index[second]) for first, second in pairs]
+        # Строки каждой секции архитектуры: секции пишутся по порядку после прохода по именам
+        only_first = [[] for _ in pairs]
+        only_second = [[] for _ in pairs]
+        compared, evr_pairs = [], []
+
+        for name in self._union_names(arch_tables):
+            rows = [table.row(name) for table in arch_tables]
+            evrs = [None if row is None else table.evr(row) for table, row in zip(arch_tables, rows)]
+            for pair, (first, second) in enumerate(pair_indexes):
+                first_row, second_row = rows[first], rows[second]
+                if first_row is None:
+                    if second_row is not None:
+                        only_second[pair].append(second_row)
+                elif second_row is None:
+                    only_first[pair].append(first_row)
+                else:
+                    compared.append((pair, first_row, second_row))
+                    evr_pairs.append((evrs[first], evrs[second]))
+
+        first_newer = [[] for _ in pairs]
+        second_newer = [[] for _ in pairs]
+        equal = [0] * len(pairs)
+        for (pair, first_row, second_row), result in zip(compared, self._compare_many(evr_pairs)):
+            if result == 1:
+                first_newer[pair].append(first_row)
+            elif result == -1:
+                second_newer[pair].append(second_row)
+            else:
+                equal[pair] += 1
+
+        for pair, (first, second) in enumerate(pair_indexes):
+            sections = pair_sections(*pairs[pair])
+            for section, table, rows in zip(
+                    sections,
+                    (arch_tables[first], arch_tables[first], arch_tables[second], arch_tables[second]),
+                    (only_first[pair], first_newer[pair], second_newer[pair], only_second[pair])
+            ):
+                for row in rows:
+                    reports.write(section, table.record(row))
+        return equal
+
+    def newest(self) -> Dict[str, int]:
+        """
+        Для каждого имени архитектуры определяет ветку с самой новой версией.
+
+        Запись отчёта - пакет из этой ветки с полями branch (ветка-победитель)
+        и branches ({ветка: EVR или null}). При равных версиях побеждает ветка,
+        указанная раньше. Возвращает количество побед каждой ветки и tied -
+        число имён, самая новая версия которых есть в нескольких ветках.
+        """
+        counts = dict.fromkeys(self.branches, 0)
+        counts["tied"] = 0
+        with self._open_reports((NEWEST,)) as reports:
+            for arch, arch_tables in self._arch_tables(reports):
+                with metrics.span("newest_versions"):
+                    for record, tied in self._newest_records(arch_tables):
+                        reports.write(NEWEST, record)
+                        counts[record["branch"]] += 1
+                        counts["tied"] += tied
+        return counts
+
+    def _newest_records(self, arch_tables: List[ArchTable]) -> Iterator[Tuple[Dict[str, object], bool]]:
+        comparisons = 0
+        for name in self._union_names(arch_tables):
+            present = []
+            for branch, table in zip(self.branches, arch_tables):
+                row = table.row(name)
+                if row is not None:
+                    present.append((branch, table, row, table.evr(row)))
+
+            best = present[0]
+            tied = False
+            if len(present) > 1:
+                best_key = rpm_sort_key(*best[3])
+                for candidate in present[1:]:
+                    comparisons += 1
+                    # Общий пул строк: одинаковые EVR веток - одни и те же объекты
+                    if candidate[3] == best[3]:
+                        tied = True
+                        continue
+                    key = rpm_sort_key(*candidate[3])
+                    if key > best_key:
+                        best, best_key, tied = candidate, key, False
+                    elif key == best_key:
+                        tied = True
+
+            branch, table, row, _ = best
+            record = table.record(row)
+            record["branch"] = branch
+            record["branches"] = dict.fromkeys(self.branches)
+            for candidate_branch, _, _, evr in present:
+                record["branches"][candidate_branch] = evr_string(*evr)
+            yield record, tied
+        metrics.count("comparisons", comparisons)
+
+    def _arch_tables(self, reports) -> Iterator[Tuple[str, List[ArchTable]]]:
+        """
+        Объединение архитектур веток в порядке веток с таблицами каждой ветки
+        (пустая таблица, если архитектуры в ветке нет)
+        """
+        arches = dict.fromkeys(chain.from_iterable(self.tables[branch] for branch in self.branches))
+        for arch in arches:
+            reports.begin_arch(arch)
+            yield arch, [self.tables[branch].get(arch, EMPTY_ARCH) for branch in self.branches]
+            reports.end_arch(arch)
+        metrics.count("records_written", sum(reports.counts.values()))
+
+    @staticmethod
+    def _union_names(arch_tables: Sequence[ArchTable]) -> Iterator[str]:
+        """Имена всех веток архитектуры: сначала первой ветки, затем новые из следующих"""
+        yield from arch_tables[0]
+        for position in range(1, len(arch_tables)):
+            previous = arch_tables[:position]
+            for name in arch_tables[position]:
+                if not any(name in table for table in previous):
+                    yield name
+
+    def _open_reports(self, sections: Tuple[str, ...]):
+        return open_reports(sections, self.output, self.output_format, compact=self.compact, compress=self.compress)
@@ -0,0 +1,141 @@
+"""
+Инструментирование этапов работы утилиты.
+
+Именованные интервалы (span) накапливают время и количество вызовов,
+счётчики - объёмы (байты, пакеты, сравнения). По запросу включаются
+отслеживание пиковой памяти tracemalloc для каждого интервала и профилирование
+cProfile. В конце main() всё сохраняется в JSON-файл метрик.
+"""
+import cProfile
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - нет на Windows
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Пиковый резидентный объём памяти процесса в байтах (None, если недоступен)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Metrics:
+    """Интервалы и счётчики одного запуска. Методы потокобезопасны"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        self.trace_memory = False
+        self._open_peaks: List[List[int]] = []
+        self._peak_bytes = 0
+        self._profiler: Optional[cProfile.Profile] = None
+        self.profile_path: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def reset(self):
+        """Сбрасывает накопленные данные и отключает трассировку памяти и профилирование"""
+        self.stop_memory_tracking()
+        self.stop_profile()
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.profile_path = None
+            self._peak_bytes = 0
+            self._started = time.perf_counter()
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, name: str):
+        """Замеряет время блока; при трассировке памяти - и пиковую память во время блока"""
+        # Ячейка пика этого интервала: потоки могут закрывать интервалы в любом порядке
+        peak_cell = None
+        if self.trace_memory:
+            with self._lock:
+                self._fold_peak()
+                peak_cell = [tracemalloc.get_traced_memory()[0]]
+                self._open_peaks.append(peak_cell)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                span = self.spans.setdefault(name, {"seconds": 0.0, "calls": 0})
+                span["seconds"] += elapsed
+                span["calls"] += 1
+                if peak_cell is not None and self.trace_memory:
+                    self._fold_peak()
+                    self._open_peaks = [cell for cell in self._open_peaks if cell is not peak_cell]
+                    span["peak_bytes"] = max(span.get("peak_bytes", 0), peak_cell[0])
+
+    def _fold_peak(self):
+        """Учитывает пик с последнего сброса во всех открытых интервалах и сбрасывает его"""
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak_bytes = max(self._peak_bytes, peak)
+        for cell in self._open_peaks:
+            cell[0] = max(cell[0], peak)
+        tracemalloc.reset_peak()
+
+    def start_memory_tracking(self):
+        """Включает tracemalloc: в интервалах и итоговых метриках появляется peak_bytes"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.trace_memory = True
+
+    def stop_memory_tracking(self):
+        if self.trace_memory:
+            self.trace_memory = False
+            self._open_peaks.clear()
+            tracemalloc.stop()
+
+    def start_profile(self, path: str):
+        """Включает cProfile; статистика сохраняется в path при stop_profile()"""
+        self.profile_path = path
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_profile(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {
+                "wall_seconds": time.perf_counter() - self._started,
+                "spans": {name: dict(values) for name, values in self.spans.items()},
+                "counters": dict(self.counters),
+                "peak_rss_bytes": peak_rss_bytes(),
+            }
+        if self.trace_memory:
+            result["peak_bytes"] = max(self._peak_bytes, tracemalloc.get_traced_memory()[1])
+        if self.profile_path:
+            result["profile"] = self.profile_path
+        return result
+
+    def write(self, path: str, **extra):
+        """Сохраняет метрики в JSON-файл; extra добавляются на верхний уровень"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({**extra, **self.to_dict()}, file, indent=2, ensure_ascii=False)
+
+
+# Метрики текущего запуска
+metrics = Metrics()
+
+__all__ = ["Metrics", "metrics", "peak_rss_bytes"]
@@ -1,8 +1,12 @@
 from dataclasses import dataclass
 
+from src.comparator import rpm_sort_key
+
 
 @dataclass
 class Package:
+    __slots__ = ("name", "epoch", "version", "release", "arch", "buildtime", "source")
+
     name: str
     epoch: int
     version: str
@@ -10,3 +14,8 @@ class Package:
     arch: str
     buildtime: int
     source: str
+
+    @property
+    def evr_key(self):
+        """Ключ сортировки по epoch-version-release: max(packages, key=attrgetter("evr_key"))"""
+        return rpm_sort_key(self.epoch, self.version, self.release)
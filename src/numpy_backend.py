@@ -0,0 +1,129 @@
+"""
+Векторизованное сравнение версий на NumPy.
+
+Каждая различная строка version/release кодируется в строку матрицы int64
+фиксированной ширины: первый столбец - признак непустой строки, далее коды
+сегментов (ранг << 60 | значение) и заполнение кодом отсутствующего сегмента.
+Порядок кодов повторяет _compare_segments, поэтому лексикографическое
+сравнение строк матрицы совпадает с compare_versions.
+Строки, которые не помещаются в кодировку (слишком много сегментов или
+слишком большое число), сравниваются чистым Python.
+"""
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+from src.comparator import ComparisonStats, RPMVersionComparator, numeric_value, rpm_sort_key
+
+# Максимальное количество сегментов в одной части версии
+MAX_SEGMENTS = 32
+
+_VALUE_BITS = 60
+_MAX_VALUE = (1 << _VALUE_BITS) - 1
+_TILDE_CODE = 0 << _VALUE_BITS
+_ALPHA_CODE = 1 << _VALUE_BITS
+_NUMERIC_CODE = 2 << _VALUE_BITS
+_END_CODE = 3 << _VALUE_BITS
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Движок numpy недоступен: установите пакет numpy (pip install numpy)")
+
+
+def _encode_strings(strings: List[str]):
+    """
+    Кодирует строки в матрицу (len(strings) x ширина).
+    Возвращает матрицу и булев массив строк, не поместившихся в кодировку.
+    """
+    segmented = [RPMVersionComparator._split_into_segments(value) for value in strings]
+    overflow = np.zeros(len(strings), dtype=bool)
+
+    # Ранги буквенных сегментов: порядок строк Python совпадает с порядком в _compare_segments
+    alpha = sorted({segment for segments in segmented for segment in segments
+                    if segment != "~" and not segment.isdigit()})
+    alpha_rank = {segment: index for index, segment in enumerate(alpha)}
+
+    width = 1 + min(MAX_SEGMENTS, max((len(segments) for segments in segmented), default=0)) + 1
+    matrix = np.full((len(strings), width), _END_CODE, dtype=np.int64)
+
+    for index, segments in enumerate(segmented):
+        if not segments:
+            matrix[index, 0] = 0
+            continue
+        if len(segments) > MAX_SEGMENTS:
+            overflow[index] = True
+            continue
+
+        codes = [1]
+        for segment in segments:
+            if segment == "~":
+                codes.append(_TILDE_CODE)
+            elif segment.isdigit():
+                value = numeric_value(segment)
+                if value > _MAX_VALUE:
+                    overflow[index] = True
+                    break
+                codes.append(_NUMERIC_CODE | value)
+            else:
+                codes.append(_ALPHA_CODE | alpha_rank[segment])
+        else:
+            matrix[index, :len(codes)] = codes
+
+    return matrix, overflow
+
+
+def _lexicographic_sign(left, right):
+    """Построчное лексикографическое сравнение двух матриц: массив -1/0/1"""
+    diff = (left > right).astype(np.int8) - (left < right).astype(np.int8)
+    if diff.shape[1] == 0:
+        return np.zeros(diff.shape[0], dtype=np.int8)
+    first = np.argmax(diff != 0, axis=1)
+    return diff[np.arange(diff.shape[0]), first]
+
+
+def compare_many_numpy(
+        pairs: Iterable[Tuple[Tuple[int, str, str], Tuple[int, str, str]]]
+) -> Tuple[array, ComparisonStats]:
+    """Векторизованный аналог RPMVersionComparator.compare_many с тем же результатом"""
+    _require_numpy()
+    pairs = list(pairs)
+    stats = ComparisonStats(total=len(pairs))
+    if not pairs:
+        return array("b"), stats
+
+    string_ids: Dict[str, int] = {}
+    columns = [[], [], [], []]
+    epochs1, epochs2 = [], []
+    for (epoch1, ver1, rel1), (epoch2, ver2, rel2) in pairs:
+        epochs1.append(epoch1)
+        epochs2.append(epoch2)
+        for column, value in zip(columns, (ver1, rel1, ver2, rel2)):
+            column.append(string_ids.setdefault(value, len(string_ids)))
+
+    matrix, overflow = _encode_strings(list(string_ids))
+    ver1_ids, rel1_ids, ver2_ids, rel2_ids = (np.asarray(column, dtype=np.intp) for column in columns)
+
+    result = np.sign(np.asarray(epochs1, dtype=np.int64) - np.asarray(epochs2, dtype=np.int64)).astype(np.int8)
+    version_result = _lexicographic_sign(matrix[ver1_ids], matrix[ver2_ids])
+    release_result = _lexicographic_sign(matrix[rel1_ids], matrix[rel2_ids])
+    result = np.where(result != 0, result, np.where(version_result != 0, version_result, release_result))
+
+    # Пары со строками вне кодировки пересчитываются эталонным способом
+    fallback = overflow[ver1_ids] | overflow[rel1_ids] | overflow[ver2_ids] | overflow[rel2_ids]
+    for index in np.flatnonzero(fallback):
+        key1, key2 = rpm_sort_key(*pairs[index][0]), rpm_sort_key(*pairs[index][1])
+        result[index] = (key1 > key2) - (key1 < key2)
+
+    stats.fallback = int(fallback.sum())
+    stats.full = stats.total - stats.fallback
+    stats.distinct_strings = len(string_ids)
+    return array("b", result.tobytes()), stats
@@ -0,0 +1,227 @@
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.models import Package
+
+
+class StringPool:
+    """
+    Таблица уникальных строк.
+
+    Каждое значение хранится один раз, в столбцах таблиц пакетов
+    вместо строк лежат их индексы в пуле. Пул может быть общим для
+    нескольких веток: тогда одинаковые version/release разных веток - один
+    и тот же объект, и сравнение версий решается проверкой is. Имена пакетов
+    индексов не получают, но тоже хранятся в одном экземпляре (intern).
+
+    Потоки загрузки веток заполняют общий пул одновременно, поэтому
+    добавление новой строки выполняется под блокировкой.
+    """
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self._values: List[str] = list(values or [])
+        self._ids: Dict[str, int] = {value: index for index, value in enumerate(self._values)}
+        self._names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def index(self, value: str) -> int:
+        """Индекс строки в пуле, при необходимости добавляет её"""
+        index = self._ids.get(value)
+        if index is None:
+            with self._lock:
+                index = self._ids.get(value)
+                if index is None:
+                    index = len(self._values)
+                    # Строка добавляется раньше индекса: получивший индекс поток всегда найдёт значение
+                    self._values.append(value)
+                    self._ids[value] = index
+        return index
+
+    def intern(self, value: str) -> str:
+        """Единственный экземпляр строки без индекса в пуле (имена пакетов)"""
+        return self._names.setdefault(value, value)
+
+    def value(self, index: int) -> str:
+        return self._values[index]
+
+    @property
+    def values(self) -> List[str]:
+        return self._values
+
+    def __len__(self):
+        return len(self._values)
+
+
+class ArchTable(Mapping):
+    """
+    Пакеты одной архитектуры в колоночном виде.
+
+    Отображение имя -> Package: объекты Package создаются только при обращении
+    к конкретной строке, для сравнения достаточно evr() без материализации.
+    """
+
+    def __init__(self, arch: str, pool: StringPool):
+        self.arch = arch
+        self._pool = pool
+        self._rows: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._epoch = array("q")
+        self._buildtime = array("q")
+        self._version = array("I")
+        self._release = array("I")
+        self._source = array("I")
+
+    @property
+    def pool(self) -> StringPool:
+        return self._pool
+
+    def add(self, name: str, epoch: int, version: str, release: str, buildtime: int, source: str):
+        """Добавляет пакет, повторное добавление имени заменяет строку"""
+        pool = self._pool
+        self.add_ids(pool.intern(name), epoch or 0, pool.index(version), pool.index(release),
+                     buildtime or 0, pool.index(source))
+
+    def add_ids(self, name: str, epoch: int, version_id: int, release_id: int, buildtime: int, source_id: int):
+        """Добавляет пакет, строковые поля которого уже находятся в пуле"""
+        row = self._rows.get(name)
+        if row is None:
+            self._rows[name] = len(self._names)
+            self._names.append(name)
+            self._epoch.append(epoch)
+            self._version.append(version_id)
+            self._release.append(release_id)
+            self._buildtime.append(buildtime)
+            self._source.append(source_id)
+        else:
+            self._epoch[row] = epoch
+            self._version[row] = version_id
+            self._release[row] = release_id
+            self._buildtime[row] = buildtime
+            self._source[row] = source_id
+
+    def row(self, name: str) -> Optional[int]:
+        """Номер строки пакета или None, если пакета нет"""
+        return self._rows.get(name)
+
+    def rows(self):
+        """Пары (имя, номер строки) в порядке добавления"""
+        return self._rows.items()
+
+    def evr(self, row: int) -> Tuple[int, str, str]:
+        """(epoch, version, release) строки без создания Package"""
+        pool = self._pool
+        return self._epoch[row], pool.value(self._version[row]), pool.value(self._release[row])
+
+    def fingerprint(self, row: int) -> Tuple[int, str, str, int]:
+        """(epoch, version, release, buildtime) строки: меняется при любой пересборке пакета"""
+        pool = self._pool
+        return (self._epoch[row], pool.value(self._version[row]), pool.value(self._release[row]),
+                self._buildtime[row])
+
+    def package(self, row: int) -> Package:
+        """Материализует строку в объект Package"""
+        pool = self._pool
+        return Package(
+            name=self._names[row],
+            epoch=self._epoch[row],
+            version=pool.value(self._version[row]),
+            release=pool.value(self._release[row]),
+            arch=self.arch,
+            buildtime=self._buildtime[row],
+            source=pool.value(self._source[row])
+        )
+
+    def record(self, row: int) -> Dict[str, object]:
+        """Строка в виде записи отчёта (поля Package) без создания Package"""
+        pool = self._pool
+        return {
+            "name": self._names[row],
+            "epoch": self._epoch[row],
+            "version": pool.value(self._version[row]),
+            "release": pool.value(self._release[row]),
+            "arch": self.arch,
+            "buildtime": self._buildtime[row],
+            "source": pool.value(self._source[row]),
+        }
+
+    def columns(self):
+        """Столбцы таблицы: имена, epoch, version, release, buildtime, source (индексы строк в пуле)"""
+        return self._names, self._epoch, self._version, self._release, self._buildtime, self._source
+
+    def __getitem__(self, name: str) -> Package:
+        return self.package(self._rows[name])
+
+    def __setitem__(self, name: str, package: Package):
+        self.add(name, package.epoch, package.version, package.release, package.buildtime, package.source)
+
+    def __contains__(self, name) -> bool:
+        return name in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return f"ArchTable(arch={self.arch!r}, packages={len(self)})"
+
+
+# Пустая таблица для архитектур, отсутствующих в одной из веток; только для чтения
+EMPTY_ARCH = ArchTable("", StringPool())
+
+
+class PackageTable(Mapping):
+    """
+    Все пакеты ветки: отображение архитектура -> ArchTable.
+
+    Одна структура обслуживает оба вида запросов, для которых раньше
+    хранились dict пакетов и set имён по архитектурам.
+    """
+
+    def __init__(self, pool: Optional[StringPool] = None):
+        self.pool = pool if pool is not None else StringPool()
+        self._arches: Dict[str, ArchTable] = {}
+
+    @classmethod
+    def from_packages(cls, packages_by_arch: Mapping) -> "PackageTable":
+        """Строит таблицу из отображения архитектура -> {имя: Package}"""
+        if isinstance(packages_by_arch, PackageTable):
+            return packages_by_arch
+        table = cls()
+        for arch, packages in packages_by_arch.items():
+            arch_table = table.arch_table(arch)
+            for name, package in packages.items():
+                arch_table[name] = package
+        return table
+
+    def arch_table(self, arch: str) -> ArchTable:
+        """Таблица архитектуры, создаётся при первом обращении"""
+        arch_table = self._arches.get(arch)
+        if arch_table is None:
+            arch_table = self._arches[arch] = ArchTable(arch, self.pool)
+        return arch_table
+
+    def add(self, arch: str, name: str, epoch: int, version: str, release: str, buildtime: int, source: str):
+        self.arch_table(arch).add(name, epoch, version, release, buildtime, source)
+
+    def clear(self):
+        self._arches.clear()
+
+    def total(self) -> int:
+        """Общее количество пакетов во всех архитектурах"""
+        return sum(len(arch_table) for arch_table in self._arches.values())
+
+    def __getitem__(self, arch: str) -> ArchTable:
+        return self._arches[arch]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._arches)
+
+    def __len__(self):
+        return len(self._arches)
+
+    def __repr__(self):
+        return f"PackageTable(arches={len(self)}, packages={self.total()})"
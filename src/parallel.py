@@ -0,0 +1,171 @@
+"""
+Параллельное сравнение веток в пуле процессов.
+
+Каждая архитектура делится на шарды - непрерывные диапазоны строк таблицы
+в порядке выгрузки, а не диапазоны имён (крупные noarch и x86_64 дают
+несколько шардов). В процесс передаются
+только столбцы шарда: имена, epoch, buildtime, индексы строк и таблица
+строк, на которые они ссылаются, - без объектов Package. Поиск имён во
+второй ветке выполняется в основном процессе, а процесс шарда сравнивает
+версии и кодирует записи отчётов кодировщиками приёмника. Основной процесс
+пишет готовый текст в порядке архитектур и шардов, поэтому результат
+совпадает с последовательным сравнением побайтово.
+"""
+import os
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from src.comparator import ComparisonStats, RPMVersionComparator
+from src.package_table import ArchTable
+from src.report_writer import RecordEncoder
+
+# Строк таблицы в одном шарде
+SHARD_ROWS = 20000
+# С jobs="auto" пул процессов используется, только если в ветках не меньше строк
+PARALLEL_MIN_ROWS = 100000
+
+
+def resolve_jobs(jobs: Optional[int], rows: int) -> int:
+    """Количество процессов: None - по числу ядер для больших веток, иначе 1"""
+    if jobs is None:
+        return (os.cpu_count() or 1) if rows >= PARALLEL_MIN_ROWS else 1
+    return max(1, jobs)
+
+
+@dataclass
+class Shard:
+    """
+    Диапазон строк таблицы одной архитектуры.
+
+    matched[i] - есть ли имя i во второй ветке; для найденных имён (по
+    порядку) other_* - epoch и индексы version/release во второй ветке.
+    unique - секция для ненайденных имён, newer - для имён, версия которых
+    новее, чем во второй ветке (None - секция не строится).
+    """
+    arch: str
+    names: List[str]
+    epochs: array
+    versions: array
+    releases: array
+    buildtimes: array
+    sources: array
+    strings: Dict[int, str]
+    matched: bytes
+    other_epochs: array
+    other_versions: array
+    other_releases: array
+    other_strings: Dict[int, str]
+    unique: Optional[str]
+    newer: Optional[str]
+    encoders: Dict[str, RecordEncoder]
+    engine: str = "python"
+
+
+@dataclass
+class ShardResult:
+    """Закодированные записи секций шарда в порядке строк и итоги сравнения"""
+    texts: Dict[str, List[str]]
+    older: int = 0
+    equal: int = 0
+    stats: ComparisonStats = field(default_factory=ComparisonStats)
+
+
+def _pool_strings(table: ArchTable, *columns: array) -> Dict[int, str]:
+    pool = table.pool
+    return {index: pool.value(index) for column in columns for index in set(column)}
+
+
+def build_shards(arch: str, table: ArchTable, other: ArchTable, unique: Optional[str], newer: Optional[str],
+                 encoders: Dict[str, RecordEncoder], engine: str = "python",
+                 shard_rows: Optional[int] = None) -> Iterator[Shard]:
+    """
+    Шарды строк table в порядке выгрузки (по shard_rows, по умолчанию SHARD_ROWS);
+    имена ищутся в other
+    """
+    shard_rows = shard_rows or SHARD_ROWS
+    names, epochs, versions, releases, buildtimes, sources = table.columns()
+    _, other_epochs, other_versions, other_releases, _, _ = other.columns()
+    other_row = other.row
+
+    for start in range(0, len(names), shard_rows):
+        stop = min(start + shard_rows, len(names))
+        shard_names = names[start:stop]
+        rows = [other_row(name) for name in shard_names]
+        found = [row for row in rows if row is not None]
+        shard = Shard(
+            arch=arch,
+            names=shard_names,
+            epochs=epochs[start:stop],
+            versions=versions[start:stop],
+            releases=releases[start:stop],
+            buildtimes=buildtimes[start:stop],
+            sources=sources[start:stop],
+            strings={},
+            matched=bytes(row is not None for row in rows),
+            other_epochs=array("q", [other_epochs[row] for row in found] if newer else []),
+            other_versions=array("I", [other_versions[row] for row in found] if newer else []),
+            other_releases=array("I", [other_releases[row] for row in found] if newer else []),
+            other_strings={},
+            unique=unique,
+            newer=newer,
+            encoders={section: encoders[section] for section in (unique, newer) if section},
+            engine=engine,
+        )
+        if table.pool is other.pool:
+            # Общий пул строк: одна таблица строк на обе ветки, pickle передаёт её один раз
+            shard.strings = shard.other_strings = _pool_strings(
+                table, shard.versions, shard.releases, shard.sources, shard.other_versions, shard.other_releases)
+        else:
+            shard.strings = _pool_strings(table, shard.versions, shard.releases, shard.sources)
+            shard.other_strings = _pool_strings(other, shard.other_versions, shard.other_releases)
+        yield shard
+
+
+def process_shard(shard: Shard) -> ShardResult:
+    """Выполняется в процессе пула: сравнивает версии шарда и кодирует записи отчётов"""
+    strings, other_strings = shard.strings, shard.other_strings
+    result = ShardResult(texts={section: [] for section in shard.encoders})
+
+    def record(row: int) -> Dict[str, object]:
+        return {
+            "name": shard.names[row],
+            "epoch": shard.epochs[row],
+            "version": strings[shard.versions[row]],
+            "release": strings[shard.releases[row]],
+            "arch": shard.arch,
+            "buildtime": shard.buildtimes[row],
+            "source": strings[shard.sources[row]],
+        }
+
+    compared, pairs = [], []
+    for row, matched in enumerate(shard.matched):
+        if not matched:
+            if shard.unique:
+                result.texts[shard.unique].append(shard.encoders[shard.unique](record(row)))
+        elif shard.newer:
+            position = len(compared)
+            compared.append(row)
+            pairs.append((
+                (shard.epochs[row], strings[shard.versions[row]], strings[shard.releases[row]]),
+                (shard.other_epochs[position], other_strings[shard.other_versions[position]],
+                 other_strings[shard.other_releases[position]]),
+            ))
+
+    if shard.newer:
+        encode = shard.encoders[shard.newer]
+        results, result.stats = RPMVersionComparator.compare_many(pairs, engine=shard.engine)
+        for row, comparison in zip(compared, results):
+            if comparison == 1:
+                result.texts[shard.newer].append(encode(record(row)))
+            elif comparison == -1:
+                result.older += 1
+            else:
+                result.equal += 1
+    return result
+
+
+def init_worker(tokenizer: str):
+    """Инициализация процесса пула: алгоритм разбиения версий как в основном процессе"""
+    RPMVersionComparator.set_tokenizer(tokenizer)
+
@@ -1,82 +1,311 @@
-import json
-from dataclasses import asdict
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from src.logging_config import logger
+from src.metrics import metrics
 from src.models import Package
-from src.comparator import RPMVersionComparator
+from src.comparator import ComparisonStats, RPMVersionComparator
+from src.incremental import (CATEGORY_CODES, DELTA_REPORT, ONLY_P11, ONLY_SISYPHUS, RESULT_CATEGORIES,
+                             PreviousRun, delta_records)
+from src.package_table import EMPTY_ARCH, ArchTable, PackageTable
+from src.parallel import build_shards, init_worker, process_shard, resolve_jobs
+from src.report_writer import open_reports, write_packages
 
 P11_NOT_IN_SISYPHUS = "in_p11_not_in_sisyphus"
 SISYPHUS_NOT_IN_P11 = "in_sisyphus_not_in_p11"
 VERSION_COMPARE = "version-release_compare"
 
+# Секции отчётов команд CLI в порядке записи
+COMMAND_SECTIONS = {
+    "compare-versions": (VERSION_COMPARE,),
+    "p11-not-in-sisyphus": (P11_NOT_IN_SISYPHUS,),
+    "sisyphus-not-in-p11": (SISYPHUS_NOT_IN_P11,),
+    "compare-all": (SISYPHUS_NOT_IN_P11, VERSION_COMPARE, P11_NOT_IN_SISYPHUS),
+}
 
-class BranchProcessor:
+
+def report_sections(command: str, previous: Optional[PreviousRun] = None) -> Tuple[str, ...]:
+    """Секции отчётов команды; compare-all с прошлым результатом добавляет отчёт изменений"""
+    sections = COMMAND_SECTIONS[command]
+    if command == "compare-all" and previous is not None and previous.available:
+        sections += (DELTA_REPORT,)
+    return sections
+
+
+class VersionComparisons:
+    """Пакетное сравнение версий с накоплением статистики и метрик"""
+
+    def __init__(self, engine: str = "python"):
+        # Движок пакетного сравнения версий: "python" или "numpy"
+        self.engine = engine
+        # Накопленная статистика пакетного сравнения версий
+        self.comparison_stats = ComparisonStats()
+
+    def _compare_many(self, pairs):
+        """Сравнивает все пары архитектуры одним пакетом и учитывает статистику"""
+        with metrics.span("compare_versions"):
+            results, stats = RPMVersionComparator.compare_many(pairs, engine=self.engine)
+        self.comparison_stats.merge(stats)
+        metrics.count("comparisons", len(pairs))
+        return results
+
+    def _log_comparison_stats(self):
+        stats = self.comparison_stats
+        logger.info(
+            f"Сравнений версий: {stats.total}, быстрым путём: {stats.fast_path} "
+            f"(одинаковые {stats.identical}, по epoch {stats.by_epoch}, по одной части {stats.single_part}), "
+            f"полных: {stats.full}, различных строк: {stats.distinct_strings}, "
+            f"движок: {self.engine}, пересчитано на Python: {stats.fallback}"
+        )
+
+
+class BranchProcessor(VersionComparisons):
 
     def __init__(self,
                  sisyphus_packages: Dict,
                  p11_packages: Dict,
                  sisyphus_names: Dict,
                  p11_names: Dict,
+                 engine: str = "python",
+                 compact: bool = False,
+                 compress: bool = False,
+                 output: Optional[str] = None,
+                 output_format: str = "json",
+                 jobs: Optional[int] = 1,
+                 previous: Optional[PreviousRun] = None,
         ):
-        self.sisyphus_packages_by_arch: Dict[str, Dict[str, Package]] = sisyphus_packages
-        self.p11_packages_by_arch: Dict[str, Dict[str, Package]] = p11_packages
+        super().__init__(engine)
+        # Словари {arch: {name: Package}} приводятся к колоночным таблицам;
+        # таблица отвечает и на запросы по именам, поэтому *_names используются только для совместимости
+        self.sisyphus_packages_by_arch: PackageTable = PackageTable.from_packages(sisyphus_packages)
+        self.p11_packages_by_arch: PackageTable = PackageTable.from_packages(p11_packages)
 
-        self.sisyphus_packages_names: Dict[str, set[str]] = sisyphus_names
-        self.p11_packages_names: Dict[str, set[str]] = p11_names
+        self.sisyphus_packages_names: PackageTable = self.sisyphus_packages_by_arch
+        self.p11_packages_names: PackageTable = self.p11_packages_by_arch
+
+        # Формат файлов отчётов: компактный JSON без отступов и/или сжатие gzip
+        self.compact = compact
+        self.compress = compress
+        # Путь единого документа с разбиением по архитектурам ("-" - stdout); None - отдельные файлы отчётов
+        self.output = output
+        # Формат вывода: "json" или "ndjson" (по строке на пакет, по умолчанию в stdout)
+        self.output_format = output_format
+        # Процессов для сравнения по архитектурам: 1 - в основном процессе, None - автоматически
+        self.jobs = jobs
+        # Состояние прошлого запуска compare-all (инкрементальный режим); None - полный расчёт
+        self.previous = previous
+        # Категории имён текущего запуска {arch: {name: код}}, заполняются compare_all при previous
+        self.categories: Dict[str, Dict[str, str]] = {}
 
     def p11_not_in_sisyphus(self):
-        return self._find_unique_packages(
-            self.p11_packages_by_arch, self.sisyphus_packages_names, P11_NOT_IN_SISYPHUS)
+        with self._open_reports((P11_NOT_IN_SISYPHUS,)) as reports:
+            jobs = self._resolve_jobs()
+            if jobs > 1:
+                self._write_sharded(reports, jobs, [("p11", P11_NOT_IN_SISYPHUS, None)])
+            else:
+                for arch_type, sisyphus_table, p11_table in self._arch_tables(reports):
+                    self._write_unique(reports, P11_NOT_IN_SISYPHUS, p11_table, sisyphus_table)
+        return reports.counts[P11_NOT_IN_SISYPHUS]
 
     def sisyphus_not_in_p11(self):
-        return self._find_unique_packages(
-            self.sisyphus_packages_by_arch, self.p11_packages_names, SISYPHUS_NOT_IN_P11)
+        with self._open_reports((SISYPHUS_NOT_IN_P11,)) as reports:
+            jobs = self._resolve_jobs()
+            if jobs > 1:
+                self._write_sharded(reports, jobs, [("sisyphus", SISYPHUS_NOT_IN_P11, None)])
+            else:
+                for arch_type, sisyphus_table, p11_table in self._arch_tables(reports):
+                    self._write_unique(reports, SISYPHUS_NOT_IN_P11, sisyphus_table, p11_table)
+        return reports.counts[SISYPHUS_NOT_IN_P11]
 
     def version_release_comparison(self):
-        packages_array: List[Package] = []
-        counter = 0
-        for arch_type in self.sisyphus_packages_by_arch.keys():
-            for name, package in self.sisyphus_packages_by_arch[arch_type].items():
-                if package.name in self.p11_packages_names[arch_type]:
-                    sisyphus_epoch = package.epoch
-                    sisyphus_version, sisyphus_release = package.version, package.release
-
-                    p11_package = self.p11_packages_by_arch[arch_type][name]
-                    p11_epoch = p11_package.epoch
-                    p11_version, p11_release = p11_package.version, p11_package.release
-
-                    result = RPMVersionComparator.compare_versions(sisyphus_epoch, sisyphus_version,
-                            sisyphus_release, p11_epoch, p11_version, p11_release
-                    )
+        with self._open_reports((VERSION_COMPARE,)) as reports:
+            jobs = self._resolve_jobs()
+            if jobs > 1:
+                self._write_sharded(reports, jobs, [("sisyphus", None, VERSION_COMPARE)])
+                self._log_comparison_stats()
+                return reports.counts[VERSION_COMPARE]
+
+            for arch_type, sisyphus_table, p11_table in self._arch_tables(reports):
+                rows, pairs = [], []
+                for name, row in sisyphus_table.rows():
+                    p11_row = p11_table.row(name)
+                    if p11_row is not None:
+                        rows.append(row)
+                        pairs.append((sisyphus_table.evr(row), p11_table.evr(p11_row)))
+
+                for row, result in zip(rows, self._compare_many(pairs)):
                     if result == 1:
-                        packages_array.append(package)
-                        counter += 1
-        self.convert_packages_to_json(packages_array, VERSION_COMPARE)
-        return counter
+                        reports.write(VERSION_COMPARE, sisyphus_table.record(row))
+        self._log_comparison_stats()
+        return reports.counts[VERSION_COMPARE]
 
-    @staticmethod
-    def _find_unique_packages(
-            source_packages: Dict[str, Dict[str, Package]],
-            target_names: Dict[str, set[str]], filename: str
-    ):
-        """Находит пакеты, которые есть в source, но нет в target"""
-        packages: List[Package] = []
-        counter = 0
-        for arch_type in source_packages.keys():
-            for name, package in source_packages[arch_type].items():
-                if package.name not in target_names[arch_type]:
-                    counter += 1
-                    packages.append(package)
-        BranchProcessor.convert_packages_to_json(packages, filename)
-        return counter
+    def compare_all(self) -> Dict[str, int]:
+        """
+        Строит все три отчёта за один проход по каждой архитектуре.
 
-    @staticmethod
-    def convert_packages_to_json(packages: List[Package], filename: str) -> str:
-        if not filename.endswith('.json'):
-            filename = f"{filename}.json"
+        Каждое имя классифицируется как только в sisyphus, только в p11,
+        новее, старше или равно в sisyphus; записи попадают в отчёты
+        сразу после классификации.
+
+        С previous версии сравниваются только для имён, изменившихся с прошлого
+        запуска; остальные берут категорию из прошлого результата. Категории
+        сохраняются в categories, а при наличии прошлого результата пишется
+        отчёт изменений compare_delta - последняя секция того же приёмника.
+        Возвращает количество пакетов в каждой категории.
+        """
+        counts = dict.fromkeys(("only_sisyphus", "only_p11", "newer", "older", "equal"), 0)
+        previous = self.previous
+        delta = previous is not None and previous.available
+
+        # Порядок секций совпадает с порядком, в котором они заполняются внутри архитектуры
+        sections = report_sections("compare-all", previous)
+        with self._open_reports(sections) as reports:
+            # Переиспользование прошлых категорий выполняется в основном процессе
+            jobs = 1 if previous is not None else self._resolve_jobs()
+            arch_tables = self._arch_tables(reports) if jobs == 1 else ()
+            if jobs > 1:
+                counts["older"], counts["equal"] = self._write_sharded(
+                    reports, jobs, [("sisyphus", SISYPHUS_NOT_IN_P11, VERSION_COMPARE),
+                                    ("p11", P11_NOT_IN_SISYPHUS, None)])
+
+            for arch_type, sisyphus_table, p11_table in arch_tables:
+                affected = previous.affected(arch_type, sisyphus_table, p11_table) if previous else None
+                categories = self.categories.setdefault(arch_type, {}) if previous else {}
+                # results[i] - результат сравнения для rows[i]; None ждёт пакетного сравнения pairs
+                rows, results, pending, pairs = [], [], [], []
+                for name, row in sisyphus_table.rows():
+                    p11_row = p11_table.row(name)
+                    if p11_row is None:
+                        reports.write(SISYPHUS_NOT_IN_P11, sisyphus_table.record(row))
+                        categories[name] = CATEGORY_CODES[ONLY_SISYPHUS]
+                        continue
+                    rows.append((name, row))
+                    result = previous.result(arch_type, name) if previous and name not in affected else None
+                    if result is None:
+                        pending.append(len(results))
+                        pairs.append((sisyphus_table.evr(row), p11_table.evr(p11_row)))
+                    results.append(result)
 
-        # Просто преобразуем dataclass в словари и сохраняем
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump([asdict(pkg) for pkg in packages], f, indent=2)
+                for index, result in zip(pending, self._compare_many(pairs)):
+                    results[index] = result
 
-        return filename
+                for (name, row), result in zip(rows, results):
+                    if result == 1:
+                        reports.write(VERSION_COMPARE, sisyphus_table.record(row))
+                    elif result == -1:
+                        counts["older"] += 1
+                    else:
+                        counts["equal"] += 1
+                    if previous:
+                        categories[name] = CATEGORY_CODES[RESULT_CATEGORIES[result]]
+
+                self._write_unique(reports, P11_NOT_IN_SISYPHUS, p11_table, sisyphus_table)
+                if previous:
+                    categories.update((name, CATEGORY_CODES[ONLY_P11])
+                                      for name in p11_table if name not in sisyphus_table)
+
+                if delta:
+                    for record in delta_records(arch_type, affected, sisyphus_table, p11_table,
+                                                categories, previous):
+                        reports.write(DELTA_REPORT, record)
+
+            if delta:
+                # Архитектуры, которых больше нет ни в одной ветке: все их имена удалены
+                for arch_type in [arch for arch in previous.arches() if arch not in self.categories]:
+                    reports.begin_arch(arch_type)
+                    removed = previous.affected(arch_type, EMPTY_ARCH, EMPTY_ARCH)
+                    for record in delta_records(arch_type, removed, EMPTY_ARCH, EMPTY_ARCH, {}, previous):
+                        reports.write(DELTA_REPORT, record)
+                    reports.end_arch(arch_type)
+
+        self._log_comparison_stats()
+        if delta:
+            logger.info(f"Отчёт изменений {DELTA_REPORT}: {reports.counts[DELTA_REPORT]} записей")
+        counts["only_sisyphus"] = reports.counts[SISYPHUS_NOT_IN_P11]
+        counts["only_p11"] = reports.counts[P11_NOT_IN_SISYPHUS]
+        counts["newer"] = reports.counts[VERSION_COMPARE]
+        return counts
+
+    def _arches(self) -> List[Tuple[str, ArchTable, ArchTable]]:
+        """
+        Архитектуры обеих веток (сначала sisyphus, затем только p11) с таблицами,
+        отсутствующая в ветке архитектура представлена пустой таблицей
+        """
+        arches = list(self.sisyphus_packages_by_arch)
+        arches.extend(arch for arch in self.p11_packages_by_arch if arch not in self.sisyphus_packages_by_arch)
+        return [(arch_type,
+                 self.sisyphus_packages_by_arch.get(arch_type, EMPTY_ARCH),
+                 self.p11_packages_by_arch.get(arch_type, EMPTY_ARCH))
+                for arch_type in arches]
+
+    def _arch_tables(self, reports) -> Iterator[Tuple[str, ArchTable, ArchTable]]:
+        """Архитектуры с таблицами; начало и конец каждой сообщаются приёмнику отчётов"""
+        for arch_type, sisyphus_table, p11_table in self._arches():
+            reports.begin_arch(arch_type)
+            yield arch_type, sisyphus_table, p11_table
+            reports.end_arch(arch_type)
+        metrics.count("records_written", sum(reports.counts.values()))
+
+    def _resolve_jobs(self) -> int:
+        rows = self.sisyphus_packages_by_arch.total() + self.p11_packages_by_arch.total()
+        return resolve_jobs(self.jobs, rows)
+
+    def _write_sharded(self, reports, jobs: int,
+                       passes: Sequence[Tuple[str, Optional[str], Optional[str]]]) -> Tuple[int, int]:
+        """
+        Строит отчёты в пуле из jobs процессов (см. src.parallel).
+
+        passes - проходы по архитектуре в порядке записи секций: (ветка, секция
+        имён только в этой ветке, секция имён, версия которых в ней новее).
+        Все шарды отправляются в пул сразу, результаты пишутся в порядке
+        архитектур и шардов. Возвращает количество более старых и равных версий.
+        """
+        older = equal = 0
+        encoders = {section: reports.encoder(section) for section in reports.sections}
+        arches = self._arches()
+        with metrics.span("compare_parallel"), ProcessPoolExecutor(
+                max_workers=jobs, initializer=init_worker, initargs=(RPMVersionComparator.tokenizer,)
+        ) as executor:
+            submitted = []
+            for arch_type, sisyphus_table, p11_table in arches:
+                tables = {"sisyphus": (sisyphus_table, p11_table), "p11": (p11_table, sisyphus_table)}
+                submitted.append([
+                    [executor.submit(process_shard, shard)
+                     for shard in build_shards(arch_type, *tables[branch], unique, newer, encoders, self.engine)]
+                    for branch, unique, newer in passes
+                ])
+
+            for (arch_type, _, _), arch_futures in zip(arches, submitted):
+                reports.begin_arch(arch_type)
+                for (branch, unique, newer), futures in zip(passes, arch_futures):
+                    results = [future.result() for future in futures]
+                    for section in (unique, newer):
+                        if section:
+                            for result in results:
+                                for text in result.texts[section]:
+                                    reports.write_encoded(section, text)
+                    for result in results:
+                        self.comparison_stats.merge(result.stats)
+                        metrics.count("comparisons", result.stats.total)
+                        older += result.older
+                        equal += result.equal
+                reports.end_arch(arch_type)
+        metrics.count("records_written", sum(reports.counts.values()))
+        return older, equal
+
+    def _open_reports(self, sections: Tuple[str, ...]):
+        """Приёмник отчётов: NDJSON, отдельные файлы или единый документ по архитектурам (output)"""
+        return open_reports(sections, self.output, self.output_format, compact=self.compact, compress=self.compress)
+
+    @staticmethod
+    def _write_unique(reports, section: str, source_table: ArchTable, target_table: ArchTable):
+        """Пишет в section пакеты архитектуры, которые есть в source, но нет в target"""
+        for name, row in source_table.rows():
+            if name not in target_table:
+                reports.write(section, source_table.record(row))
+
+    @staticmethod
+    def convert_packages_to_json(packages: Iterable[Package], filename: str,
+                                 compact: bool = False, compress: bool = False) -> str:
+        """Потоково записывает пакеты в файл отчёта. Возвращает имя файла"""
+        return write_packages(packages, filename, compact=compact, compress=compress)
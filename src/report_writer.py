@@ -0,0 +1,386 @@
+"""
+Потоковая запись отчётов в JSON.
+
+Записи пишутся по одной по мере классификации пакетов, без
+промежуточного списка и копирования через asdict. Обычный режим
+побайтово совпадает с json.dump(records, indent=2), компактный пишет
+JSON без отступов; при compress=True вывод сжимается gzip.
+
+Процессор пишет отчёты через один из приёмников с общим интерфейсом
+(begin_arch / write / end_arch / counts). Записи, закодированные заранее
+(например, в процессах параллельного сравнения), передаются через
+write_encoded; кодировщик секции возвращает encoder(section):
+ReportFiles - отдельный файл-список на каждый отчёт,
+ArchReportDocument - единый документ с разбиением по архитектурам,
+NdjsonReportStream - по одной JSON-строке на пакет для конвейеров;
+open_reports выбирает приёмник по параметрам вывода.
+"""
+import gzip
+import io
+import json
+import sys
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TextIO
+
+from src.models import Package
+
+# Поля записи отчёта в порядке полей Package
+PACKAGE_FIELDS = Package.__slots__
+GZIP_SUFFIX = ".gz"
+
+_BUFFER_SIZE = 1 << 16
+_encode = json.JSONEncoder().encode
+_encode_compact = json.JSONEncoder(separators=(",", ":")).encode
+
+# Кодировщик записи отчёта в текст; должен сериализоваться pickle (функция модуля или partial)
+RecordEncoder = Callable[[Dict[str, Any]], str]
+
+
+def package_record(package: Package) -> Dict[str, Any]:
+    """Запись отчёта для Package: неглубокая, без копирования значений"""
+    return {field: getattr(package, field) for field in PACKAGE_FIELDS}
+
+
+def report_path(filename: str, compress: bool = False) -> str:
+    """Имя файла отчёта: добавляет .json и, при сжатии, .gz"""
+    if not filename.endswith('.json') and not filename.endswith('.json' + GZIP_SUFFIX):
+        filename = f"{filename}.json"
+    if compress and not filename.endswith(GZIP_SUFFIX):
+        filename = f"{filename}{GZIP_SUFFIX}"
+    return filename
+
+
+def _encode_indented(record: Dict[str, Any], level: int = 1) -> str:
+    """Объект, вложенный на level уровней, как в json.dump(..., indent=2) (без отступа первой строки)"""
+    inner = "\n" + "  " * (level + 1)
+    lines = []
+    for key, value in record.items():
+        if isinstance(value, (dict, list, tuple)):
+            encoded = json.dumps(value, indent=2).replace("\n", inner)
+        else:
+            encoded = _encode(value)
+        lines.append(f"{inner}{_encode(key)}: {encoded}")
+    if not lines:
+        return "{}"
+    return "{" + ",".join(lines) + "\n" + "  " * level + "}"
+
+
+class JsonArrayWriter:
+    """
+    Пишет JSON-массив записей в файл по одной записи.
+
+    Используется как контекстный менеджер:
+        with JsonArrayWriter("report", compact=True) as writer:
+            writer.write(record)
+    """
+
+    def __init__(self, filename: str, compact: bool = False, compress: bool = False):
+        self.path = report_path(filename, compress)
+        self.compact = compact
+        self.compress = compress
+        self.count = 0
+        self._file = None
+
+    def open(self):
+        if self.compress:
+            self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8', buffering=_BUFFER_SIZE)
+        self._file.write("[")
+        return self
+
+    def encoder(self) -> RecordEncoder:
+        return _encode_compact if self.compact else _encode_indented
+
+    def write(self, record: Dict[str, Any]):
+        self.write_encoded(self.encoder()(record))
+
+    def write_encoded(self, text: str):
+        """Пишет запись, уже закодированную encoder()"""
+        if self.compact:
+            self._file.write(("," if self.count else "") + text)
+        else:
+            self._file.write((",\n  " if self.count else "\n  ") + text)
+        self.count += 1
+
+    def write_package(self, package: Package):
+        self.write(package_record(package))
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self._file.write("\n]" if self.count and not self.compact else "]")
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_packages(packages: Iterable[Package], filename: str,
+                   compact: bool = False, compress: bool = False) -> str:
+    """Потоково записывает пакеты в отчёт. Возвращает путь к файлу"""
+    with JsonArrayWriter(filename, compact=compact, compress=compress) as writer:
+        for package in packages:
+            writer.write_package(package)
+    return writer.path
+
+
+def _open_output(path: str, compress: bool) -> TextIO:
+    """Открывает вывод приёмника: файл или stdout ("-"), при compress - через gzip"""
+    if path == "-":
+        if compress:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb'), encoding='utf-8')
+        return sys.stdout
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8', buffering=_BUFFER_SIZE)
+
+
+def _close_output(file: TextIO):
+    """stdout только сбрасывается, остальные выводы закрываются"""
+    if file is sys.stdout:
+        file.flush()
+    else:
+        file.close()
+
+
+def _output_path(output: str, compress: bool) -> str:
+    if output == "-" or not compress or output.endswith(GZIP_SUFFIX):
+        return output
+    return f"{output}{GZIP_SUFFIX}"
+
+
+class ReportFiles:
+    """Приёмник отчётов: каждый отчёт - отдельный файл <section>.json со списком пакетов"""
+
+    def __init__(self, sections: Sequence[str], compact: bool = False, compress: bool = False):
+        self.sections = tuple(sections)
+        self._writers = {section: JsonArrayWriter(section, compact=compact, compress=compress)
+                         for section in self.sections}
+        self._stack = ExitStack()
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return {section: writer.count for section, writer in self._writers.items()}
+
+    def begin_arch(self, arch: str):
+        pass
+
+    def encoder(self, section: str) -> RecordEncoder:
+        return self._writers[section].encoder()
+
+    def write(self, section: str, record: Dict[str, Any]):
+        self._writers[section].write(record)
+
+    def write_encoded(self, section: str, text: str):
+        self._writers[section].write_encoded(text)
+
+    def end_arch(self, arch: str):
+        pass
+
+    def __enter__(self):
+        with ExitStack() as stack:
+            for writer in self._writers.values():
+                stack.enter_context(writer)
+            self._stack = stack.pop_all()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+
+
+class ArchReportDocument:
+    """
+    Приёмник отчётов: единый JSON-документ с разбиением по архитектурам
+
+        {"arches": {"<arch>": {"<section>": [...], ..., "counts": {...}}, ...},
+         "counts": {...}}
+
+    Секции архитектуры пишутся в порядке sections, записи - по одной сразу
+    после классификации, так что в памяти не накапливается ни архитектура,
+    ни документ. output - путь к файлу или "-" для stdout.
+    """
+
+    def __init__(self, output: str, sections: Sequence[str], compact: bool = False, compress: bool = False):
+        self.path = _output_path(output, compress)
+        self.sections = tuple(sections)
+        self.compact = compact
+        self.compress = compress
+        self.counts: Dict[str, int] = dict.fromkeys(self.sections, 0)
+        self._file: TextIO = None
+        self._arches = 0
+        self._arch = None
+        self._arch_counts: Dict[str, int] = {}
+        self._next_section = 0
+        self._section = None
+
+    def _newline(self, level: int) -> str:
+        return "" if self.compact else "\n" + "  " * level
+
+    def _key(self, key: str, level: int) -> str:
+        return self._newline(level) + _encode(key) + (":" if self.compact else ": ")
+
+    def _object(self, values: Dict[str, Any], level: int) -> str:
+        if self.compact:
+            return _encode_compact(values)
+        return _encode_indented(values, level)
+
+    def __enter__(self):
+        self._file = _open_output(self.path, self.compress)
+        self._file.write("{" + self._key("arches", 1) + "{")
+        return self
+
+    def begin_arch(self, arch: str):
+        self._file.write(("," if self._arches else "") + self._key(arch, 2) + "{")
+        self._arches += 1
+        self._arch = arch
+        self._arch_counts = dict.fromkeys(self.sections, 0)
+        self._next_section = 0
+        self._section = None
+
+    def _close_section(self):
+        if self._section is not None:
+            self._file.write((self._newline(3) if self._arch_counts[self._section] else "") + "]")
+            self._section = None
+
+    def _open_section(self, section: str):
+        """Закрывает текущую секцию, пишет пустые пропущенные и открывает section"""
+        self._close_section()
+        index = self.sections.index(section)
+        if index < self._next_section:
+            raise ValueError(f"Секция {section} архитектуры {self._arch} уже записана")
+        for skipped in self.sections[self._next_section:index]:
+            self._file.write(("," if self._next_section else "") + self._key(skipped, 3) + "[]")
+            self._next_section += 1
+        self._file.write(("," if self._next_section else "") + self._key(section, 3) + "[")
+        self._next_section = index + 1
+        self._section = section
+
+    def encoder(self, section: str) -> RecordEncoder:
+        return _encode_compact if self.compact else partial(_encode_indented, level=4)
+
+    def write(self, section: str, record: Dict[str, Any]):
+        self.write_encoded(section, self._object(record, 4))
+
+    def write_encoded(self, section: str, text: str):
+        if section != self._section:
+            self._open_section(section)
+        separator = "," if self._arch_counts[section] else ""
+        self._file.write(separator + self._newline(4) + text)
+        self._arch_counts[section] += 1
+        self.counts[section] += 1
+
+    def end_arch(self, arch: str):
+        self._close_section()
+        for skipped in self.sections[self._next_section:]:
+            self._file.write(("," if self._next_section else "") + self._key(skipped, 3) + "[]")
+            self._next_section += 1
+        self._file.write(("," if self.sections else "") + self._key("counts", 3)
+                         + self._object(self._arch_counts, 3) + self._newline(2) + "}")
+        self._arch = None
+        self._file.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._file.write((self._newline(1) if self._arches else "") + "}," + self._key("counts", 1)
+                                 + self._object(self.counts, 1) + self._newline(0) + "}\n")
+        finally:
+            _close_output(self._file)
+            self._file = None
+
+
+def evr_string(epoch: int, version: str, release: str) -> str:
+    """EVR в записи rpm: [epoch:]version-release"""
+    return f"{epoch}:{version}-{release}" if epoch else f"{version}-{release}"
+
+
+def _ndjson_line(section: str, record: Dict[str, Any]) -> str:
+    line = {"section": section, "arch": record["arch"]}
+    # Записи пакетов дополняются EVR; у записей других отчётов (compare_delta) его нет
+    if "version" in record:
+        line["evr"] = evr_string(record["epoch"], record["version"], record["release"])
+    line.update(record)
+    return _encode_compact(line)
+
+
+class NdjsonReportStream:
+    """
+    Приёмник отчётов: NDJSON, одна строка на пакет
+
+        {"section": "...", "arch": "...", "evr": "[epoch:]version-release", <поля пакета>}
+
+    Строки копятся в пакет из batch_size записей и сбрасываются в вывод
+    вместе с flush, а также в конце каждой архитектуры, чтобы получатель
+    обрабатывал данные параллельно со сравнением. output - путь или "-" для stdout.
+    """
+
+    def __init__(self, output: str, sections: Sequence[str], compress: bool = False, batch_size: int = 1000):
+        self.path = _output_path(output, compress)
+        self.sections = tuple(sections)
+        self.compress = compress
+        self.batch_size = max(1, batch_size)
+        self.counts: Dict[str, int] = dict.fromkeys(self.sections, 0)
+        self._file: TextIO = None
+        self._batch = []
+
+    def __enter__(self):
+        self._file = _open_output(self.path, self.compress)
+        return self
+
+    def begin_arch(self, arch: str):
+        pass
+
+    def encoder(self, section: str) -> RecordEncoder:
+        return partial(_ndjson_line, section)
+
+    def write(self, section: str, record: Dict[str, Any]):
+        self.write_encoded(section, _ndjson_line(section, record))
+
+    def write_encoded(self, section: str, text: str):
+        self._batch.append(text)
+        self.counts[section] += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def end_arch(self, arch: str):
+        self.flush()
+
+    def flush(self):
+        if self._batch:
+            self._file.write("\n".join(self._batch) + "\n")
+            self._batch.clear()
+        self._file.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        finally:
+            _close_output(self._file)
+            self._file = None
+
+
+def open_reports(sections: Sequence[str], output: Optional[str] = None, output_format: str = "json",
+                 compact: bool = False, compress: bool = False):
+    """Приёмник отчётов: NDJSON, отдельные файлы или единый документ по архитектурам (output)"""
+    if output_format == "ndjson":
+        return NdjsonReportStream(output or "-", sections, compress=compress)
+    if output is None:
+        return ReportFiles(sections, compact=compact, compress=compress)
+    return ArchReportDocument(output, sections, compact=compact, compress=compress)
+
+
+def report_paths(sections: Sequence[str], output: Optional[str] = None, output_format: str = "json",
+                 compress: bool = False) -> Optional[List[str]]:
+    """Файлы, которые пишет приёмник open_reports с теми же параметрами; None - вывод в stdout"""
+    if output_format == "ndjson" or output is not None:
+        output = output or "-"
+        return None if output == "-" else [_output_path(output, compress)]
+    return [report_path(section, compress) for section in sections]
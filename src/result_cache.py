@@ -0,0 +1,103 @@
+"""
+Кэш результатов команд по содержимому веток.
+
+Ключ записи - SHA-256 от хешей выгрузок веток (DataExplorer.payload_digests),
+команды и параметров, влияющих на отчёты (фильтры, формат вывода). Если
+ветки не изменились, команда восстанавливает файлы отчётов из кэша, не
+разбирая выгрузки и не сравнивая версии.
+
+Запись хранится в каталоге <directory>/<ключ>: файлы отчётов (с --state -
+и файлы нового состояния) и entry.json с результатом команды и исходными
+путями файлов.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from src.logging_config import logger
+
+ENTRY_FILE = "entry.json"
+# Версия формата записи и отчётов: при изменении старые записи не используются
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 32
+
+
+class ResultCache:
+    """
+    Дисковый кэш отчётов команд.
+
+    Запись создаётся во временном каталоге и появляется переименованием
+    целиком; сверх max_entries удаляются записи, которые дольше всего
+    не использовались.
+    """
+
+    def __init__(self, directory: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+
+    @staticmethod
+    def key(digests: Dict[str, str], command: str, options: Dict[str, Any]) -> str:
+        """Ключ записи: хеши веток, команда и параметры отчёта"""
+        payload = {"version": CACHE_VERSION, "digests": digests, "command": command, "options": options}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Копирует файлы отчётов записи на их исходные места.
+        Возвращает запись (команда, результат, файлы) или None, если её нет
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, ENTRY_FILE), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+            for index, path in enumerate(entry["files"]):
+                temporary = f"{path}.tmp"
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                shutil.copyfile(os.path.join(entry_dir, str(index)), temporary)
+                os.replace(temporary, path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            logger.error(f"Не удалось восстановить отчёты из кэша {entry_dir}", exc_info=True)
+            return None
+        # Время изменения каталога - время последнего использования записи
+        os.utime(entry_dir)
+        logger.info(f"Отчёты восстановлены из кэша результатов: {', '.join(entry['files'])}")
+        return entry
+
+    def store(self, key: str, command: str, paths: List[str], result: Any):
+        """Сохраняет файлы отчётов и результат команды под ключом key"""
+        os.makedirs(self.directory, exist_ok=True)
+        entry_dir = self._entry_dir(key)
+        temporary = tempfile.mkdtemp(prefix=f"{key}.", suffix=".tmp", dir=self.directory)
+        try:
+            for index, path in enumerate(paths):
+                shutil.copyfile(path, os.path.join(temporary, str(index)))
+            with open(os.path.join(temporary, ENTRY_FILE), 'w', encoding='utf-8') as file:
+                json.dump({"command": command, "result": result, "files": list(paths)}, file, ensure_ascii=False)
+            os.replace(temporary, entry_dir)
+        except OSError:
+            # Запись с тем же ключом уже сохранена параллельным запуском или файлы недоступны
+            shutil.rmtree(temporary, ignore_errors=True)
+            if not os.path.isdir(entry_dir):
+                logger.error(f"Не удалось сохранить отчёты в кэш {entry_dir}", exc_info=True)
+            return
+        logger.info(f"Отчёты сохранены в кэш результатов: {entry_dir}")
+        self.evict()
+
+    def evict(self):
+        """Удаляет записи сверх max_entries, начиная с давно не использованных"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path) and not name.endswith(".tmp"):
+                entries.append((os.path.getmtime(path), path))
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries:]:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,335 @@
+"""
+Режим демона: ветки загружаются один раз и хранятся в памяти.
+
+BranchService держит индексы веток и обновляет их в фоне: новые данные
+загружаются в отдельный DataExplorer и подменяют текущие одним
+присваиванием, так что запрос всегда видит согласованную пару веток.
+Запросы принимаются по HTTP на localhost или через Unix-сокет:
+
+    GET  /health                      состояние и время загрузки
+    GET  /package/<name>[?arch=...]   версии пакета в ветках и результат сравнения
+    GET  /report/<command>[?...]      отчёт команды (compare-all, compare-versions, ...)
+    POST /refresh                     внеплановое обновление веток
+
+Параметры отчёта: arch, name, name_regex, source_prefix (как у CLI),
+format=json|ndjson и compact=1.
+"""
+import json
+import os
+import re
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.comparator import RPMVersionComparator
+from src.filters import PackageFilter
+from src.logging_config import logger
+from src.package_table import PackageTable
+from src.processor import BranchProcessor
+from src.report_writer import evr_string
+
+DEFAULT_LISTEN = "127.0.0.1:8765"
+UNIX_PREFIX = "unix:"
+
+# Команды отчётов: имя в запросе -> метод BranchProcessor
+REPORTS = {
+    "compare-all": "compare_all",
+    "compare-versions": "version_release_comparison",
+    "p11-not-in-sisyphus": "p11_not_in_sisyphus",
+    "sisyphus-not-in-p11": "sisyphus_not_in_p11",
+}
+
+
+class QueryError(Exception):
+    """Некорректный запрос; status - код HTTP ответа"""
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_listen(value: str) -> Tuple[str, Any]:
+    """Адрес из --listen: ("unix", путь) для unix:ПУТЬ, иначе ("tcp", (хост, порт))"""
+    if value.startswith(UNIX_PREFIX):
+        return "unix", value[len(UNIX_PREFIX):]
+    host, separator, port = value.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Ожидается ХОСТ:ПОРТ или unix:ПУТЬ: {value!r}")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+@dataclass
+class LoadedBranches:
+    """Неизменяемый набор загруженных веток; заменяется целиком при обновлении"""
+    tables: Dict[str, PackageTable]
+    loaded_at: float
+    generation: int
+    load_seconds: float = 0.0
+    packages: Dict[str, int] = field(default_factory=dict)
+
+
+class BranchService:
+    """
+    Индексы веток в памяти с фоновым обновлением.
+
+    make_explorer - фабрика DataExplorer с параметрами загрузки (источник,
+    кэш, фильтры); processor_options - параметры BranchProcessor для отчётов.
+    """
+
+    def __init__(self, make_explorer: Callable[[], Any], refresh_interval: float = 3600,
+                 processor_options: Optional[Dict[str, Any]] = None):
+        self.make_explorer = make_explorer
+        self.refresh_interval = refresh_interval
+        self.processor_options = dict(processor_options or {})
+        self.branches: Optional[LoadedBranches] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        """Загружает ветки заново и подменяет текущие. При ошибке остаются прежние данные"""
+        with self._refresh_lock:
+            start = time.perf_counter()
+            explorer = self.make_explorer()
+            if not explorer.explore_api():
+                logger.error("Обновление веток не удалось, используются ранее загруженные данные")
+                return False
+            previous = self.branches
+            self.branches = LoadedBranches(
+                tables=dict(explorer.tables),
+                loaded_at=time.time(),
+                generation=previous.generation + 1 if previous else 1,
+                load_seconds=time.perf_counter() - start,
+                packages={branch: table.total() for branch, table in explorer.tables.items()},
+            )
+            logger.info(f"Ветки загружены (поколение {self.branches.generation}) "
+                        f"за {self.branches.load_seconds:.1f} с: {self.branches.packages}")
+            return True
+
+    def start_refresh(self, initial: bool = False):
+        """
+        Запускает фоновое обновление раз в refresh_interval секунд (0 - без обновления);
+        с initial ветки сначала загружаются в том же потоке
+        """
+        if self._thread is not None or (self.refresh_interval <= 0 and not initial):
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, args=(initial,), name="refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self, initial: bool = False):
+        if initial:
+            self._refresh_logged()
+        while self.refresh_interval > 0 and not self._stop.wait(self.refresh_interval):
+            self._refresh_logged()
+
+    def _refresh_logged(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.error("Ошибка фонового обновления веток", exc_info=True)
+
+    def _current(self) -> LoadedBranches:
+        branches = self.branches
+        if branches is None:
+            raise QueryError("Ветки ещё не загружены", HTTPStatus.SERVICE_UNAVAILABLE)
+        return branches
+
+    def health(self) -> Dict[str, Any]:
+        branches = self._current()
+        return {
+            "generation": branches.generation,
+            "loaded_at": branches.loaded_at,
+            "load_seconds": branches.load_seconds,
+            "packages": branches.packages,
+            "refresh_interval": self.refresh_interval,
+        }
+
+    def package(self, name: str, arches: Optional[list] = None) -> Dict[str, Any]:
+        """Версии пакета во всех ветках по архитектурам и результат сравнения sisyphus с p11"""
+        branches = self._current()
+        tables = branches.tables
+        arch_names = dict.fromkeys(arch for table in tables.values() for arch in table)
+        result = {}
+        for arch in arches or arch_names:
+            versions = {}
+            for branch, table in tables.items():
+                arch_table = table.get(arch)
+                row = arch_table.row(name) if arch_table is not None else None
+                versions[branch] = None if row is None else arch_table.evr(row)
+            if all(evr is None for evr in versions.values()):
+                continue
+            result[arch] = {branch: None if evr is None else evr_string(*evr) for branch, evr in versions.items()}
+            result[arch]["result"] = _compare(versions.get("sisyphus"), versions.get("p11"))
+        if not result:
+            raise QueryError(f"Пакет {name} не найден", HTTPStatus.NOT_FOUND)
+        return {"name": name, "generation": branches.generation, "arches": result}
+
+    def report(self, command: str, package_filter: PackageFilter, output_format: str = "json",
+               compact: bool = False) -> bytes:
+        """Отчёт команды по текущим данным; фильтр применяется к таблицам в памяти"""
+        method = REPORTS.get(command)
+        if method is None:
+            raise QueryError(f"Неизвестная команда {command}, доступны: {', '.join(REPORTS)}", HTTPStatus.NOT_FOUND)
+        tables = self._current().tables
+        sisyphus = package_filter.apply(tables["sisyphus"])
+        p11 = package_filter.apply(tables["p11"])
+
+        with tempfile.TemporaryDirectory(prefix="serve-report-") as directory:
+            path = os.path.join(directory, "report")
+            processor = BranchProcessor(sisyphus, p11, sisyphus, p11, output=path, output_format=output_format,
+                                        compact=compact, **self.processor_options)
+            getattr(processor, method)()
+            with open(path, 'rb') as file:
+                return file.read()
+
+
+def _compare(sisyphus, p11) -> str:
+    if sisyphus is None:
+        return "only_p11"
+    if p11 is None:
+        return "only_sisyphus"
+    result = RPMVersionComparator.compare_versions(*sisyphus, *p11)
+    return {1: "newer", -1: "older", 0: "equal"}[result]
+
+
+def _query_filter(query: Dict[str, list]) -> PackageFilter:
+    """PackageFilter из параметров запроса (те же условия, что у CLI)"""
+    arches = [arch for value in query.get("arch", []) for arch in value.split(",") if arch]
+    name_regex = query.get("name_regex", [None])[0]
+    if name_regex is not None:
+        try:
+            re.compile(name_regex)
+        except re.error as e:
+            raise QueryError(f"Некорректное регулярное выражение {name_regex!r}: {e}")
+    return PackageFilter(
+        arches=arches or None,
+        name_glob=query.get("name", [None])[0],
+        name_regex=name_regex,
+        source_prefix=query.get("source_prefix", [None])[0],
+    )
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к BranchService (server.service)"""
+
+    server_version = "altbranch-serve"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle(self._route_get)
+
+    def do_POST(self):
+        self._handle(self._route_post)
+
+    def _route_get(self, path: str, query: Dict[str, list]):
+        service: BranchService = self.server.service
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["health"]:
+            return self._send_json(service.health())
+        if len(parts) == 2 and parts[0] == "package":
+            arches = [arch for value in query.get("arch", []) for arch in value.split(",") if arch]
+            return self._send_json(service.package(parts[1], arches or None))
+        if len(parts) == 2 and parts[0] == "report":
+            output_format = query.get("format", ["json"])[0]
+            if output_format not in ("json", "ndjson"):
+                raise QueryError(f"Неизвестный формат {output_format}")
+            body = service.report(parts[1], _query_filter(query), output_format,
+                                  compact=query.get("compact", ["0"])[0] in ("1", "true"))
+            content_type = "application/x-ndjson" if output_format == "ndjson" else "application/json"
+            return self._send(HTTPStatus.OK, body, content_type)
+        raise QueryError(f"Неизвестный путь {path}", HTTPStatus.NOT_FOUND)
+
+    def _route_post(self, path: str, query: Dict[str, list]):
+        if path.strip("/") == "refresh":
+            service: BranchService = self.server.service
+            refreshed = service.refresh()
+            return self._send_json({"refreshed": refreshed, **service.health()})
+        raise QueryError(f"Неизвестный путь {path}", HTTPStatus.NOT_FOUND)
+
+    def _handle(self, route):
+        url = urlsplit(self.path)
+        try:
+            route(url.path, parse_qs(url.query))
+        except QueryError as e:
+            self._send_json({"error": str(e)}, e.status)
+        except Exception as e:
+            logger.error(f"Ошибка обработки запроса {self.path}", exc_info=True)
+            self._send_json({"error": str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _send_json(self, data: Dict[str, Any], status: HTTPStatus = HTTPStatus.OK):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n", "application/json")
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # У Unix-сокета адрес клиента - пустая строка
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP поверх Unix-сокета; каждый запрос обрабатывается в своём потоке"""
+    daemon_threads = True
+
+
+def _remove_socket(path: str):
+    """Удаляет Unix-сокет по пути; любой другой файл не трогается - это ошибка в --listen"""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} существует и не является сокетом")
+    os.unlink(path)
+
+
+def make_server(service: BranchService, listen: str = DEFAULT_LISTEN):
+    """HTTP-сервер BranchService на ХОСТ:ПОРТ или unix:ПУТЬ (оставшийся от прошлого запуска сокет заменяется)"""
+    kind, address = parse_listen(listen)
+    if kind == "unix":
+        _remove_socket(address)
+        server = UnixHTTPServer(address, ServiceRequestHandler)
+    else:
+        server = ThreadingHTTPServer(address, ServiceRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve(service: BranchService, listen: str = DEFAULT_LISTEN):
+    """
+    Открывает сокет, загружает ветки в фоне и обслуживает запросы до прерывания.
+    До завершения первой загрузки запросы к данным получают 503, после неудачной
+    загрузку можно повторить через POST /refresh
+    """
+    server = make_server(service, listen)
+    logger.info(f"Сервер запросов слушает {listen}")
+    service.start_refresh(initial=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.stop()
+        kind, address = parse_listen(listen)
+        if kind == "unix":
+            _remove_socket(address)
@@ -0,0 +1,147 @@
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from src.package_table import PackageTable, StringPool
+
+SNAPSHOT_MAGIC = b"ALTSNAP1"
+SNAPSHOT_SUFFIX = ".snap"
+
+# magic, количество строк, количество пакетов, размер таблицы строк в байтах
+_HEADER = struct.Struct("<8sIIQ")
+# Строковые столбцы хранятся как индексы в таблице строк
+_STRING_COLUMNS = ("name", "arch", "version", "release", "source")
+_INT_COLUMNS = ("epoch", "buildtime")
+_SEPARATOR = "\0"
+
+
+@dataclass
+class Snapshot:
+    """Таблица пакетов ветки, загруженная из бинарного снимка"""
+    table: PackageTable
+    length: int
+
+
+def is_snapshot(path) -> bool:
+    """Проверяет, является ли файл бинарным снимком"""
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+def _padding(offset: int) -> bytes:
+    return b"\0" * (-offset % 8)
+
+
+def save_snapshot(path, table: PackageTable) -> int:
+    """
+    Сохраняет индексы ветки в колоночный бинарный файл:
+    заголовок, таблица строк (UTF-8, разделитель NUL) и столбцы
+    little-endian (uint32 - индексы строк, int64 - epoch и buildtime).
+    Возвращает количество сохранённых пакетов.
+    """
+    strings: Dict[str, int] = {}
+    string_columns = {column: array("I") for column in _STRING_COLUMNS}
+    int_columns = {column: array("q") for column in _INT_COLUMNS}
+
+    # Пул может быть общим для нескольких веток: в снимок попадают только строки этой ветки
+    pool_values = table.pool.values
+    pool_ids: Dict[int, int] = {}
+
+    def string_id(pool_id: int) -> int:
+        index = pool_ids.get(pool_id)
+        if index is None:
+            index = pool_ids[pool_id] = strings.setdefault(pool_values[pool_id], len(strings))
+        return index
+
+    for arch, arch_table in table.items():
+        arch_id = strings.setdefault(arch, len(strings))
+        names, epochs, versions, releases, buildtimes, sources = arch_table.columns()
+        string_columns["name"].extend(strings.setdefault(name, len(strings)) for name in names)
+        string_columns["arch"].extend([arch_id] * len(names))
+        string_columns["version"].extend(map(string_id, versions))
+        string_columns["release"].extend(map(string_id, releases))
+        string_columns["source"].extend(map(string_id, sources))
+        int_columns["epoch"].extend(epochs)
+        int_columns["buildtime"].extend(buildtimes)
+
+    if any(_SEPARATOR in value for value in strings):
+        raise ValueError("Недопустимый символ NUL в строковых полях пакетов")
+
+    columns = [*string_columns.values(), *int_columns.values()]
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+
+    string_table = _SEPARATOR.join(strings).encode("utf-8")
+    count = len(string_columns["name"])
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(SNAPSHOT_MAGIC, len(strings), count, len(string_table)))
+        file.write(string_table)
+        offset = _HEADER.size + len(string_table)
+        file.write(_padding(offset))
+        for column in columns:
+            data = column.tobytes()
+            # Каждый столбец выровнен на 8 байт для прямого отображения в память
+            file.write(data + _padding(len(data)))
+    return count
+
+
+def load_snapshot(path, pool: Optional[StringPool] = None) -> Snapshot:
+    """
+    Загружает снимок, отображая файл в память вместо его чтения.
+    С pool строки снимка переносятся в этот (общий для веток) пул.
+    """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, string_count, count, table_size = _HEADER.unpack_from(mapped, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Файл {path} не является снимком ветки")
+
+        offset = _HEADER.size
+        table = str(mapped[offset:offset + table_size], "utf-8")
+        strings = table.split(_SEPARATOR) if string_count else []
+        offset += table_size
+        offset += len(_padding(offset))
+
+        columns = {}
+        with memoryview(mapped) as buffer:
+            for names, typecode in ((_STRING_COLUMNS, "I"), (_INT_COLUMNS, "q")):
+                for column in names:
+                    size = count * array(typecode).itemsize
+                    with buffer[offset:offset + size] as view:
+                        if sys.byteorder == "little":
+                            with view.cast(typecode) as values:
+                                columns[column] = values.tolist()
+                        else:
+                            values = array(typecode, view)
+                            values.byteswap()
+                            columns[column] = values.tolist()
+                    offset += size + len(_padding(size))
+
+    if pool is None:
+        # Таблица строк снимка становится пулом строк, индексы столбцов используются без перекодирования
+        pool = StringPool(strings)
+        ids = names = None
+    else:
+        ids = [pool.index(value) for value in strings]
+        names = [pool.intern(value) for value in strings]
+
+    table = PackageTable(pool)
+    arch_table = None
+    for name_id, arch_id, version_id, release_id, source_id, epoch, buildtime in zip(
+            columns["name"], columns["arch"], columns["version"], columns["release"],
+            columns["source"], columns["epoch"], columns["buildtime"]
+    ):
+        if arch_table is None or arch_table.arch is not strings[arch_id]:
+            arch_table = table.arch_table(strings[arch_id])
+        if ids is None:
+            arch_table.add_ids(strings[name_id], epoch, version_id, release_id, buildtime, source_id)
+        else:
+            arch_table.add_ids(names[name_id], epoch, ids[version_id], ids[release_id], buildtime, ids[source_id])
+
+    return Snapshot(table, count)
@@ -52,13 +52,22 @@ REAL_WORLD_CASES = [
     (0, "0.1.5.9", "alt2_35", 0, "0.1.5.9", "alt2_20", 1, "35 > 20"),
 ]
 
+# Недесятичные цифры Unicode: str.isdigit() истинно, int() неприменим
+UNICODE_DIGIT_CASES = [
+    (0, "1.\u00b2", "alt1", 0, "1.a", "alt1", 1, "надстрочная цифра - числовой сегмент, новее буквенного"),
+    (1, "\u00b2", "alt1", 0, "1", "alt1", 1, "решено по epoch до разбора version"),
+    (0, "1.\u00b2", "alt1", 0, "1.3", "alt1", -1, "значение надстрочной цифры: 2 < 3"),
+    (0, "1.0", "alt\u00b9", 0, "1.0", "alt1", 0, "надстрочная 1 == 1"),
+]
+
 ALL_CASES = (
     BASIC_CASES +
     NUMERIC_CASES +
     TILDE_CASES +
     EPOCH_CASES +
     EMPTY_RELEASE_CASES +
-    REAL_WORLD_CASES
+    REAL_WORLD_CASES +
+    UNICODE_DIGIT_CASES
 )
 
 TEST_VERSIONS = [
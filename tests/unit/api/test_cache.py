@@ -0,0 +1,152 @@
+import hashlib
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.api_client import DataExplorer
+from src.cache import BranchCache
+from tests.fixtures.package_factory import create_package_dict
+from .conftest import BaseAPITestWithRequests
+
+
+def _response(status_code=200, body=b"", headers=None):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.iter_content.return_value = [body]
+    response.raise_for_status.return_value = None
+    return response
+
+
+def _body(*names):
+    packages = [create_package_dict(name=name) for name in names]
+    return json.dumps({"length": len(packages), "packages": packages}).encode()
+
+
+class TestBranchCache(BaseAPITestWithRequests):
+    """
+    Тестирование дискового кэша выгрузок.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _setup_cache(self, tmp_path):
+        self.cache = BranchCache(tmp_path / "cache", ttl=60)
+
+    def test_first_fetch_stores_payload_and_meta(self):
+        """Первый запрос сохраняет тело ответа и ETag."""
+        self.mock_requests.return_value = _response(body=_body("firefox"), headers={"ETag": '"v1"'})
+
+        path = self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        assert path.read_bytes() == _body("firefox")
+        assert self.cache.load_meta("sisyphus")["etag"] == '"v1"'
+        assert self.cache.digest("sisyphus") == hashlib.sha256(_body("firefox")).hexdigest()
+
+    def test_revalidation_uses_etag_and_keeps_copy_on_304(self):
+        """Повторный запрос условный, при 304 используется сохранённая копия."""
+        self.mock_requests.return_value = _response(body=_body("firefox"), headers={"ETag": '"v1"'})
+        self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        self.mock_requests.return_value = _response(status_code=304)
+        path = self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        _, kwargs = self.mock_requests.call_args
+        assert kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert path.read_bytes() == _body("firefox")
+
+    def test_ttl_without_validators_skips_request(self):
+        """Без ETag/Last-Modified свежая по TTL копия используется без запроса."""
+        self.mock_requests.return_value = _response(body=_body("firefox"))
+        self.cache.fetch("sisyphus", "http://example/sisyphus")
+        self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        assert self.mock_requests.call_count == 1
+
+    def test_eviction_by_age_and_size(self):
+        """Устаревшие записи и записи сверх лимита размера удаляются."""
+        self.mock_requests.return_value = _response(body=_body("firefox"))
+        self.cache.fetch("p10", "http://example/p10")
+        meta = self.cache.load_meta("p10")
+        meta["checked_at"] = time.time() - self.cache.max_age - 1
+        self.cache.meta_path("p10").write_text(json.dumps(meta))
+
+        self.cache.fetch("p11", "http://example/p11")
+        assert self.cache.load_meta("p10") is None
+
+        self.cache.max_size = 1
+        self.cache.fetch("sisyphus", "http://example/sisyphus")
+        assert self.cache.load_meta("p11") is None
+        assert self.cache.load_meta("sisyphus") is not None
+
+    def test_eviction_keeps_entry_with_unreadable_meta(self):
+        """Недописанные метаданные не приводят к удалению выгрузки."""
+        self.mock_requests.return_value = _response(body=_body("firefox"))
+        self.cache.fetch("p11", "http://example/p11")
+        self.cache.meta_path("p11").write_text('{"url": ')
+
+        self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        assert self.cache.payload_path("p11").read_bytes() == _body("firefox")
+        assert sorted(path.name for path in self.cache.cache_dir.iterdir()) == [
+            "p11.json", "p11.meta.json", "sisyphus.json", "sisyphus.meta.json"]
+
+    def test_interrupted_download_keeps_old_copy(self):
+        """Оборванная загрузка не оставляет временный файл и не трогает прежнюю копию."""
+        self.mock_requests.return_value = _response(body=_body("firefox"), headers={"ETag": '"v1"'})
+        self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        broken = _response(headers={"ETag": '"v2"'})
+        broken.iter_content.side_effect = ConnectionError("connection reset")
+        self.mock_requests.return_value = broken
+        with pytest.raises(ConnectionError):
+            self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        assert sorted(path.name for path in self.cache.cache_dir.iterdir()) == [
+            "sisyphus.json", "sisyphus.meta.json"]
+        assert self.cache.load_meta("sisyphus")["etag"] == '"v1"'
+
+    def test_replaced_payload_without_meta_has_own_digest(self):
+        """Если новые метаданные не записаны, старый хеш не выдаётся за хеш новой выгрузки."""
+        self.mock_requests.return_value = _response(body=_body("firefox"), headers={"ETag": '"v1"'})
+        self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        self.mock_requests.return_value = _response(body=_body("vim"), headers={"ETag": '"v2"'})
+        self.cache._save_meta = MagicMock(side_effect=OSError("disk full"))
+        with pytest.raises(OSError):
+            self.cache.fetch("sisyphus", "http://example/sisyphus")
+
+        assert self.cache.load_meta("sisyphus") is None
+        assert self.cache.digest("sisyphus") == hashlib.sha256(_body("vim")).hexdigest()
+
+    def test_explorer_reads_through_cache(self):
+        """DataExplorer загружает ветки через кэш."""
+        self.mock_requests.return_value = _response(body=_body("firefox"), headers={"ETag": '"v1"'})
+        explorer = DataExplorer(cache=self.cache)
+
+        assert explorer.explore_api() is True
+        assert "firefox" in explorer.sisyphus_packages_by_arch["x86_64"]
+
+        self.mock_requests.return_value = _response(status_code=304)
+        explorer = DataExplorer(cache=self.cache, streaming=True)
+
+        assert explorer.explore_api() is True
+        assert "firefox" in explorer.p11_packages_by_arch["x86_64"]
+
+    def test_payload_digests_fetch_once(self):
+        """Хеши веток берутся из кэша, последующая загрузка не повторяет запросы."""
+        self.mock_requests.return_value = _response(body=_body("firefox"), headers={"ETag": '"v1"'})
+        explorer = DataExplorer(cache=self.cache, streaming=True)
+
+        digests = explorer.payload_digests()
+        assert explorer.explore_api() is True
+
+        assert digests == dict.fromkeys(["sisyphus", "p11"], hashlib.sha256(_body("firefox")).hexdigest())
+        assert self.mock_requests.call_count == 2
+
+    def test_payload_digests_without_disk_copy(self):
+        """Без кэша и локальных файлов хеши до загрузки недоступны."""
+        assert DataExplorer().payload_digests() is None
+        self.mock_requests.assert_not_called()
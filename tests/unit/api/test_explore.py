@@ -1,5 +1,9 @@
+import threading
 from unittest.mock import patch
 
+from src.api_client import DataExplorer
+from tests.fixtures.package_factory import create_package_dict
+
 from .conftest import BaseAPITest
 
 
@@ -41,4 +45,37 @@ class TestExploreApi(BaseAPITest):
         assert len(explorer.data) == 0
 
 
+class TestConcurrentFetch:
+    """Параллельная загрузка веток."""
+
+    def test_results_match_branch_order(self):
+        """Данные каждой ветки попадают в свою ветку независимо от порядка завершения потоков."""
+        explorer = DataExplorer(max_workers=2)
+        packages = {"sisyphus": [create_package_dict(name="firefox")], "p11": [create_package_dict(name="vim")]}
+        p11_done = threading.Event()
+
+        def fetch(branch):
+            # sisyphus завершается последним: ждёт, пока ответит p11
+            if branch == "sisyphus":
+                assert p11_done.wait(timeout=5)
+            else:
+                p11_done.set()
+            return {"packages": packages[branch], "length": 1}
+
+        with patch.object(explorer, 'get_data_from_url', side_effect=fetch):
+            result = explorer.explore_api()
 
+        assert result is True
+        assert explorer.data["sisyphus"] == packages["sisyphus"]
+        assert explorer.data["p11"] == packages["p11"]
+
+    def test_failed_branch_reported_separately(self):
+        """Ошибка одной ветки не мешает загрузке другой."""
+        explorer = DataExplorer(max_workers=2)
+        responses = {"sisyphus": None, "p11": {"packages": [], "length": 0}}
+        with patch.object(explorer, 'get_data_from_url', side_effect=responses.get):
+            result = explorer.explore_api()
+
+        assert result is False
+        assert "p11" in explorer.data
+        assert "sisyphus" not in explorer.data
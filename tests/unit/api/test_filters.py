@@ -0,0 +1,120 @@
+import json
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from src.api_client import DataExplorer
+from src.filters import PackageFilter
+from src.package_table import PackageTable
+from src.snapshot import save_snapshot
+from tests.fixtures.package_factory import create_package_dict
+from .conftest import BaseAPITestWithRequests
+
+URL = "https://rdb.altlinux.org/api/export/branch_binary_packages/{branch}"
+
+RECORDS = [
+    create_package_dict(name="python3-module-foo", arch="x86_64", source="python-module-foo"),
+    create_package_dict(name="python3-module-foo", arch="noarch", source="python-module-foo"),
+    create_package_dict(name="vim", arch="x86_64", source="vim"),
+    create_package_dict(name="vim-python3", arch="aarch64", source="vim"),
+]
+
+
+def _index(package_filter):
+    table = PackageTable()
+    count = DataExplorer._index_packages(iter(RECORDS), table, package_filter)
+    return count, {arch: sorted(arch_table) for arch, arch_table in table.items()}
+
+
+class TestPackageFilter:
+    """
+    Тестирование фильтров, применяемых при разборе.
+    """
+
+    def test_inactive_filter_keeps_everything(self):
+        assert not PackageFilter().active
+        assert _index(PackageFilter())[0] == len(RECORDS)
+
+    @pytest.mark.parametrize("options, expected", [
+        ({"arches": ["x86_64"]}, {"x86_64": ["python3-module-foo", "vim"]}),
+        ({"name_glob": "python3-*"}, {"x86_64": ["python3-module-foo"], "noarch": ["python3-module-foo"]}),
+        ({"name_regex": r"vim(-|$)"}, {"x86_64": ["vim"], "aarch64": ["vim-python3"]}),
+        ({"source_prefix": "python-"}, {"x86_64": ["python3-module-foo"], "noarch": ["python3-module-foo"]}),
+        ({"arches": ["x86_64", "noarch"], "name_glob": "*foo"},
+         {"x86_64": ["python3-module-foo"], "noarch": ["python3-module-foo"]}),
+    ])
+    def test_records_skipped_before_indexing(self, options, expected):
+        """Неподходящие записи не попадают в таблицу, архитектуры без пакетов не создаются."""
+        count, tables = _index(PackageFilter(**options))
+
+        assert tables == expected
+        assert count == sum(len(names) for names in expected.values())
+
+    def test_snapshot_is_filtered(self, tmp_path):
+        """Снимок загружается целиком, затем фильтруется."""
+        table = PackageTable()
+        DataExplorer._index_packages(RECORDS, table)
+        for branch in DataExplorer.branches:
+            save_snapshot(tmp_path / f"{branch}.snap", table)
+
+        explorer = DataExplorer(source="file", data_dir=str(tmp_path),
+                                package_filter=PackageFilter(arches=["noarch"]))
+        assert explorer.explore_api() is True
+
+        assert list(explorer.sisyphus_packages_by_arch) == ["noarch"]
+        assert explorer.p11_packages_by_arch["noarch"]["python3-module-foo"].source == "python-module-foo"
+
+
+class TestArchPushdown(BaseAPITestWithRequests):
+    """
+    Тестирование запроса к API только нужных архитектур.
+    """
+
+    def test_arch_query_per_requested_arch(self):
+        """Каждая архитектура запрашивается отдельно, ответы объединяются."""
+        def response_for(url, timeout):
+            arch = url.rsplit("=", 1)[1]
+            response = MagicMock()
+            response.json.return_value = {"length": 1, "packages": [create_package_dict(name="vim", arch=arch)]}
+            return response
+
+        self.mock_requests.side_effect = response_for
+        explorer = DataExplorer(package_filter=PackageFilter(arches=["x86_64", "noarch"]))
+
+        assert explorer.explore_api() is True
+
+        assert self.mock_requests.call_args_list == [
+            call(URL.format(branch=branch) + f"?arch={arch}", timeout=30)
+            for branch in ("sisyphus", "p11") for arch in ("x86_64", "noarch")
+        ]
+        assert sorted(explorer.sisyphus_packages_by_arch) == ["noarch", "x86_64"]
+
+    def test_streaming_arch_query(self):
+        """Потоковая загрузка читает ответы по архитектурам друг за другом."""
+        def response_for(url, timeout, stream):
+            arch = url.rsplit("=", 1)[1]
+            response = MagicMock()
+            response.__enter__.return_value = response
+            payload = {"length": 1, "packages": [create_package_dict(name="vim", arch=arch)]}
+            response.iter_content.return_value = [json.dumps(payload).encode()]
+            return response
+
+        self.mock_requests.side_effect = response_for
+        explorer = DataExplorer(streaming=True, package_filter=PackageFilter(arches=["aarch64", "noarch"]))
+
+        assert explorer.explore_api() is True
+        assert sorted(explorer.p11_packages_by_arch) == ["aarch64", "noarch"]
+        assert self.mock_requests.call_count == 4
+
+    def test_no_arch_filter_requests_whole_branch(self):
+        """Без фильтра архитектур запрос выполняется без параметров."""
+        response = MagicMock()
+        response.json.return_value = {"length": 1, "packages": RECORDS}
+        self.mock_requests.return_value = response
+
+        explorer = DataExplorer(package_filter=PackageFilter(name_glob="vim*"))
+        explorer.explore_api()
+
+        self.mock_requests.assert_any_call(URL.format(branch="sisyphus"), timeout=30)
+        assert {arch: sorted(table) for arch, table in explorer.sisyphus_packages_by_arch.items()} == {
+            "x86_64": ["vim"], "aarch64": ["vim-python3"]}
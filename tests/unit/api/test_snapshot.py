@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from src.api_client import DataExplorer
+from src.package_table import PackageTable, StringPool
+from src.snapshot import Snapshot, is_snapshot, load_snapshot, save_snapshot
+from tests.fixtures.package_factory import create_package_dict, create_package_object
+
+
+@pytest.fixture
+def packages_by_arch():
+    """Таблица ветки с несколькими архитектурами и повторяющимися строками."""
+    return PackageTable.from_packages({
+        "x86_64": {
+            "firefox": create_package_object(name="firefox", version="117.0", buildtime=2 ** 40),
+            "vim": create_package_object(name="vim", epoch=2, version="9.0", release="alt1"),
+        },
+        "noarch": {
+            "пакет": create_package_object(name="пакет", arch="noarch", source="исходник", release=""),
+        },
+    })
+
+
+class TestSnapshotFormat:
+    """
+    Тестирование формата бинарных снимков.
+    """
+
+    def test_round_trip(self, tmp_path, packages_by_arch):
+        """Загруженный снимок совпадает с сохранённой таблицей."""
+        path = tmp_path / "sisyphus.snap"
+
+        count = save_snapshot(path, packages_by_arch)
+        snapshot = load_snapshot(path)
+
+        assert count == 3
+        assert snapshot.length == 3
+        assert snapshot.table == packages_by_arch
+        assert set(snapshot.table["x86_64"]) == {"firefox", "vim"}
+        assert set(snapshot.table["noarch"]) == {"пакет"}
+
+    def test_load_into_shared_pool(self, tmp_path, packages_by_arch):
+        """Строки снимка переносятся в общий пул, другие ветки используют те же объекты."""
+        path = tmp_path / "sisyphus.snap"
+        save_snapshot(path, packages_by_arch)
+        pool = StringPool()
+        other = PackageTable(pool)
+        other.add("x86_64", "firefox", 0, "117.0", "alt1", 1, "firefox")
+
+        snapshot = load_snapshot(path, pool)
+
+        assert snapshot.table == packages_by_arch
+        assert snapshot.table.pool is pool
+        assert snapshot.table["x86_64"]["firefox"].version is other["x86_64"]["firefox"].version
+
+    def test_shared_pool_saves_own_strings(self, tmp_path, packages_by_arch):
+        """В снимок ветки с общим пулом не попадают строки других веток."""
+        pool = StringPool()
+        sisyphus, p11 = PackageTable(pool), PackageTable(pool)
+        sisyphus.add("x86_64", "firefox", 0, "117.0", "alt1", 1, "firefox")
+        p11.add("x86_64", "vim", 0, "9.0", "alt2", 1, "vim")
+        path = tmp_path / "sisyphus.snap"
+
+        save_snapshot(path, sisyphus)
+
+        assert b"alt2" not in path.read_bytes()
+        assert load_snapshot(path).table == sisyphus
+
+    def test_empty_branch(self, tmp_path):
+        """Снимок пустой ветки."""
+        path = tmp_path / "empty.snap"
+        save_snapshot(path, PackageTable())
+
+        snapshot = load_snapshot(path)
+
+        assert snapshot.length == 0
+        assert len(snapshot.table) == 0
+
+    def test_detection_by_content(self, tmp_path, packages_by_arch):
+        """Снимок определяется по содержимому, а не по расширению."""
+        snapshot_path = tmp_path / "branch.json"
+        json_path = tmp_path / "other.json"
+        save_snapshot(snapshot_path, packages_by_arch)
+        json_path.write_text("{}")
+
+        assert is_snapshot(snapshot_path)
+        assert not is_snapshot(json_path)
+        assert isinstance(DataExplorer.get_data_from_file("branch", snapshot_path), Snapshot)
+
+    def test_nul_in_field_rejected(self, tmp_path):
+        """Строки с NUL не могут быть сохранены в таблицу строк."""
+        packages = PackageTable.from_packages({"x86_64": {"bad": create_package_object(name="bad", source="a\0b")}})
+
+        with pytest.raises(ValueError):
+            save_snapshot(tmp_path / "bad.snap", packages)
+
+
+class TestExplorerSnapshots:
+    """
+    Тестирование загрузки снимков через DataExplorer.
+    """
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_snapshot_preferred_over_json(self, tmp_path, streaming):
+        """Если рядом с JSON лежит снимок, используется снимок."""
+        for branch, version in (("sisyphus", "117.0"), ("p11", "116.0")):
+            (tmp_path / f"{branch}.json").write_text(json.dumps({
+                "length": 1, "packages": [create_package_dict(name="firefox", version="0")]
+            }))
+            save_snapshot(tmp_path / f"{branch}.snap", PackageTable.from_packages({
+                "x86_64": {"firefox": create_package_object(name="firefox", version=version)}
+            }))
+
+        explorer = DataExplorer(source="file", streaming=streaming, data_dir=str(tmp_path))
+
+        assert explorer.explore_api() is True
+        assert explorer.sisyphus_packages_by_arch["x86_64"]["firefox"].version == "117.0"
+        assert explorer.p11_packages_by_arch["x86_64"]["firefox"].version == "116.0"
+        assert "firefox" in explorer.p11_packages_names["x86_64"]
+
+    def test_save_snapshots(self, tmp_path, packages_by_arch):
+        """save_snapshots сохраняет снимки всех веток."""
+        explorer = DataExplorer()
+        explorer.tables["sisyphus"] = packages_by_arch
+
+        paths = explorer.save_snapshots(str(tmp_path))
+
+        assert len(paths) == 2
+        assert load_snapshot(paths[0]).table == packages_by_arch
+        assert load_snapshot(paths[1]).length == 0
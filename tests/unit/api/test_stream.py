@@ -0,0 +1,139 @@
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.api_client import DataExplorer
+from src.json_stream import StreamParseError, iter_json_array_items
+from tests.fixtures.package_factory import create_package_dict
+from .conftest import BaseAPITestWithRequests
+
+
+def _payload(*packages):
+    return json.dumps({"request_args": {"arch": None}, "length": len(packages), "packages": list(packages)})
+
+
+def _split(text, size):
+    data = text.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterJsonArrayItems:
+    """
+    Тестирование инкрементального парсера.
+    """
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 10 ** 6])
+    def test_items_independent_of_chunking(self, chunk_size):
+        """Результат не зависит от того, как поток разрезан на чанки."""
+        packages = [
+            create_package_dict(name="firefox"),
+            create_package_dict(name="пакет-кириллица", source="исходник"),
+            create_package_dict(name="vim", arch="noarch"),
+        ]
+
+        result = list(iter_json_array_items(_split(_payload(*packages), chunk_size)))
+
+        assert result == packages
+
+    def test_empty_array(self):
+        """Пустой массив пакетов."""
+        assert list(iter_json_array_items([_payload()])) == []
+
+    def test_missing_key_raises(self):
+        """Отсутствие ключа packages - ошибка разбора."""
+        with pytest.raises(StreamParseError):
+            list(iter_json_array_items([b'{"length": 0}']))
+
+    def test_truncated_stream_raises(self):
+        """Обрезанный поток - ошибка разбора."""
+        text = _payload(create_package_dict(name="firefox"))
+
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array_items([text[:-10]]))
+
+
+class TestStreamingExplore(BaseAPITestWithRequests):
+    """
+    Тестирование потоковой загрузки веток.
+    """
+
+    def test_streaming_from_url(self):
+        """Пакеты из потокового ответа попадают в индексы."""
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_content.return_value = _split(_payload(create_package_dict(name="firefox")), 5)
+        self.mock_requests.return_value = mock_response
+
+        explorer = DataExplorer(streaming=True)
+        result = explorer.explore_api()
+
+        assert result is True
+        assert "firefox" in explorer.sisyphus_packages_by_arch["x86_64"]
+        assert "firefox" in explorer.p11_packages_names["x86_64"]
+        assert explorer.data == {}
+
+    def test_streaming_from_file(self, tmp_path):
+        """Потоковое чтение из файлов <branch>.json."""
+        (tmp_path / "sisyphus.json").write_text(_payload(create_package_dict(name="firefox", version="117.0")))
+        (tmp_path / "p11.json").write_text(_payload(create_package_dict(name="firefox", version="116.0")))
+
+        original_dir = os.getcwd()
+        os.chdir(tmp_path)
+        try:
+            explorer = DataExplorer(source="file", streaming=True)
+            result = explorer.explore_api()
+        finally:
+            os.chdir(original_dir)
+
+        assert result is True
+        assert explorer.sisyphus_packages_by_arch["x86_64"]["firefox"].version == "117.0"
+        assert explorer.p11_packages_by_arch["x86_64"]["firefox"].version == "116.0"
+
+    def test_branches_share_string_pool(self, tmp_path):
+        """Ветки загружаются в общий пул: одинаковые версии - один объект."""
+        (tmp_path / "sisyphus.json").write_text(_payload(create_package_dict(name="firefox", version="117.0")))
+        (tmp_path / "p11.json").write_text(_payload(create_package_dict(name="firefox", version="117.0")))
+
+        explorer = DataExplorer(source="file", data_dir=str(tmp_path), streaming=True, max_workers=2)
+        explorer.explore_api()
+
+        assert explorer.sisyphus_packages_by_arch.pool is explorer.p11_packages_by_arch.pool
+        assert (explorer.sisyphus_packages_by_arch["x86_64"]["firefox"].version
+                is explorer.p11_packages_by_arch["x86_64"]["firefox"].version)
+
+    def test_broken_stream_clears_branch(self):
+        """Ветка с битым JSON не остаётся частично загруженной."""
+        text = _payload(create_package_dict(name="firefox"), create_package_dict(name="vim"))
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_content.return_value = [text[:-20].encode()]
+        self.mock_requests.return_value = mock_response
+
+        explorer = DataExplorer(streaming=True)
+        result = explorer.explore_api()
+
+        assert result is False
+        assert len(explorer.sisyphus_packages_by_arch) == 0
+
+
+class TestLowMemoryExplore(BaseAPITestWithRequests):
+    """
+    Тестирование режима экономии памяти.
+    """
+
+    def test_low_memory_keeps_only_indexes(self, tmp_path):
+        """Записи разбираются потоково, сырые данные веток не сохраняются."""
+        (tmp_path / "sisyphus.json").write_text(_payload(create_package_dict(name="firefox", version="117.0")))
+        (tmp_path / "p11.json").write_text(_payload(create_package_dict(name="firefox", version="116.0")))
+
+        explorer = DataExplorer(source="file", data_dir=str(tmp_path), low_memory=True)
+        result = explorer.explore_api()
+
+        assert result is True
+        assert explorer.streaming is True
+        assert explorer.data == {}
+        assert not hasattr(explorer, "sisyphus_raw")
+        assert explorer.sisyphus_packages_by_arch["x86_64"]["firefox"].version == "117.0"
+        assert explorer.p11_packages_by_arch["x86_64"]["firefox"].version == "116.0"
@@ -0,0 +1,49 @@
+import json
+
+from src.bench import comparator
+from src.bench.__main__ import main
+from src.bench.common import find_regressions
+from src.comparator import RPMVersionComparator
+
+
+class TestComparatorBenchmark:
+    """
+    Тестирование набора микробенчмарков компаратора.
+    """
+
+    def test_run_reports_all_paths(self):
+        """Результаты содержат ops/sec для каждого замера и пути сравнения."""
+        results = comparator.run(size=200, repeat=1)
+
+        assert results["corpus"]["pairs"] >= 200
+        for path in ("tilde", "numeric", "alpha"):
+            assert f"compare_versions[regex,{path}]" in results["results"]
+        assert all(values["ops_per_sec"] > 0 for values in results["results"].values())
+        assert RPMVersionComparator.tokenizer == "regex"
+
+    def test_synthetic_corpus_is_deterministic(self):
+        """Один и тот же seed даёт один и тот же корпус."""
+        assert comparator.synthetic_pairs(50, seed=3) == comparator.synthetic_pairs(50, seed=3)
+
+    def test_output_and_baseline_regression(self, tmp_path, capsys):
+        """Результаты сохраняются в JSON, ухудшение относительно baseline - код 1."""
+        output = tmp_path / "current.json"
+        assert main(["comparator", "--size", "100", "--repeat", "1", "--output", str(output)]) == 0
+
+        saved = json.loads(output.read_text())
+        baseline = {"results": {name: {"ops_per_sec": values["ops_per_sec"] * 100}
+                                for name, values in saved["results"].items()}}
+        baseline_path = tmp_path / "baseline.json"
+        baseline_path.write_text(json.dumps(baseline))
+
+        assert main(["comparator", "--size", "100", "--repeat", "1", "--baseline", str(baseline_path)]) == 1
+        assert "РЕГРЕССИЯ" in capsys.readouterr().err
+
+
+def test_find_regressions_direction():
+    """Для времени рост - ухудшение, для ops/sec - падение."""
+    baseline = {"stage": {"seconds": 1.0, "ops_per_sec": 100.0}}
+
+    assert find_regressions({"stage": {"seconds": 1.5}}, baseline, "seconds", 0.2, higher_is_better=False)
+    assert not find_regressions({"stage": {"seconds": 1.1}}, baseline, "seconds", 0.2, higher_is_better=False)
+    assert find_regressions({"stage": {"ops_per_sec": 50.0}}, baseline, "ops_per_sec", 0.2, higher_is_better=True)
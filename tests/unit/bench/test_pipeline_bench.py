@@ -0,0 +1,82 @@
+import json
+import os
+
+from src.bench import pipeline
+from src.bench.__main__ import main
+from src.bench.synthetic import generate_branches
+from src.comparator import RPMVersionComparator
+
+
+class TestSyntheticBranches:
+    """
+    Тестирование генератора синтетических веток.
+    """
+
+    def test_size_arches_and_overlap(self):
+        """Размер, доли архитектур и доля общих пакетов соответствуют параметрам."""
+        sisyphus, p11 = generate_branches(size=1000, arches={"x86_64": 3, "noarch": 1}, overlap=0.5, seed=2)
+
+        assert len(sisyphus) == len(p11) == 1000
+        assert sum(record["arch"] == "x86_64" for record in sisyphus) == 750
+
+        sisyphus_keys = {(record["arch"], record["name"]) for record in sisyphus}
+        shared = [record for record in p11 if (record["arch"], record["name"]) in sisyphus_keys]
+        assert len(shared) == 500
+
+    def test_skew_produces_newer_sisyphus(self):
+        """При skew=0 версии общих пакетов совпадают, при skew=1 почти все различаются."""
+        for skew, expected in ((0.0, 0), (1.0, 1000)):
+            sisyphus, p11 = generate_branches(size=1000, arches={"x86_64": 1}, overlap=1.0, skew=skew, seed=3)
+            results = [
+                RPMVersionComparator.compare_versions(
+                    left["epoch"], left["version"], left["release"],
+                    right["epoch"], right["version"], right["release"])
+                for left, right in zip(sisyphus, p11)
+            ]
+            assert sum(result != 0 for result in results) == expected
+            if skew:
+                assert results.count(1) > results.count(-1)
+
+    def test_deterministic(self):
+        assert generate_branches(size=200, seed=5) == generate_branches(size=200, seed=5)
+
+
+class TestPipelineBenchmark:
+    """
+    Тестирование сквозного бенчмарка конвейера.
+    """
+
+    def test_run_measures_all_stages(self, tmp_path, monkeypatch):
+        """Замеряются все этапы, файлы отчётов не попадают в текущий каталог."""
+        monkeypatch.chdir(tmp_path)
+        results = pipeline.run(size=300, seed=1)
+
+        stages = ["fetch", "parse", "index", *(f"report:{name}" for name in pipeline.REPORTS),
+                  pipeline.JSON_WRITE, "total"]
+        assert list(results["results"]) == stages
+        assert all(results["results"][stage]["peak_bytes"] > 0 for stage in stages if stage != pipeline.JSON_WRITE)
+        assert os.listdir(tmp_path) == []
+
+    def test_reuses_data_dir(self, tmp_path):
+        """Сгенерированные ветки сохраняются в data_dir и используются повторно."""
+        first = pipeline.run(size=100, memory=False, data_dir=str(tmp_path))
+        second = pipeline.run(size=100, memory=False, data_dir=str(tmp_path))
+
+        assert sorted(os.listdir(tmp_path)) == ["p11.json", "sisyphus.json"]
+        assert first["corpus"]["generate_seconds"] is not None
+        assert second["corpus"]["generate_seconds"] is None
+
+    def test_stage_regression_fails(self, tmp_path):
+        """Этап, замедлившийся сильнее порога относительно baseline, даёт код 1."""
+        output = tmp_path / "current.json"
+        args = ["pipeline", "--size", "100", "--no-memory", "--arches", "x86_64=2,noarch"]
+        assert main([*args, "--output", str(output)]) == 0
+
+        saved = json.loads(output.read_text())
+        assert saved["corpus"]["arches"] == {"x86_64": 2.0, "noarch": 1.0}
+        baseline = {"results": {name: {"seconds": values["seconds"] / 100}
+                                for name, values in saved["results"].items()}}
+        baseline_path = tmp_path / "baseline.json"
+        baseline_path.write_text(json.dumps(baseline))
+
+        assert main([*args, "--baseline", str(baseline_path)]) == 1
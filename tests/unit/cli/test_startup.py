@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+MAIN = ROOT / "main.py"
+
+# Допустимое время запуска `main.py --help` сверх запуска пустого интерпретатора
+STARTUP_BUDGET = 0.05
+
+_HEAVY_MODULES = ("requests", "src.api_client", "src.processor", "src.cache")
+
+
+def _python(code: str, cwd) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True,
+        env={"PYTHONPATH": str(ROOT), "PATH": ""}
+    )
+
+
+def _best_time(args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestStartup:
+    """
+    Тестирование холодного запуска CLI.
+    """
+
+    def test_help_does_not_load_heavy_modules(self, tmp_path):
+        """--help не импортирует requests и модули загрузки и сравнения."""
+        result = _python(
+            "import runpy, sys\n"
+            f"sys.argv = [{str(MAIN)!r}, '--help']\n"
+            "try:\n"
+            f"    runpy.run_path({str(MAIN)!r}, run_name='__main__')\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            f"print(*[name for name in {_HEAVY_MODULES!r} if name in sys.modules], file=sys.stderr)\n",
+            tmp_path
+        )
+
+        assert result.stderr.strip() == ""
+        assert "compare-all" in result.stdout
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        """Импорт модулей не создаёт каталог логов, requests загружается только для запросов к API."""
+        result = _python(
+            "import sys\n"
+            "from src import DataExplorer, BranchProcessor, logger\n"
+            "print('requests' in sys.modules, len(logger.handlers))\n",
+            tmp_path
+        )
+
+        assert result.stdout.split() == ["False", "0"]
+        assert list(tmp_path.iterdir()) == []
+
+    def test_numpy_engine_checked_before_loading(self, tmp_path):
+        """Без numpy --engine numpy отклоняется при разборе аргументов, до загрузки веток."""
+        result = _python(
+            "import runpy, sys\n"
+            "sys.modules['numpy'] = None\n"
+            f"sys.argv = [{str(MAIN)!r}, 'compare-all', '--engine', 'numpy', '--source', 'file']\n"
+            "try:\n"
+            f"    runpy.run_path({str(MAIN)!r}, run_name='__main__')\n"
+            "except SystemExit as e:\n"
+            "    print(e.code, 'src.api_client' in sys.modules)\n",
+            tmp_path
+        )
+
+        assert result.stdout.split() == ["2", "False"]
+        assert "numpy" in result.stderr
+
+    def test_help_startup_budget(self):
+        """`main.py --help` запускается не более чем на 50 мс дольше пустого интерпретатора."""
+        baseline = _best_time(["-c", "pass"])
+        startup = _best_time([str(MAIN), "--help"])
+
+        assert startup - baseline < STARTUP_BUDGET, f"--help: {startup:.3f}s, интерпретатор: {baseline:.3f}s"
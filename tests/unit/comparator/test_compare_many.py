@@ -0,0 +1,54 @@
+"""
+Тесты пакетного сравнения compare_many.
+
+Что тестируется:
+- Результаты совпадают с compare_versions для каждой пары
+- Быстрые пути и их учёт в статистике
+"""
+from src.comparator import RPMVersionComparator
+from tests.fixtures.version_cases import ALL_CASES
+
+
+def test_results_match_compare_versions():
+    """Результат для каждой пары совпадает с compare_versions."""
+    pairs = [((e1, v1, r1), (e2, v2, r2)) for e1, v1, r1, e2, v2, r2, _, _ in ALL_CASES]
+
+    results, stats = RPMVersionComparator.compare_many(pairs)
+
+    assert list(results) == [expected for *_, expected, _ in ALL_CASES]
+    assert stats.total == len(ALL_CASES)
+
+
+def test_fast_paths_counted():
+    """Одинаковые тройки, разные epoch и совпадающие части учитываются отдельно."""
+    pairs = [
+        ((0, "1.0", "alt1"), (0, "1.0", "alt1")),    # одинаковые
+        ((1, "1.0", "alt1"), (0, "2.0", "alt1")),    # по epoch
+        ((0, "1.0", "alt2"), (0, "1.0", "alt1")),    # только release
+        ((0, "1.1", "alt1"), (0, "1.0", "alt1")),    # только version
+        ((0, "1.1", "alt2"), (0, "1.0", "alt1")),    # полное сравнение
+    ]
+
+    results, stats = RPMVersionComparator.compare_many(pairs)
+
+    assert list(results) == [0, 1, 1, 1, 1]
+    assert (stats.identical, stats.by_epoch, stats.single_part, stats.full) == (1, 1, 2, 1)
+    assert stats.fast_path == 4
+
+
+def test_distinct_strings_segmented_once():
+    """Повторяющиеся строки разбираются один раз за вызов."""
+    pairs = [((0, f"1.{i}", "alt1"), (0, f"1.{i + 1}", "alt2")) for i in range(10)]
+
+    _, stats = RPMVersionComparator.compare_many(pairs)
+
+    # 11 различных version и 2 различных release
+    assert stats.distinct_strings == 13
+
+
+def test_empty_input():
+    """Пустой список пар."""
+    results, stats = RPMVersionComparator.compare_many([])
+
+    assert len(results) == 0
+    assert stats.total == 0
@@ -0,0 +1,79 @@
+"""
+Тесты векторизованного движка сравнения.
+
+Что тестируется:
+- Побитовое совпадение с compare_versions на всех случаях и случайном корпусе
+- Пересчёт на Python для строк вне кодировки
+"""
+import random
+
+import pytest
+
+from src.comparator import RPMVersionComparator
+from tests.fixtures.version_cases import ALL_CASES
+
+pytest.importorskip("numpy")
+
+from src.numpy_backend import MAX_SEGMENTS, compare_many_numpy  # noqa: E402
+
+
+def _expected(pairs):
+    return [RPMVersionComparator.compare_versions(*evr1, *evr2) for evr1, evr2 in pairs]
+
+
+def _random_part(rng):
+    alphabet = ["~", ".", "_", "-", "0", "1", "2", "10", "010", "a", "b", "alt", "rc", "git", ""]
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+
+
+def test_matches_all_cases():
+    """Результаты совпадают с compare_versions на всех случаях."""
+    pairs = [((e1, v1, r1), (e2, v2, r2)) for e1, v1, r1, e2, v2, r2, _, _ in ALL_CASES]
+
+    results, stats = compare_many_numpy(pairs)
+
+    assert list(results) == _expected(pairs)
+    assert stats.total == len(pairs)
+    assert stats.fallback == 0
+
+
+def test_matches_random_corpus():
+    """Результаты совпадают с compare_versions на случайном корпусе."""
+    rng = random.Random(7)
+    pairs = [
+        ((rng.randint(0, 1), _random_part(rng), _random_part(rng)),
+         (rng.randint(0, 1), _random_part(rng), _random_part(rng)))
+        for _ in range(3000)
+    ]
+
+    results, _ = compare_many_numpy(pairs)
+
+    assert list(results) == _expected(pairs)
+
+
+def test_overflow_falls_back_to_python():
+    """Огромные числа и слишком длинные версии сравниваются на Python."""
+    long_version = ".".join(["1"] * (MAX_SEGMENTS + 5))
+    pairs = [
+        ((0, "1.0", f"alt{10 ** 30}"), (0, "1.0", f"alt{10 ** 30 - 1}")),
+        ((0, long_version, "alt1"), (0, long_version + ".1", "alt1")),
+        ((0, "1.0", "alt1"), (0, "1.0", "alt2")),
+    ]
+
+    results, stats = compare_many_numpy(pairs)
+
+    assert list(results) == _expected(pairs)
+    assert stats.fallback == 2
+
+
+def test_engine_selection():
+    """compare_many с engine="numpy" использует векторизованный движок."""
+    pairs = [((0, "1.0", "alt2"), (0, "1.0", "alt1"))]
+
+    results, stats = RPMVersionComparator.compare_many(pairs, engine="numpy")
+
+    assert list(results) == [1]
+    assert stats.full == 1
+
+    with pytest.raises(ValueError):
+        RPMVersionComparator.compare_many(pairs, engine="unknown")
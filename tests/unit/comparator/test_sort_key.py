@@ -0,0 +1,61 @@
+"""
+Тесты ключа сортировки rpm_sort_key.
+
+Что тестируется:
+- Совпадение порядка ключей с compare_versions на всех случаях из version_cases
+- Совпадение на случайном корпусе версий с тильдами, числами, буквами и разделителями
+- Использование ключа в sorted(), max() и как ключа словаря
+"""
+import random
+from operator import attrgetter
+
+import pytest
+
+from src.comparator import RPMVersionComparator, rpm_sort_key
+from tests.fixtures.package_factory import create_package_object
+from tests.fixtures.version_cases import ALL_CASES, TEST_VERSIONS
+
+
+def _sign(key1, key2):
+    return (key1 > key2) - (key1 < key2)
+
+
+def _random_part(rng):
+    alphabet = ["~", ".", "_", "-", "+", "0", "1", "2", "10", "010", "a", "b", "alt", "rc", "git"]
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+
+
+@pytest.mark.parametrize("e1,v1,r1, e2,v2,r2, expected, desc", ALL_CASES)
+def test_key_order_matches_cases(e1, v1, r1, e2, v2, r2, expected, desc):
+    """Порядок ключей совпадает с ожидаемым результатом сравнения."""
+    assert _sign(rpm_sort_key(e1, v1, r1), rpm_sort_key(e2, v2, r2)) == expected, desc
+
+
+def test_key_order_matches_compare_versions_on_random_corpus():
+    """Порядок ключей совпадает с compare_versions на случайных версиях."""
+    rng = random.Random(20240601)
+    versions = [(rng.randint(0, 1), _random_part(rng), _random_part(rng)) for _ in range(300)]
+
+    for evr1 in versions:
+        for evr2 in versions[:60]:
+            expected = RPMVersionComparator.compare_versions(*evr1, *evr2)
+            assert _sign(rpm_sort_key(*evr1), rpm_sort_key(*evr2)) == expected, (evr1, evr2)
+
+
+def test_sorted_and_max_on_packages():
+    """sorted() и max() работают с пакетами через evr_key."""
+    packages = [create_package_object(epoch=e, version=v, release=r) for e, v, r in TEST_VERSIONS]
+
+    ordered = sorted(packages, key=attrgetter("evr_key"))
+
+    for older, newer in zip(ordered, ordered[1:]):
+        assert RPMVersionComparator.compare_versions(
+            older.epoch, older.version, older.release, newer.epoch, newer.version, newer.release
+        ) <= 0
+    assert max(packages, key=attrgetter("evr_key")).epoch == 5
+
+
+def test_key_is_hashable():
+    """Равные версии дают равные ключи с одинаковым хешем."""
+    assert hash(rpm_sort_key(0, "1.0", "alt010")) == hash(rpm_sort_key(0, "1.0", "alt10"))
+    assert len({rpm_sort_key(*evr) for evr in TEST_VERSIONS}) == len(TEST_VERSIONS)
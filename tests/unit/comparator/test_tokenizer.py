@@ -0,0 +1,44 @@
+"""
+Тесты алгоритмов разбиения на сегменты.
+
+Что тестируется:
+- Совпадение regex и legacy разбиения, включая не-ASCII строки
+- Переключение алгоритма и одинаковые результаты сравнения
+"""
+import pytest
+
+from src.comparator import RPMVersionComparator
+from tests.fixtures.version_cases import ALL_CASES
+
+SAMPLES = [
+    "", "1.0.0", "alt10.git.dd4caeae", "1.0~~beta", "alt1_2", "pre-release", "-rc1",
+    "abc123def", "a" * 100, "1..2", "20230101+git", "а", "версия1.0", "1²", "١٢٣", "x\ny",
+]
+
+
+@pytest.fixture
+def legacy_tokenizer():
+    """Временно включает исходный алгоритм разбиения."""
+    RPMVersionComparator.set_tokenizer("legacy")
+    yield
+    RPMVersionComparator.set_tokenizer("regex")
+
+
+@pytest.mark.parametrize("part", SAMPLES)
+def test_regex_matches_legacy(part):
+    """Оба алгоритма дают одинаковые сегменты."""
+    assert list(RPMVersionComparator._split_into_segments(part)) == \
+        RPMVersionComparator._split_into_segments_legacy(part)
+
+
+def test_same_results_with_legacy_tokenizer(legacy_tokenizer):
+    """С исходным алгоритмом результаты сравнения не меняются."""
+    for e1, v1, r1, e2, v2, r2, expected, desc in ALL_CASES:
+        assert RPMVersionComparator.compare_versions(e1, v1, r1, e2, v2, r2) == expected, desc
+    assert RPMVersionComparator.tokenizer == "legacy"
+
+
+def test_unknown_tokenizer_rejected():
+    """Неизвестное имя алгоритма - ошибка."""
+    with pytest.raises(ValueError):
+        RPMVersionComparator.set_tokenizer("fast")
@@ -0,0 +1,87 @@
+import json
+import pstats
+
+import pytest
+
+from src.api_client import DataExplorer
+from src.metrics import Metrics, metrics
+
+
+@pytest.fixture
+def run_metrics():
+    """Экземпляр метрик, трассировка памяти и профилирование отключаются после теста."""
+    instance = Metrics()
+    yield instance
+    instance.reset()
+
+
+class TestMetrics:
+    """
+    Тестирование интервалов, счётчиков и файла метрик.
+    """
+
+    def test_spans_accumulate(self, run_metrics):
+        """Повторные интервалы с одним именем суммируются."""
+        for _ in range(3):
+            with run_metrics.span("stage"):
+                pass
+        run_metrics.count("items", 5)
+        run_metrics.count("items")
+
+        data = run_metrics.to_dict()
+        assert data["spans"]["stage"]["calls"] == 3
+        assert data["spans"]["stage"]["seconds"] >= 0
+        assert "peak_bytes" not in data["spans"]["stage"]
+        assert data["counters"] == {"items": 6}
+
+    def test_span_recorded_on_error(self, run_metrics):
+        with pytest.raises(ValueError):
+            with run_metrics.span("failing"):
+                raise ValueError
+
+        assert run_metrics.spans["failing"]["calls"] == 1
+
+    def test_memory_peak_per_span(self, run_metrics):
+        """Пик вложенного интервала учитывается и во внешнем."""
+        run_metrics.start_memory_tracking()
+        with run_metrics.span("outer"):
+            with run_metrics.span("inner"):
+                data = bytearray(4 << 20)
+                del data
+            with run_metrics.span("small"):
+                pass
+
+        spans = run_metrics.to_dict()["spans"]
+        assert spans["inner"]["peak_bytes"] >= 4 << 20
+        assert spans["outer"]["peak_bytes"] >= spans["inner"]["peak_bytes"]
+        assert spans["small"]["peak_bytes"] < 4 << 20
+        assert run_metrics.to_dict()["peak_bytes"] >= 4 << 20
+
+    def test_profile_and_write(self, run_metrics, tmp_path):
+        """Профиль cProfile сохраняется, путь к нему попадает в файл метрик."""
+        run_metrics.start_profile(str(tmp_path / "run.prof"))
+        sorted(range(1000), key=str)
+        run_metrics.stop_profile()
+        run_metrics.write(str(tmp_path / "metrics.json"), command="compare-all")
+
+        data = json.loads((tmp_path / "metrics.json").read_text())
+        assert data["command"] == "compare-all"
+        assert data["profile"] == str(tmp_path / "run.prof")
+        assert pstats.Stats(data["profile"]).total_calls > 0
+        assert data["peak_rss_bytes"] is None or data["peak_rss_bytes"] > 1 << 20
+
+
+def test_file_load_is_instrumented(tmp_path):
+    """Загрузка ветки из файла учитывает прочитанные байты и разобранные пакеты."""
+    path = tmp_path / "sisyphus.json"
+    path.write_text(json.dumps({"length": 1, "packages": [{"name": "vim", "arch": "x86_64"}]}))
+    metrics.reset()
+
+    explorer = DataExplorer(source="file", data_dir=str(tmp_path))
+    explorer.branches = ["sisyphus"]
+    explorer.explore_api()
+
+    assert metrics.counters["bytes_read"] == path.stat().st_size
+    assert metrics.counters["packages_parsed"] == 1
+    assert {"read.sisyphus", "parse.sisyphus", "index.sisyphus"} <= set(metrics.spans)
+    metrics.reset()
@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.models import Package
+from src.package_table import PackageTable, StringPool
+from tests.fixtures.package_factory import create_package_object
+
+
+@pytest.fixture
+def table():
+    """Таблица с двумя архитектурами и повторяющимися release."""
+    table = PackageTable()
+    table.add("x86_64", "firefox", 0, "117.0", "alt1", 100, "firefox")
+    table.add("x86_64", "vim", 2, "9.0", "alt1", 200, "vim")
+    table.add("noarch", "docs", 0, "1.0", "alt1", 300, "docs-src")
+    return table
+
+
+class TestStringPool:
+
+    def test_same_string_stored_once(self):
+        """Одинаковые строки получают один индекс."""
+        pool = StringPool()
+
+        assert pool.index("alt1") == pool.index("alt1")
+        assert pool.index("alt2") != pool.index("alt1")
+        assert len(pool) == 2
+
+    def test_concurrent_index(self):
+        """Потоки, заполняющие общий пул, получают согласованные индексы."""
+        pool = StringPool()
+        values = [f"alt{i % 500}" for i in range(20000)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda chunk: [pool.index(v) for v in chunk],
+                                        [values[i::4] for i in range(4)]))
+
+        assert len(pool) == 500
+        for chunk, ids in zip([values[i::4] for i in range(4)], results):
+            assert [pool.value(index) for index in ids] == chunk
+
+    def test_intern_returns_single_instance(self):
+        """intern() возвращает один экземпляр для равных строк, не добавляя их в пул."""
+        pool = StringPool()
+        first = "".join(["fire", "fox"])
+        second = "".join(["fire", "fox"])
+
+        assert first is not second
+        assert pool.intern(first) is pool.intern(second) is first
+        assert len(pool) == 0
+
+
+class TestPackageTable:
+    """
+    Тестирование колоночной таблицы пакетов.
+    """
+
+    def test_mapping_interface(self, table):
+        """Таблица ведёт себя как {arch: {name: Package}}."""
+        assert set(table) == {"x86_64", "noarch"}
+        assert "firefox" in table["x86_64"]
+        assert "firefox" not in table["noarch"]
+        assert len(table["x86_64"]) == 2
+        assert table.get("aarch64") is None
+        assert table.total() == 3
+
+    def test_lazy_package_materialization(self, table):
+        """Package создаётся при обращении и содержит все поля."""
+        package = table["x86_64"]["vim"]
+
+        assert package == Package(
+            name="vim", epoch=2, version="9.0", release="alt1", arch="x86_64", buildtime=200, source="vim"
+        )
+
+    def test_evr_without_materialization(self, table):
+        """evr() возвращает (epoch, version, release) строки."""
+        arch_table = table["x86_64"]
+        row = arch_table.row("vim")
+
+        assert arch_table.evr(row) == (2, "9.0", "alt1")
+        assert arch_table.row("missing") is None
+
+    def test_repeated_name_replaces_row(self, table):
+        """Повторное добавление имени заменяет данные, а не дублирует строку."""
+        table.add("x86_64", "firefox", 0, "118.0", "alt2", 101, "firefox")
+
+        assert len(table["x86_64"]) == 2
+        assert table["x86_64"]["firefox"].version == "118.0"
+
+    def test_repeated_strings_shared(self, table):
+        """Повторяющиеся значения хранятся в пуле один раз."""
+        assert table.pool.values.count("alt1") == 1
+        assert table["x86_64"]["firefox"].release is table["noarch"]["docs"].release
+
+    def test_shared_pool_across_branches(self):
+        """Таблицы с общим пулом хранят одинаковые значения одним объектом."""
+        pool = StringPool()
+        sisyphus, p11 = PackageTable(pool), PackageTable(pool)
+        sisyphus.add("x86_64", "firefox", 0, "".join(["117", ".0"]), "alt1", 100, "firefox")
+        p11.add("x86_64", "".join(["fire", "fox"]), 0, "".join(["117", ".0"]), "alt1", 90, "firefox")
+
+        s_table, p_table = sisyphus["x86_64"], p11["x86_64"]
+        s_evr = s_table.evr(s_table.row("firefox"))
+        p_evr = p_table.evr(p_table.row("firefox"))
+        assert s_evr[1] is p_evr[1]
+        assert next(iter(s_table)) is next(iter(p_table))
+
+    def test_from_packages_round_trip(self):
+        """Построение из словарей Package и сравнение со словарями."""
+        packages = {"x86_64": {"firefox": create_package_object(name="firefox")}}
+
+        table = PackageTable.from_packages(packages)
+
+        assert table == packages
+        assert PackageTable.from_packages(table) is table
+
+    def test_clear(self, table):
+        """clear() удаляет все архитектуры."""
+        table.clear()
+
+        assert len(table) == 0
@@ -0,0 +1,52 @@
+import json
+
+from src.processor import BranchProcessor
+from tests.fixtures.package_factory import create_package_object
+
+
+def _read(filename):
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+class TestCompareAll:
+    """
+    Тестирование построения всех отчётов за один проход.
+    """
+
+    def test_counts_by_category(self, processor_with_different_versions):
+        """Каждое имя попадает ровно в одну категорию."""
+        counts = processor_with_different_versions.compare_all()
+
+        assert counts == {"only_sisyphus": 0, "only_p11": 0, "newer": 1, "older": 0, "equal": 1}
+
+    def test_files_match_single_commands(self, processor_with_data):
+        """Файлы совпадают с результатами отдельных команд."""
+        processor_with_data.compare_all()
+        combined = {
+            name: _read(f"{name}.json")
+            for name in ("in_p11_not_in_sisyphus", "in_sisyphus_not_in_p11", "version-release_compare")
+        }
+
+        processor_with_data.p11_not_in_sisyphus()
+        processor_with_data.sisyphus_not_in_p11()
+        processor_with_data.version_release_comparison()
+
+        for name, data in combined.items():
+            assert _read(f"{name}.json") == data
+
+    def test_arch_missing_in_other_branch(self, tmp_path, monkeypatch):
+        """Архитектура, которой нет во второй ветке, целиком уникальна."""
+        monkeypatch.chdir(tmp_path)
+        sisyphus = {"x86_64": {"vim": create_package_object(name="vim", version="9.1")}}
+        p11 = {
+            "x86_64": {"vim": create_package_object(name="vim", version="9.0")},
+            "aarch64": {"vim": create_package_object(name="vim", arch="aarch64")},
+        }
+        processor = BranchProcessor(sisyphus, p11, {"x86_64": {"vim"}}, {"x86_64": {"vim"}, "aarch64": {"vim"}})
+
+        counts = processor.compare_all()
+
+        assert counts["newer"] == 1
+        assert counts["only_p11"] == 1
+        assert _read("in_p11_not_in_sisyphus.json")[0]["arch"] == "aarch64"
@@ -0,0 +1,138 @@
+import json
+
+import pytest
+
+from src.incremental import RESULTS_FILE, PreviousRun
+from src.package_table import PackageTable
+from src.processor import BranchProcessor
+
+REPORTS = ("in_sisyphus_not_in_p11", "version-release_compare", "in_p11_not_in_sisyphus")
+
+
+def _tables(packages):
+    """PackageTable ветки из {arch: {name: version}}"""
+    table = PackageTable()
+    for arch, versions in packages.items():
+        for name, version in versions.items():
+            table.add(arch, name, 0, version, "alt1", 100, name)
+    return table
+
+
+SISYPHUS = {
+    "x86_64": {"firefox": "118.0", "vim": "9.1", "bash": "5.2", "curl": "8.5"},
+    "i586": {"glibc": "2.38"},
+}
+P11 = {
+    "x86_64": {"firefox": "117.0", "vim": "9.1", "bash": "5.3", "docs": "1.0"},
+    "i586": {"glibc": "2.38"},
+}
+
+
+def _run(directory, sisyphus, p11, state):
+    """compare-all в каталоге directory с состоянием state; возвращает процессор, отчёты и delta"""
+    directory.mkdir()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(directory)
+        previous = PreviousRun.load(str(state)) if state else None
+        processor = BranchProcessor(_tables(sisyphus), _tables(p11), {}, {}, previous=previous)
+        counts = processor.compare_all()
+        if previous is not None:
+            previous.save(str(state), {"sisyphus": processor.sisyphus_packages_by_arch,
+                                       "p11": processor.p11_packages_by_arch}, processor.categories)
+    reports = {name: (directory / f"{name}.json").read_text() for name in REPORTS}
+    delta_path = directory / "compare_delta.json"
+    delta = json.loads(delta_path.read_text()) if delta_path.exists() else None
+    return processor, counts, reports, delta
+
+
+class TestIncrementalCompareAll:
+    """
+    Тестирование инкрементального compare-all.
+    """
+
+    def test_first_run_saves_state(self, tmp_path):
+        """Без состояния выполняется полный расчёт, отчёт изменений не строится."""
+        processor, counts, _, delta = _run(tmp_path / "first", SISYPHUS, P11, tmp_path / "state")
+
+        assert processor.comparison_stats.total == 4
+        assert delta is None
+        assert processor.categories["x86_64"] == {
+            "firefox": ">", "vim": "=", "bash": "<", "curl": "s", "docs": "p"}
+        assert (tmp_path / "state" / RESULTS_FILE).exists()
+
+    def test_compares_only_changed(self, tmp_path):
+        """Повторный запуск сравнивает только изменившиеся имена и даёт тот же полный отчёт."""
+        state = tmp_path / "state"
+        _run(tmp_path / "first", SISYPHUS, P11, state)
+        sisyphus = {"x86_64": {**SISYPHUS["x86_64"], "bash": "5.4"}, "i586": SISYPHUS["i586"]}
+        p11 = {"x86_64": {name: version for name, version in P11["x86_64"].items() if name != "docs"},
+               "i586": P11["i586"]}
+
+        processor, counts, reports, delta = _run(tmp_path / "second", sisyphus, p11, state)
+        _, full_counts, full_reports, _ = _run(tmp_path / "full", sisyphus, p11, None)
+
+        assert processor.comparison_stats.total == 1
+        assert (counts, reports) == (full_counts, full_reports)
+        assert delta == [
+            {"name": "bash", "arch": "x86_64", "before": "older", "after": "newer",
+             "sisyphus": "5.4-alt1", "p11": "5.3-alt1"},
+            {"name": "docs", "arch": "x86_64", "before": "only_p11", "after": None,
+             "sisyphus": None, "p11": None},
+        ]
+
+    def test_removed_arch_in_delta(self, tmp_path):
+        """Имена архитектуры, исчезнувшей из обеих веток, попадают в отчёт как удалённые."""
+        state = tmp_path / "state"
+        _run(tmp_path / "first", SISYPHUS, P11, state)
+
+        _, _, _, delta = _run(tmp_path / "second", {"x86_64": SISYPHUS["x86_64"]}, {"x86_64": P11["x86_64"]}, state)
+
+        assert delta == [{"name": "glibc", "arch": "i586", "before": "equal", "after": None,
+                          "sisyphus": None, "p11": None}]
+
+
+@pytest.mark.parametrize("options", [{"output": "report.json"}, {"output_format": "ndjson", "output": "report.ndjson"}])
+def test_delta_follows_output_options(tmp_path, monkeypatch, options):
+    """Отчёт изменений пишется в тот же приёмник, что и остальные отчёты."""
+    state = tmp_path / "state"
+    _run(tmp_path / "first", SISYPHUS, P11, state)
+    sisyphus = {"x86_64": {**SISYPHUS["x86_64"], "bash": "5.4"}, "i586": SISYPHUS["i586"]}
+    monkeypatch.chdir(tmp_path)
+    processor = BranchProcessor(_tables(sisyphus), _tables(P11), {}, {},
+                                previous=PreviousRun.load(str(state)), **options)
+
+    processor.compare_all()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(["first", "state", options["output"]])
+    text = (tmp_path / options["output"]).read_text()
+    if options.get("output_format") == "ndjson":
+        delta = [json.loads(line) for line in text.splitlines() if '"compare_delta"' in line]
+        assert [(line["section"], line["name"], line["after"]) for line in delta] == [
+            ("compare_delta", "bash", "newer")]
+    else:
+        document = json.loads(text)
+        assert [record["name"] for record in document["arches"]["x86_64"]["compare_delta"]] == ["bash"]
+        assert document["arches"]["i586"]["compare_delta"] == []
+        assert document["counts"]["compare_delta"] == 1
+
+
+class TestPreviousRun:
+    """
+    Тестирование загрузки состояния прошлого запуска.
+    """
+
+    def test_key_mismatch(self, tmp_path):
+        """Состояние, построенное с другими фильтрами, не используется."""
+        PreviousRun.save(str(tmp_path), {"sisyphus": _tables(SISYPHUS), "p11": _tables(P11)}, {}, key="x86_64")
+
+        assert PreviousRun.load(str(tmp_path), key="x86_64").available
+        assert not PreviousRun.load(str(tmp_path), key="").available
+
+    def test_snapshots_must_match_results(self, tmp_path):
+        """Снимки, не соответствующие results.json (прерванное сохранение), дают полный расчёт."""
+        PreviousRun.save(str(tmp_path), {"sisyphus": _tables(SISYPHUS), "p11": _tables(P11)}, {})
+        results = (tmp_path / RESULTS_FILE).read_text()
+        PreviousRun.save(str(tmp_path), {"sisyphus": _tables(P11), "p11": _tables(P11)}, {})
+        (tmp_path / RESULTS_FILE).write_text(results)
+
+        assert not PreviousRun.load(str(tmp_path)).available
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from src.api_client import DataExplorer
+from src.matrix import NEWEST, BranchMatrix, pair_sections
+from src.processor import BranchProcessor
+from tests.fixtures.package_factory import create_package_dict, create_package_object
+
+
+def _read(filename):
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def tables():
+    """Три ветки: firefox разных версий, vim только в двух, mc только в p10."""
+    return {
+        "sisyphus": {"x86_64": {
+            "firefox": create_package_object(name="firefox", version="118.0"),
+            "vim": create_package_object(name="vim", version="9.1"),
+        }},
+        "p11": {"x86_64": {
+            "firefox": create_package_object(name="firefox", version="117.0"),
+            "vim": create_package_object(name="vim", version="9.1"),
+        }},
+        "p10": {
+            "x86_64": {
+                "firefox": create_package_object(name="firefox", version="119.0"),
+                "mc": create_package_object(name="mc", version="4.8"),
+            },
+            "noarch": {"docs": create_package_object(name="docs", arch="noarch")},
+        },
+    }
+
+
+class TestBranchMatrix:
+    """
+    Тестирование сравнения нескольких веток за один запуск.
+    """
+
+    def test_pairwise_counts(self, tmp_path, monkeypatch, tables):
+        """Счётчики каждой пары веток."""
+        monkeypatch.chdir(tmp_path)
+
+        counts = BranchMatrix(tables).pairwise()
+
+        assert counts == {
+            "sisyphus/p11": {"only_sisyphus": 0, "only_p11": 0, "newer": 1, "older": 0, "equal": 1},
+            "sisyphus/p10": {"only_sisyphus": 1, "only_p10": 2, "newer": 0, "older": 1, "equal": 0},
+            "p11/p10": {"only_p11": 1, "only_p10": 2, "newer": 0, "older": 1, "equal": 0},
+        }
+
+    def test_pair_matches_compare_all(self, tmp_path, monkeypatch, tables):
+        """Отчёты пары совпадают с compare-all для двух веток."""
+        monkeypatch.chdir(tmp_path)
+        BranchMatrix(tables).pairwise()
+        only_sisyphus, newer, _, only_p10 = pair_sections("sisyphus", "p10")
+        matrix_reports = [_read(f"{name}.json") for name in (only_sisyphus, newer, only_p10)]
+
+        BranchProcessor(tables["sisyphus"], tables["p10"], tables["sisyphus"], tables["p10"]).compare_all()
+
+        assert matrix_reports == [_read(f"{name}.json") for name in (
+            "in_sisyphus_not_in_p11", "version-release_compare", "in_p11_not_in_sisyphus")]
+
+    def test_newest_document(self, tmp_path, tables):
+        """Режим newest: ветка с самой новой версией и EVR всех веток."""
+        path = tmp_path / "matrix.json"
+
+        counts = BranchMatrix(tables, output=str(path)).newest()
+
+        document = _read(path)
+        records = {record["name"]: record for record in document["arches"]["x86_64"][NEWEST]}
+        assert records["firefox"]["branch"] == "p10"
+        assert records["firefox"]["version"] == "119.0"
+        assert records["firefox"]["branches"] == {"sisyphus": "118.0-alt1", "p11": "117.0-alt1", "p10": "119.0-alt1"}
+        assert records["vim"]["branch"] == "sisyphus"
+        assert records["mc"]["branches"]["sisyphus"] is None
+        assert document["arches"]["noarch"][NEWEST][0]["branch"] == "p10"
+        assert counts == {"sisyphus": 1, "p11": 0, "p10": 3, "tied": 1}
+
+    def test_requires_two_branches(self, tables):
+        """Одной ветки недостаточно."""
+        with pytest.raises(ValueError):
+            BranchMatrix({"sisyphus": tables["sisyphus"]})
+
+
+def test_explorer_loads_requested_branches(tmp_path):
+    """DataExplorer загружает каждую из заданных веток один раз."""
+    for branch, version in (("sisyphus", "3.0"), ("p10", "2.0"), ("p9", "1.0")):
+        packages = [create_package_dict(name="firefox", version=version)]
+        (tmp_path / f"{branch}.json").write_text(json.dumps({"length": 1, "packages": packages}))
+
+    explorer = DataExplorer(source="file", data_dir=str(tmp_path), branches=["sisyphus", "p10", "p9", "p10"])
+
+    assert explorer.explore_api() is True
+    assert explorer.branches == ["sisyphus", "p10", "p9"]
+    assert DataExplorer.branches == ["sisyphus", "p11"]
+    assert [explorer.tables[branch]["x86_64"]["firefox"].version for branch in explorer.branches] == [
+        "3.0", "2.0", "1.0"]
@@ -0,0 +1,88 @@
+import argparse
+
+import pytest
+
+from src import parallel
+from src.api_client import DataExplorer
+from src.bench.synthetic import generate_branches
+from src.cli import _jobs
+from src.package_table import PackageTable, StringPool
+from src.processor import BranchProcessor
+
+
+@pytest.fixture(scope="module")
+def branch_tables():
+    """Синтетическая пара веток с общим пулом строк."""
+    pool = StringPool()
+    tables = []
+    for records in generate_branches(size=3000, seed=7):
+        table = PackageTable(pool)
+        DataExplorer._index_packages(records, table)
+        tables.append(table)
+    return tables
+
+
+def _run(tmp_path, tables, command, jobs, **options):
+    directory = tmp_path / f"jobs{jobs}"
+    directory.mkdir()
+    if "output" in options:
+        options["output"] = str(directory / options["output"])
+    sisyphus, p11 = tables
+    processor = BranchProcessor(sisyphus, p11, sisyphus, p11, jobs=jobs, **options)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(directory)
+        result = getattr(processor, command)()
+    files = {path.name: path.read_bytes() for path in sorted(directory.iterdir())}
+    return result, files, processor.comparison_stats.total
+
+
+class TestParallelComparison:
+    """
+    Тестирование сравнения в пуле процессов.
+    """
+
+    @pytest.mark.parametrize("command", [
+        "compare_all", "version_release_comparison", "p11_not_in_sisyphus", "sisyphus_not_in_p11"])
+    @pytest.mark.parametrize("options", [
+        {}, {"compact": True}, {"output": "report.json"}, {"output_format": "ndjson", "output": "report.ndjson"}])
+    def test_matches_sequential(self, tmp_path, monkeypatch, branch_tables, command, options):
+        """Результат и файлы совпадают с последовательным сравнением побайтово."""
+        # Мелкие шарды: крупные архитектуры делятся на несколько диапазонов строк
+        monkeypatch.setattr(parallel, "SHARD_ROWS", 200)
+
+        sequential = _run(tmp_path, branch_tables, command, 1, **options)
+        sharded = _run(tmp_path, branch_tables, command, 2, **options)
+
+        assert sharded == sequential
+        assert any(sequential[1].values())
+
+    def test_shards_split_large_arch(self, branch_tables):
+        """Архитектура делится на непрерывные диапазоны строк."""
+        sisyphus, p11 = branch_tables
+        arch_table = sisyphus["x86_64"]
+
+        shards = list(parallel.build_shards("x86_64", arch_table, p11["x86_64"], "only", "newer",
+                                            {"only": str, "newer": str}, shard_rows=200))
+
+        assert [name for shard in shards for name in shard.names] == list(arch_table)
+        assert len(shards) == -(-len(arch_table) // 200)
+        assert all(shard.strings is shard.other_strings for shard in shards)
+
+
+@pytest.mark.parametrize("jobs, rows, expected", [
+    (1, 10 ** 6, 1),
+    (4, 10, 4),
+    (None, 10, 1),
+])
+def test_resolve_jobs(jobs, rows, expected):
+    """Явное количество процессов используется как есть, auto - только для больших веток."""
+    assert parallel.resolve_jobs(jobs, rows) == expected
+
+
+def test_jobs_option():
+    """--jobs принимает auto или положительное число."""
+    assert _jobs("auto") is None
+    assert _jobs("8") == 8
+    for value in ("0", "many"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            _jobs(value)
@@ -1,5 +1,6 @@
 from unittest.mock import patch
 from src.processor import BranchProcessor
+from src.report_writer import JsonArrayWriter
 from tests.fixtures.package_factory import create_package_object
 
 class TestPublicMethods:
@@ -29,16 +30,17 @@ class TestPublicMethods:
 
         assert result == 1
 
-    def test_convert_packages_to_json_called(self, processor_with_different_versions):
-        """Проверяет, что convert_packages_to_json вызывается для сохранения результатов."""
-        with patch.object(BranchProcessor, 'convert_packages_to_json') as mock_convert:
+    def test_report_records_written_one_by_one(self, processor_with_different_versions):
+        """Проверяет, что записи отчёта передаются писателю по одной, без промежуточного списка."""
+        with patch.object(JsonArrayWriter, 'write', autospec=True) as mock_write:
             processor_with_different_versions.version_release_comparison()
 
-            mock_convert.assert_called_once()
-            args, kwargs = mock_convert.call_args
+            mock_write.assert_called_once()
+            writer, record = mock_write.call_args.args
 
-            assert isinstance(args[0], list)  # список пакетов
-            assert args[1] == "version-release_compare"
+            assert isinstance(record, dict)  # запись одного пакета
+            assert record["name"] == "firefox"
+            assert writer.path == "version-release_compare.json"
 
     def test_methods_can_be_called_multiple_times(self, processor_with_data):
         """Методы можно вызывать несколько раз."""
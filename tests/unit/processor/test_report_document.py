@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from src.processor import BranchProcessor, P11_NOT_IN_SISYPHUS, SISYPHUS_NOT_IN_P11, VERSION_COMPARE
+from tests.fixtures.package_factory import create_package_object
+
+
+@pytest.fixture
+def branches():
+    sisyphus = {
+        "x86_64": {
+            "vim": create_package_object(name="vim", version="9.1"),
+            "emacs": create_package_object(name="emacs"),
+        },
+        "noarch": {"docs": create_package_object(name="docs", arch="noarch")},
+    }
+    p11 = {
+        "x86_64": {
+            "vim": create_package_object(name="vim", version="9.0"),
+            "nano": create_package_object(name="nano"),
+        },
+        "aarch64": {"vim": create_package_object(name="vim", arch="aarch64")},
+    }
+    return sisyphus, p11
+
+
+class TestArchReportDocument:
+    """
+    Тестирование единого документа отчётов с разбиением по архитектурам.
+    """
+
+    def test_compare_all_document(self, tmp_path, monkeypatch, branches):
+        """Все архитектуры обеих веток, секции в фиксированном порядке и счётчики."""
+        monkeypatch.chdir(tmp_path)
+        output = tmp_path / "report.json"
+        processor = BranchProcessor(*branches, *branches, output=str(output))
+
+        counts = processor.compare_all()
+
+        text = output.read_text(encoding="utf-8")
+        document = json.loads(text)
+        assert text == json.dumps(document, indent=2) + "\n"
+        assert list(document["arches"]) == ["x86_64", "noarch", "aarch64"]
+
+        x86_64 = document["arches"]["x86_64"]
+        assert list(x86_64) == [SISYPHUS_NOT_IN_P11, VERSION_COMPARE, P11_NOT_IN_SISYPHUS, "counts"]
+        assert [pkg["name"] for pkg in x86_64[SISYPHUS_NOT_IN_P11]] == ["emacs"]
+        assert [pkg["version"] for pkg in x86_64[VERSION_COMPARE]] == ["9.1"]
+        assert [pkg["name"] for pkg in x86_64[P11_NOT_IN_SISYPHUS]] == ["nano"]
+        assert document["arches"]["aarch64"]["counts"] == {
+            SISYPHUS_NOT_IN_P11: 0, VERSION_COMPARE: 0, P11_NOT_IN_SISYPHUS: 1}
+
+        assert document["counts"] == {SISYPHUS_NOT_IN_P11: 2, VERSION_COMPARE: 1, P11_NOT_IN_SISYPHUS: 2}
+        assert counts["only_sisyphus"] == 2 and counts["only_p11"] == 2 and counts["newer"] == 1
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["report.json"]
+
+    def test_compact_matches_indented(self, tmp_path, branches):
+        """Компактный документ содержит те же данные."""
+        indented, compact = tmp_path / "indented.json", tmp_path / "compact.json"
+        BranchProcessor(*branches, *branches, output=str(indented)).compare_all()
+        BranchProcessor(*branches, *branches, output=str(compact), compact=True).compare_all()
+
+        assert "\n" not in compact.read_text().rstrip("\n")
+        assert json.loads(compact.read_text()) == json.loads(indented.read_text())
+
+    def test_single_command_to_stdout(self, branches, capsys):
+        """Отдельная команда пишет только свою секцию, "-" - вывод в stdout."""
+        count = BranchProcessor(*branches, *branches, output="-").p11_not_in_sisyphus()
+
+        document = json.loads(capsys.readouterr().out)
+        assert count == 2
+        assert document["arches"]["noarch"] == {P11_NOT_IN_SISYPHUS: [], "counts": {P11_NOT_IN_SISYPHUS: 0}}
+        assert [pkg["arch"] for pkg in document["arches"]["aarch64"][P11_NOT_IN_SISYPHUS]] == ["aarch64"]
+        assert document["counts"] == {P11_NOT_IN_SISYPHUS: 2}
@@ -0,0 +1,53 @@
+import json
+
+from src.processor import BranchProcessor, P11_NOT_IN_SISYPHUS, SISYPHUS_NOT_IN_P11, VERSION_COMPARE
+from src.report_writer import NdjsonReportStream, evr_string
+from tests.fixtures.package_factory import create_package_object
+
+
+class TestNdjsonReports:
+    """
+    Тестирование потокового вывода NDJSON.
+    """
+
+    def test_compare_all_lines(self, capsys):
+        """Каждая строка - отдельный JSON с секцией, архитектурой и EVR."""
+        sisyphus = {"x86_64": {
+            "vim": create_package_object(name="vim", version="9.1", epoch=1),
+            "emacs": create_package_object(name="emacs"),
+        }}
+        p11 = {"x86_64": {
+            "vim": create_package_object(name="vim", version="9.0", epoch=1),
+            "nano": create_package_object(name="nano"),
+        }}
+        processor = BranchProcessor(sisyphus, p11, sisyphus, p11, output_format="ndjson")
+
+        counts = processor.compare_all()
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [(line["section"], line["name"]) for line in lines] == [
+            (SISYPHUS_NOT_IN_P11, "emacs"), (VERSION_COMPARE, "vim"), (P11_NOT_IN_SISYPHUS, "nano")]
+        assert lines[1]["evr"] == "1:9.1-alt1"
+        assert all(line["arch"] == "x86_64" for line in lines)
+        assert counts["newer"] == 1
+
+    def test_flushes_in_batches(self, tmp_path):
+        """Строки попадают в вывод пачками, не дожидаясь конца отчёта."""
+        path = tmp_path / "out.ndjson"
+        record = {"name": "vim", "epoch": 0, "version": "9.0", "release": "alt1",
+                  "arch": "x86_64", "buildtime": 0, "source": "vim"}
+
+        with NdjsonReportStream(str(path), (VERSION_COMPARE,), batch_size=2) as stream:
+            stream.write(VERSION_COMPARE, record)
+            assert path.read_text() == ""
+            stream.write(VERSION_COMPARE, record)
+            assert len(path.read_text().splitlines()) == 2
+            stream.write(VERSION_COMPARE, record)
+
+        assert len(path.read_text().splitlines()) == 3
+        assert stream.counts == {VERSION_COMPARE: 3}
+
+
+def test_evr_string():
+    assert evr_string(0, "1.0", "alt1") == "1.0-alt1"
+    assert evr_string(2, "1.0", "alt1") == "2:1.0-alt1"
@@ -0,0 +1,74 @@
+import gzip
+import json
+from dataclasses import asdict
+
+import pytest
+
+from src.processor import BranchProcessor
+from src.report_writer import JsonArrayWriter, package_record, write_packages
+from tests.fixtures.package_factory import create_package_object
+
+
+@pytest.fixture
+def packages():
+    return [
+        create_package_object(name="firefox", version="117.0"),
+        create_package_object(name="кириллица", version="1.0~rc1", epoch=2),
+        create_package_object(name='quote"name', source="src\\path"),
+    ]
+
+
+class TestJsonArrayWriter:
+    """
+    Тестирование потоковой записи отчётов.
+    """
+
+    @pytest.mark.parametrize("count", [0, 1, 3])
+    def test_matches_json_dump_indent(self, tmp_path, packages, count):
+        """Обычный режим побайтово совпадает с прежним json.dump(..., indent=2)."""
+        path = write_packages(iter(packages[:count]), str(tmp_path / "report"))
+
+        expected = json.dumps([asdict(pkg) for pkg in packages[:count]], indent=2)
+        assert path == str(tmp_path / "report.json")
+        assert (tmp_path / "report.json").read_text(encoding="utf-8") == expected
+
+    def test_compact(self, tmp_path, packages):
+        """Компактный режим пишет массив без отступов."""
+        write_packages(packages, str(tmp_path / "report.json"), compact=True)
+
+        content = (tmp_path / "report.json").read_text(encoding="utf-8")
+        assert "\n" not in content
+        assert json.loads(content) == [asdict(pkg) for pkg in packages]
+
+    def test_gzip(self, tmp_path, packages):
+        """При сжатии к имени добавляется .gz, содержимое - тот же JSON."""
+        path = write_packages(packages, str(tmp_path / "report"), compress=True)
+
+        assert path.endswith("report.json.gz")
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            assert json.load(file) == [asdict(pkg) for pkg in packages]
+
+    def test_closes_array_on_error(self, tmp_path, packages):
+        """Файл остаётся корректным JSON, даже если запись прервана исключением."""
+        with pytest.raises(RuntimeError):
+            with JsonArrayWriter(str(tmp_path / "report")) as writer:
+                writer.write_package(packages[0])
+                raise RuntimeError
+
+        assert json.loads((tmp_path / "report.json").read_text()) == [package_record(packages[0])]
+
+
+def test_processor_compact_gzip_reports(tmp_path, monkeypatch, packages):
+    """Процессор пишет все отчёты в выбранном формате."""
+    monkeypatch.chdir(tmp_path)
+    sisyphus = {"x86_64": {"firefox": packages[0], "vim": create_package_object(name="vim")}}
+    p11 = {"x86_64": {"firefox": create_package_object(name="firefox", version="116.0")}}
+    processor = BranchProcessor(sisyphus, p11, sisyphus, p11, compact=True, compress=True)
+
+    counts = processor.compare_all()
+
+    assert counts["newer"] == 1 and counts["only_sisyphus"] == 1
+    with gzip.open("version-release_compare.json.gz", "rt", encoding="utf-8") as file:
+        assert json.load(file) == [asdict(packages[0])]
+    with gzip.open("in_sisyphus_not_in_p11.json.gz", "rt", encoding="utf-8") as file:
+        assert [record["name"] for record in json.load(file)] == ["vim"]
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.package_table import PackageTable
+from src.processor import COMMAND_SECTIONS, BranchProcessor
+from src.report_writer import report_paths
+from src.result_cache import ResultCache
+from tests.fixtures.package_factory import create_package_dict
+
+MAIN = Path(__file__).resolve().parents[3] / "main.py"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "results"), max_entries=2)
+
+
+class TestResultCache:
+    """
+    Тестирование кэша отчётов по хешам веток.
+    """
+
+    def test_store_and_restore(self, tmp_path, monkeypatch, cache):
+        """Восстановленные файлы совпадают с сохранёнными, результат возвращается из записи."""
+        monkeypatch.chdir(tmp_path)
+        Path("report.json").write_text('{"counts": {}}')
+        key = ResultCache.key({"sisyphus": "a", "p11": "b"}, "compare-all", {})
+        cache.store(key, "compare-all", ["report.json"], {"newer": 1})
+        Path("report.json").write_text("changed")
+
+        entry = cache.restore(key)
+
+        assert entry["result"] == {"newer": 1}
+        assert Path("report.json").read_text() == '{"counts": {}}'
+
+    def test_missing_entry(self, cache):
+        assert cache.restore(ResultCache.key({}, "compare-all", {})) is None
+
+    def test_key_depends_on_digests_and_options(self):
+        digests = {"sisyphus": "a", "p11": "b"}
+        key = ResultCache.key(digests, "compare-all", {"arches": None})
+
+        assert key == ResultCache.key(dict(digests), "compare-all", {"arches": None})
+        assert key != ResultCache.key({**digests, "p11": "c"}, "compare-all", {"arches": None})
+        assert key != ResultCache.key(digests, "compare-versions", {"arches": None})
+        assert key != ResultCache.key(digests, "compare-all", {"arches": ["x86_64"]})
+
+    def test_evicts_least_recently_used(self, tmp_path, monkeypatch, cache):
+        """Сверх max_entries удаляются записи, которые дольше всего не использовались."""
+        monkeypatch.chdir(tmp_path)
+        Path("report.json").write_text("[]")
+        keys = [ResultCache.key({"sisyphus": str(index)}, "compare-all", {}) for index in range(3)]
+        for age, key in enumerate(keys[:2]):
+            cache.store(key, "compare-all", ["report.json"], 0)
+            os.utime(tmp_path / "results" / key, (age, age))
+        assert cache.restore(keys[0]) is not None
+
+        cache.store(keys[2], "compare-all", ["report.json"], 0)
+
+        assert cache.restore(keys[1]) is None
+        assert cache.restore(keys[0]) is not None
+
+
+@pytest.mark.parametrize("command, method", [
+    ("compare-all", "compare_all"),
+    ("compare-versions", "version_release_comparison"),
+    ("p11-not-in-sisyphus", "p11_not_in_sisyphus"),
+    ("sisyphus-not-in-p11", "sisyphus_not_in_p11"),
+])
+@pytest.mark.parametrize("options", [{}, {"compress": True}, {"output": "report.json"},
+                                     {"output_format": "ndjson", "output": "report.ndjson", "compress": True}])
+def test_report_paths_match_written_files(tmp_path, monkeypatch, command, method, options):
+    """report_paths перечисляет ровно те файлы, которые пишет команда."""
+    monkeypatch.chdir(tmp_path)
+    table = PackageTable()
+    table.add("x86_64", "firefox", 0, "118.0", "alt1", 100, "firefox")
+    getattr(BranchProcessor(table, PackageTable(), {}, {}, **options), method)()
+
+    paths = report_paths(COMMAND_SECTIONS[command], options.get("output"), options.get("output_format", "json"),
+                         options.get("compress", False))
+
+    assert sorted(paths) == sorted(path.name for path in tmp_path.iterdir())
+
+
+def test_cli_restores_unchanged_branches(tmp_path):
+    """Повторный запуск с теми же файлами веток восстанавливает отчёты без загрузки."""
+    for branch, version in (("sisyphus", "118.0"), ("p11", "117.0")):
+        packages = [create_package_dict(name="firefox", version=version)]
+        (tmp_path / f"{branch}.json").write_text(json.dumps({"length": 1, "packages": packages}))
+    command = [sys.executable, str(MAIN), "compare-versions", "--source", "file", "--result-cache", "results"]
+
+    runs = [subprocess.run(command, cwd=tmp_path, capture_output=True, text=True) for _ in range(2)]
+
+    assert [run.returncode for run in runs] == [0, 0]
+    assert "восстановлены из кэша" not in runs[0].stdout
+    assert "восстановлены из кэша" in runs[1].stdout
+    assert "Branch sisyphus" not in runs[1].stdout
+    assert json.loads((tmp_path / "version-release_compare.json").read_text())[0]["version"] == "118.0"
+
+
+def test_cli_restores_delta_and_state(tmp_path):
+    """С --state попадание в кэш восстанавливает отчёт изменений и новое состояние."""
+    def write_branches(sisyphus_version):
+        for branch, version in (("sisyphus", sisyphus_version), ("p11", "117.0")):
+            packages = [create_package_dict(name="firefox", version=version)]
+            (tmp_path / f"{branch}.json").write_text(json.dumps({"length": 1, "packages": packages}))
+
+    def run():
+        command = [sys.executable, str(MAIN), "compare-all", "--source", "file", "--state", "state",
+                   "--result-cache", "results"]
+        return subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, check=True).stdout
+
+    def outputs():
+        files = ["compare_delta.json", *(f"state/{name}" for name in ("sisyphus.snap", "p11.snap", "results.json"))]
+        return {name: (tmp_path / name).read_bytes() for name in files}
+
+    write_branches("117.0")
+    run()
+    shutil.copytree(tmp_path / "state", tmp_path / "state.first")
+    write_branches("118.0")
+    run()
+    expected = outputs()
+
+    shutil.rmtree(tmp_path / "state")
+    shutil.copytree(tmp_path / "state.first", tmp_path / "state")
+    (tmp_path / "compare_delta.json").unlink()
+
+    assert "восстановлены из кэша" in run()
+    assert outputs() == expected
+    assert json.loads(expected["compare_delta.json"])[0]["after"] == "newer"
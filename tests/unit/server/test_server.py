@@ -0,0 +1,166 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from src.client import query_path, request
+from src.package_table import PackageTable
+from src.server import BranchService, QueryError, make_server, parse_listen
+
+
+class FakeExplorer:
+    """Загрузчик веток: отдаёт заданные таблицы или сообщает об ошибке."""
+
+    def __init__(self, firefox_version, ok=True):
+        self.ok = ok
+        self.tables = {"sisyphus": PackageTable(), "p11": PackageTable()}
+        self.tables["sisyphus"].add("x86_64", "firefox", 0, firefox_version, "alt1", 100, "firefox")
+        self.tables["sisyphus"].add("x86_64", "vim", 0, "9.1", "alt1", 100, "vim")
+        self.tables["p11"].add("x86_64", "firefox", 0, "117.0", "alt1", 90, "firefox")
+        self.tables["p11"].add("noarch", "docs", 0, "1.0", "alt1", 90, "docs")
+
+    def explore_api(self):
+        return self.ok
+
+
+@pytest.fixture
+def loads():
+    """Очередь результатов загрузки: каждый refresh() берёт следующий."""
+    return [FakeExplorer("118.0")]
+
+
+@pytest.fixture
+def service(loads):
+    service = BranchService(lambda: loads.pop(0), refresh_interval=0)
+    assert service.refresh()
+    return service
+
+
+@pytest.fixture
+def address(tmp_path, service):
+    """Сервер на Unix-сокете в отдельном потоке."""
+    listen = f"unix:{tmp_path / 'serve.sock'}"
+    server = make_server(service, listen)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield listen
+    server.shutdown()
+    server.server_close()
+
+
+def _get(address, path, **params):
+    return request(address, "GET", path, params)
+
+
+class TestBranchService:
+    """
+    Тестирование индексов веток в памяти.
+    """
+
+    def test_package_versions(self, service):
+        """Версии пакета по архитектурам и результат сравнения."""
+        result = service.package("firefox")
+
+        assert result["arches"] == {"x86_64": {"sisyphus": "118.0-alt1", "p11": "117.0-alt1", "result": "newer"}}
+        assert service.package("docs")["arches"]["noarch"]["result"] == "only_p11"
+
+    def test_initial_load_in_background(self, loads):
+        """До первой загрузки запросы получают 503, загрузка идёт в фоне без периодического обновления."""
+        service = BranchService(lambda: loads.pop(0), refresh_interval=0)
+        with pytest.raises(QueryError) as error:
+            service.health()
+        assert error.value.status == 503
+
+        service.start_refresh(initial=True)
+        service.stop()
+
+        assert service.health()["generation"] == 1
+
+    def test_refresh_swaps_branches(self, service, loads):
+        """Обновление подменяет ветки целиком, неудачное - оставляет прежние."""
+        previous = service.branches
+        loads.extend([FakeExplorer("119.0"), FakeExplorer("120.0", ok=False)])
+
+        assert service.refresh()
+        current = service.branches
+        assert service.refresh() is False
+
+        assert current is not previous
+        assert service.branches is current
+        assert current.generation == 2
+        assert previous.tables["sisyphus"]["x86_64"]["firefox"].version == "118.0"
+        assert service.package("firefox")["arches"]["x86_64"]["sisyphus"] == "119.0-alt1"
+
+
+class TestServer:
+    """
+    Тестирование запросов через Unix-сокет.
+    """
+
+    def test_health(self, address):
+        status, body = _get(address, "/health")
+
+        assert status == 200
+        assert json.loads(body)["packages"] == {"sisyphus": 2, "p11": 2}
+
+    def test_package_not_found(self, address):
+        status, body = _get(address, "/package/missing")
+
+        assert status == 404
+        assert "missing" in json.loads(body)["error"]
+
+    def test_report_with_filter(self, address):
+        """Отчёт по данным в памяти с фильтром по архитектуре."""
+        status, body = _get(address, "/report/compare-all", arch="x86_64", compact="1")
+
+        document = json.loads(body)
+        assert status == 200
+        assert list(document["arches"]) == ["x86_64"]
+        assert [record["name"] for record in document["arches"]["x86_64"]["version-release_compare"]] == ["firefox"]
+        assert document["counts"]["in_sisyphus_not_in_p11"] == 1
+
+    def test_report_ndjson(self, address):
+        status, body = _get(address, "/report/sisyphus-not-in-p11", format="ndjson")
+
+        assert status == 200
+        assert [json.loads(line)["name"] for line in body.splitlines()] == ["vim"]
+
+    def test_unknown_report(self, address):
+        status, _ = _get(address, "/report/everything")
+
+        assert status == 404
+
+    def test_refresh(self, address, loads):
+        loads.append(FakeExplorer("119.0"))
+
+        status, body = request(address, *query_path("refresh"))
+
+        assert status == 200
+        assert json.loads(body)["generation"] == 2
+
+
+def test_make_server_replaces_only_sockets(tmp_path, service):
+    """Оставшийся сокет заменяется, обычный файл по пути --listen не удаляется."""
+    stale = tmp_path / "stale.sock"
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.bind(str(stale))
+    make_server(service, f"unix:{stale}").server_close()
+
+    regular = tmp_path / "notes.txt"
+    regular.write_text("keep")
+    with pytest.raises(ValueError):
+        make_server(service, f"unix:{regular}")
+    assert regular.read_text() == "keep"
+
+
+def test_parse_listen():
+    assert parse_listen("unix:/run/serve.sock") == ("unix", "/run/serve.sock")
+    assert parse_listen("localhost:8000") == ("tcp", ("localhost", 8000))
+    with pytest.raises(ValueError):
+        parse_listen("localhost")
+
+
+def test_query_path_quotes_name():
+    assert query_path("package", "lib/foo bar") == ("GET", "/package/lib%2Ffoo%20bar")
+    assert query_path("health") == ("GET", "/health")